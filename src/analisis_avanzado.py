@@ -8,15 +8,22 @@ para hacer análisis adicionales (después de ejecutar ejecutar_modelo.py)
 Para economistas que quieran explorar más allá del resumen básico.
 """
 
+import numpy as np
 import pandas as pd
 from top2vec import Top2Vec
 
+from artefactos_modelo import get_representative_documents, get_topic_top_words, topic_representatives
+from cache_consultas import QUERY_CACHE, cached_search, model_cache_id
+from configuracion import CARPETA_ARTEFACTOS
+
 # =============================================================================
 # CARGAR MODELO ENTRENADO
 # =============================================================================
 
 print("Cargando modelo entrenado...")
 model = Top2Vec.load("modelos/modelo_top2vec.model")
+# Las búsquedas pasan por una caché compartida (repetirlas no recorre de nuevo los documentos)
+model_id = model_cache_id("modelos/modelo_top2vec.model")
 print(f"✅ Modelo cargado: {model.get_num_topics()} tópicos encontrados\n")
 
 # =============================================================================
@@ -30,7 +37,8 @@ print("=" * 70)
 
 # Buscar tópicos similares a estas palabras
 keywords = ["inflación", "ipc", "precios"]
-topic_words, word_scores, topic_scores, topic_nums = model.search_topics(
+topic_words, word_scores, topic_scores, topic_nums = cached_search(
+    model, model_id, 'search_topics',
     keywords=keywords, 
     num_topics=5  # Top 5 tópicos más relacionados
 )
@@ -53,11 +61,17 @@ print("=" * 70)
 # Tomar el primer tópico encontrado arriba
 topic_interes = topic_nums[0]
 
-# Obtener los documentos más representativos de ese tópico
-documents, document_scores, document_ids = model.search_documents_by_topic(
-    topic_num=topic_interes,
-    num_docs=3  # Top 3 documentos más representativos
+# Índice de documentos representativos (precalculado; se crea y guarda la primera vez)
+representativos = get_representative_documents(model, CARPETA_ARTEFACTOS)
+
+# Top 3 documentos más representativos, sin búsquedas vectoriales
+filas, document_scores, documents = topic_representatives(
+    representativos, len(model.topic_vectors), topic_interes, start=0, count=3
 )
+# El índice guarda posiciones de fila: el ID real es el doc_id del CSV que lleva el modelo
+document_ids = model.document_ids[filas]
+if documents is None:
+    documents = model.documents[filas]
 
 print(f"\nTop 3 documentos más representativos del Tópico #{topic_interes}:\n")
 for i, (doc, score, doc_id) in enumerate(zip(documents, document_scores, document_ids), 1):
@@ -78,7 +92,8 @@ print("=" * 70)
 
 # Buscar documentos sobre política monetaria
 keywords_busqueda = ["banco central", "tasa interés", "política monetaria"]
-documents, document_scores, document_ids = model.search_documents_by_keywords(
+documents, document_scores, document_ids = cached_search(
+    model, model_id, 'search_documents_by_keywords',
     keywords=keywords_busqueda,
     num_docs=3
 )
@@ -99,7 +114,8 @@ print("\n" + "=" * 70)
 print("EJEMPLO 4: Palabras similares a 'inflación'")
 print("=" * 70)
 
-palabras_similares, scores = model.similar_words(
+palabras_similares, scores = cached_search(
+    model, model_id, 'similar_words',
     keywords=["inflación"],
     keywords_neg=[],  # Puedes poner palabras que quieras excluir
     num_words=10
@@ -171,14 +187,13 @@ try:
     # Agregar columna de tópico al DataFrame
     df['topico_asignado'] = topic_assignments
     
-    # Obtener palabras clave de cada tópico
-    topic_keywords = {}
-    for topic_num in range(model.get_num_topics()):
-        words, _, _ = model.get_topics(topic_nums=[topic_num])
-        topic_keywords[topic_num] = ', '.join(words[0][:5])
+    # Obtener palabras clave de cada tópico (top-k precalculado, guardado en modelos/)
+    word_ids, _ = get_topic_top_words(model, CARPETA_ARTEFACTOS)
+    vocab = np.asarray(model.vocab, dtype=object)
+    topic_keywords = np.array([', '.join(vocab[ids[:5]]) for ids in word_ids], dtype=object)
     
     # Agregar palabras clave del tópico
-    df['topico_keywords'] = df['topico_asignado'].map(topic_keywords)
+    df['topico_keywords'] = topic_keywords[df['topico_asignado'].values]
     
     # Guardar
     output_file = "resultados/noticias_con_topicos.csv"
@@ -200,6 +215,9 @@ except Exception as e:
 print("\n" + "=" * 70)
 print("✅ ANÁLISIS COMPLETADO")
 print("=" * 70)
+cache_stats = QUERY_CACHE.stats()
+print(f"\n⚡ Caché de consultas: {cache_stats['aciertos']} aciertos, {cache_stats['fallos']} fallos "
+      f"({cache_stats['tasa_aciertos']:.0%} de aciertos)")
 print("\n💡 Puedes modificar este script para hacer tus propios análisis")
 print("   Consulta la documentación de Top2Vec para más opciones:")
 print("   https://top2vec.readthedocs.io/\n")
@@ -12,27 +12,53 @@ Fecha: Noviembre 2025
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import os
 import json
 import sys
+import copy
 from datetime import datetime
 from pathlib import Path
 import time
-import psutil
 from io import BytesIO
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from PIL import Image
+
+# Las dependencias pesadas (top2vec → umap/hdbscan/numba, gensim, plotly,
+# wordcloud, matplotlib, psutil) se importan dentro de las funciones que las
+# usan: abrir la app (o solo la pestaña de ayuda) no paga su tiempo de carga.
 
 # Añadir el directorio padre al path para importar top2vec
 sys.path.append(str(Path(__file__).parent.parent))
 
-from top2vec import Top2Vec
-from gensim.utils import simple_preprocess
-from gensim.parsing.preprocessing import strip_tags
+from huellas_datos import dataset_fingerprint, dataset_manifest, file_fingerprint, npz_fingerprint
+from entrenamiento_escalable import (
+    MUESTRA_AJUSTE, as_embedding_buffer, load_doc_ids, load_embeddings_float32, new_precomputed_model,
+    peak_rss_bytes, reset_peak_rss, select_rows, train_scalable
+)
+from artefactos_modelo import (
+    compute_topic_top_words, get_topic_top_words, save_topic_top_words, model_fingerprint,
+    build_vocab_map, get_vocab_map, save_vocab_map, clean_topic_keywords, topic_keywords_table,
+    compute_topic_hierarchy, get_topic_hierarchy, save_topic_hierarchy,
+    compute_daily_topic_counts, get_daily_topic_counts, save_daily_topic_counts,
+    save_topic_assignments, compute_doc_topic_similarity, load_daily_topic_intensities,
+    compute_representative_documents, get_representative_documents, save_representative_documents,
+    topic_recent_representatives, topic_representatives
+)
+from comparacion_modelos import compare_models
+from exportar_parquet import CARPETA_PARQUET, export_assignments_parquet, topic_keyword_ids
+from cache_consultas import QUERY_CACHE, model_cache_id
+from estabilidad_topicos import NUM_EJECUCIONES, evaluate_topic_stability, save_stability, stability_badge
+from registro_entrenamiento import NIVELES, TrainingLog, format_event, load_training_log
+from planificador_memoria import FILAS_MAX_EXCEL, describe_plan, plan_training, record_plan
+from exportacion_segundo_plano import get_export, start_export
+from topicos_dinamicos import (
+    MESES_VENTANA, PASO_VENTANA, chain_table, load_dynamic_topics, save_dynamic_topics,
+    train_dynamic_topics, window_events
+)
+from tendencias_topicos import (
+    PERIODOS_RECIENTES, cached_topic_trends, compute_topic_trends, emerging_topics, trends_table
+)
+from descargas import download_summary, file_version, format_seconds, format_size, read_in_chunks
+from duplicados import dedup_report, expand_model, find_near_duplicates
+from ejecucion_umap import MODOS_UMAP, config_mode_args, describe_mode
 
 # =============================================================================
 # CONFIGURACIÓN DE LA PÁGINA
@@ -180,6 +206,9 @@ st.markdown("""
 
 def spanish_friendly_tokenizer(document):
     """Tokenizer que preserva tildes y ñ para español"""
+    from gensim.utils import simple_preprocess
+    from gensim.parsing.preprocessing import strip_tags
+    
     clean_text = strip_tags(document)
     return simple_preprocess(clean_text, deacc=False)
 
@@ -201,16 +230,16 @@ class PrecomputedEmbeddings:
         data = np.load(embeddings_file, allow_pickle=True)
         
         # CRÍTICO: El archivo NPZ usa 'embeddings' NO 'document_vectors'
-        # pero el nuevo archivo usa 'document_vectors', soportar ambos
-        if 'embeddings' in data:
-            self.embeddings = data['embeddings']
-        elif 'document_vectors' in data:
-            self.embeddings = data['document_vectors']
-        else:
-            raise ValueError(f"No se encontraron embeddings. Claves: {list(data.keys())}")
+        # pero el nuevo archivo usa 'document_vectors', soportar ambos.
+        # Buffer único float32, contiguo y de solo lectura, leído por bloques
+        # (un .npz en float64 no se materializa completo); el modelo, UMAP y
+        # HDBSCAN comparten este mismo buffer sin copias
+        self.embeddings = load_embeddings_float32(embeddings_file)
         
         # Cargar word_vectors y vocab (CRÍTICO para Top2Vec)
         self.word_vectors = data.get('word_vectors', None)
+        if self.word_vectors is not None:
+            self.word_vectors = as_embedding_buffer(self.word_vectors)
         self.vocab = data.get('vocab', None)
         self.word_indexes = data.get('word_indexes', None)
         if self.word_indexes is not None:
@@ -223,7 +252,8 @@ class PrecomputedEmbeddings:
         
         if csv_file and os.path.exists(csv_file):
             df = pd.read_csv(csv_file)
-            self.documents = df['body'].astype(str).tolist()
+            # Array de objetos: el modelo lo reutiliza sin copiar (np.asarray)
+            self.documents = df['body'].astype(str).to_numpy(dtype=object)
             
             # Cargar fechas y doc_ids
             if 'pub_date' in df.columns:
@@ -232,6 +262,11 @@ class PrecomputedEmbeddings:
                 self.doc_ids = df['doc_id'].values
             else:
                 self.doc_ids = np.arange(len(self.documents))
+            
+            # Última barrera: textos y embeddings deben tener las mismas filas
+            if len(self.documents) != len(self.embeddings):
+                raise ValueError(f"❌ {csv_file} tiene {len(self.documents):,} filas y "
+                                 f"{embeddings_file} tiene {len(self.embeddings):,} embeddings")
         
         # Índice para mapear textos a embeddings
         self.current_batch_start = 0
@@ -261,8 +296,21 @@ class PrecomputedEmbeddings:
         return batch_embeddings
 
 
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_embedding_provider(embeddings_file, csv_file, huella):
+    """
+    Carga los embeddings una sola vez por huella de datos.
+    
+    `huella` solo se usa como clave de caché: si los archivos no cambiaron,
+    los reruns y los siguientes entrenamientos reutilizan lo ya cargado.
+    """
+    return PrecomputedEmbeddings(embeddings_file, csv_file)
+
+
 def get_system_resources():
     """Obtiene información de uso de recursos del sistema"""
+    import psutil
+    
     cpu_percent = psutil.cpu_percent(interval=1)
     memory = psutil.virtual_memory()
     
@@ -274,7 +322,7 @@ def get_system_resources():
     }
 
 
-def save_model_metadata(config, model_path, num_topics, execution_time):
+def save_model_metadata(config, model_path, num_topics, execution_time, extra=None):
     """Guarda metadata del modelo entrenado"""
     metadata = {
         'timestamp': datetime.now().isoformat(),
@@ -283,6 +331,8 @@ def save_model_metadata(config, model_path, num_topics, execution_time):
         'execution_time_seconds': execution_time,
         'config': config
     }
+    if extra:
+        metadata.update(extra)
     
     metadata_path = Path(model_path).parent / 'metadata.json'
     with open(metadata_path, 'w', encoding='utf-8') as f:
@@ -308,7 +358,8 @@ def list_available_models():
     
     models = []
     for item in models_dir.iterdir():
-        if item.is_dir():
+        # Las carpetas ocultas son modelos a medio publicar (reentrenamiento.py)
+        if item.is_dir() and not item.name.startswith('.'):
             metadata = load_model_metadata(item)
             if metadata:
                 models.append({
@@ -320,48 +371,11 @@ def list_available_models():
     return sorted(models, key=lambda x: x['metadata']['timestamp'], reverse=True)
 
 
-def clean_topic_words(words, scores, target_count=20):
-    """
-    Limpia y deduplicar palabras de tópicos eliminando variantes con puntuación.
-    
-    Args:
-        words: Lista de palabras del tópico
-        scores: Lista de scores correspondientes
-        target_count: Número de palabras únicas a retornar
-    
-    Returns:
-        Tupla (palabras_limpias, scores_limpios)
-    """
-    import re
-    stop_suffixes = ('.el', '.la', '.de', '.y', '.en', '.los', '.las', '.un', '.una', '.al', '.del', '.por', '.con', '.sin', '.para', '.sobre', '.entre', '.o', '.u')
-    seen_clean = {}
-    for word, score in zip(words, scores):
-        # Quitar puntuación periférica
-        cleaned = re.sub(r'^[^\w]+|[^\w]+$', '', word, flags=re.UNICODE)
-        # Quitar palabras con punto seguido de letras (ej: ".el", ".de") o signos
-        if re.search(r'\.[a-záéíóúñ]+$', cleaned, re.IGNORECASE) or cleaned.lower().endswith(stop_suffixes):
-            cleaned = cleaned.split('.')[0]
-        # Quitar palabras que contienen signos de puntuación internos o finales
-        if re.search(r'[\?\!\-\(\)\[\]"\'\;\:\,]', cleaned):
-            cleaned = re.sub(r'[\?\!\-\(\)\[\]"\'\;\:\,]', '', cleaned)
-        # Filtrar palabras que contienen números
-        if re.search(r'\d', cleaned):
-            continue
-        # Si la versión limpia está vacía, skip
-        if not cleaned:
-            continue
-        if cleaned.lower() not in seen_clean or score > seen_clean[cleaned.lower()][1]:
-            seen_clean[cleaned.lower()] = (cleaned, score)
-        if len(seen_clean) >= target_count:
-            break
-    items = sorted(seen_clean.values(), key=lambda x: x[1], reverse=True)
-    clean_words = [item[0] for item in items]
-    clean_scores = [item[1] for item in items]
-    return clean_words, clean_scores
-
-
 def create_wordcloud_image(words, scores, width=800, height=400, max_words=10):
     """Crea una imagen de wordcloud"""
+    from wordcloud import WordCloud
+    import matplotlib.pyplot as plt
+    
     # Limitar a top N palabras
     words = words[:max_words]
     scores = scores[:max_words]
@@ -396,58 +410,185 @@ def create_wordcloud_image(words, scores, width=800, height=400, max_words=10):
     return buf
 
 
-def export_to_excel(model, pub_dates):
-    """Exporta todos los resultados a un archivo Excel"""
-    output = BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Hoja 1: Resumen de tópicos
-        topic_sizes, topic_nums = model.get_topic_sizes()
-        
-        # Obtener todas las palabras de los tópicos una sola vez
-        all_topic_words, all_word_scores, _ = model.get_topics()
-        
-        resumen_data = []
-        for i, topic_num in enumerate(topic_nums):
-            words = all_topic_words[i]
-            word_scores = all_word_scores[i]
-            
-            # Limpiar y deduplicar palabras
-            clean_words, clean_scores = clean_topic_words(words, word_scores, target_count=10)
-            
-            resumen_data.append({
-                'topic_id': topic_num,
-                'num_documentos': topic_sizes[i],
-                'palabras_clave': ', '.join(clean_words),
-                **{f'palabra_{j+1}': clean_words[j] if j < len(clean_words) else '' for j in range(10)},
-                **{f'score_{j+1}': round(clean_scores[j], 4) if j < len(clean_scores) else 0 for j in range(10)}
-            })
-        
-        df_resumen = pd.DataFrame(resumen_data)
-        df_resumen.to_excel(writer, sheet_name='Resumen_Topicos', index=False)
-        
-        # Hoja 2: Series temporales
-        # Usar directamente doc_top que ya fue calculado por Top2Vec
-        topic_assignments = model.doc_top
-        
-        df_temporal = pd.DataFrame({
-            'fecha': pd.to_datetime(pub_dates),
-            'topico': topic_assignments
+# =============================================================================
+# GUARDADO Y EXPORTACIÓN EN SEGUNDO PLANO (ver exportacion_segundo_plano.py)
+# =============================================================================
+# Estas funciones se ejecutan en hilos de fondo: no llaman a Streamlit.
+
+def save_trained_model(model, model_dir, pub_dates, doc_ids, topic_top_words, vocab_map, topic_hierarchy,
+                       daily_counts, representatives, config, total_time, metadata_extra, log):
+    """Guarda el modelo, las fechas, los doc_id, los artefactos precalculados y la metadata"""
+    model_path = model_dir / 'modelo.model'
+    model.save(str(model_path))
+    log.event('guardado', f"💾 Modelo guardado: {model_path}")
+    
+    pub_dates_path = model_dir / 'pub_dates.npy'
+    np.save(pub_dates_path, pub_dates)
+    # doc_id del CSV de cada documento (las filas del modelo no son las del CSV con filtro de fechas)
+    np.save(model_dir / 'doc_ids.npy', doc_ids)
+    huella = model_fingerprint(model.topic_vectors, model.doc_top)
+    save_topic_top_words(model_dir, *topic_top_words, huella=huella)
+    save_vocab_map(model_dir, vocab_map)
+    save_topic_hierarchy(model_dir, topic_hierarchy)
+    save_daily_topic_counts(model_dir, *daily_counts)
+    save_topic_assignments(model_dir, model.topic_vectors, model.doc_top)
+    save_representative_documents(model_dir, representatives, huella=huella)
+    log.event('guardado', f"💾 Fechas guardadas: {pub_dates_path}")
+    
+    metadata_path = save_model_metadata(config, model_path, model.get_num_topics(), total_time,
+                                        extra=metadata_extra)
+    log.event('guardado', f"💾 Metadata guardada: {metadata_path}")
+    return metadata_path
+
+
+def build_documents_sheet(topic_assignments, topic_scores, pub_dates, doc_ids, topic_keyword_strings, texts=None):
+    """Hoja Documentos_y_Topicos: un documento por fila (con su doc_id del CSV), su tópico y palabras clave"""
+    results_df = pd.DataFrame({
+        'doc_id': doc_ids,
+        'topico': topic_assignments,
+        'score_topico': topic_scores,
+        'fecha': pd.to_datetime(pub_dates),
+        # Palabras clave del tópico asignado (limpias) por indexación directa
+        'palabras_clave': topic_keyword_strings[topic_assignments]
+    })
+    if texts is not None:
+        results_df['texto'] = texts
+    return results_df
+
+
+def build_summary_sheet(topic_sizes, topic_nums_sorted, topic_keywords, num_docs):
+    """Hoja Resumen_Topicos: tamaño y palabras clave de cada tópico"""
+    summary_data = []
+    for i, topic_num in enumerate(topic_nums_sorted):
+        clean_words, _ = topic_keywords[topic_num]
+        summary_data.append({
+            'topico_id': topic_num,
+            'num_documentos': topic_sizes[i],
+            'porcentaje': f"{(topic_sizes[i]/num_docs)*100:.2f}%",
+            'top_10_palabras': ', '.join(clean_words),
+            **{f'palabra_{j+1}': clean_words[j] if j < len(clean_words) else '' for j in range(10)}
         })
-        
-        pivot = df_temporal.groupby([df_temporal['fecha'].dt.date, 'topico']).size().unstack(fill_value=0)
-        pivot.to_excel(writer, sheet_name='Series_Temporales')
-        
-        # Hoja 3: Metadata
-        metadata = pd.DataFrame([{
-            'total_topicos': len(topic_nums),
-            'total_documentos': len(all_doc_ids),
-            'fecha_generacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }])
-        metadata.to_excel(writer, sheet_name='Metadata', index=False)
+    return pd.DataFrame(summary_data)
+
+
+def build_temporal_sheet(topic_assignments, pub_dates, topic_nums_sorted, top_n=20):
+    """Hoja Evolucion_Temporal: documentos por mes de los `top_n` tópicos más grandes"""
+    top_topics = list(topic_nums_sorted[:top_n])
+    df = pd.DataFrame({'topico': topic_assignments, 'fecha': pd.to_datetime(pub_dates)})
+    df = df[df['topico'].isin(top_topics)]
+    # Un solo groupby para todos los tópicos (antes, un filtrado + resample por tópico)
+    monthly = df.groupby(['topico', pd.Grouper(key='fecha', freq='M')]).size().rename('num_docs').reset_index()
+    monthly = monthly[monthly['num_docs'] > 0]
+    monthly['orden'] = monthly['topico'].map({t: i for i, t in enumerate(top_topics)})
+    return monthly.sort_values(['orden', 'fecha']).drop(columns='orden').reset_index(drop=True)
+
+
+def build_trends_sheets(daily_counts, num_topics, topic_keyword_strings):
+    """Hojas Tendencias_Mensuales y Topicos_Emergentes (métricas normalizadas por volumen)"""
+    fechas, tables = daily_counts
+    trends = compute_topic_trends(fechas, tables[num_topics], freq='M')
+    emerging = emerging_topics(trends)
+    emerging.insert(1, 'palabras_clave', topic_keyword_strings[emerging['topico'].to_numpy()])
+    return trends_table(trends), emerging
+
+
+def write_results_excel(results_path, log, hoja_resumen, hoja_temporal, hoja_documentos=None,
+                        hojas_tendencias=None):
+    """
+    Escribe el Excel de resultados a partir de las hojas ya preparadas.
     
-    output.seek(0)
-    return output
+    Se escribe a un archivo temporal y se renombra al final: la descarga solo
+    aparece cuando el archivo está completo.
+    """
+    tmp_path = results_path.with_name(f".{results_path.stem}.tmp.xlsx")
+    with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+        # En exportación streaming los documentos solo van al dataset Parquet
+        if hoja_documentos is not None:
+            hoja_documentos.to_excel(writer, sheet_name='Documentos_y_Topicos', index=False)
+        hoja_resumen.to_excel(writer, sheet_name='Resumen_Topicos', index=False)
+        if len(hoja_temporal):
+            hoja_temporal.to_excel(writer, sheet_name='Evolucion_Temporal', index=False)
+        if hojas_tendencias is not None:
+            hoja_tendencias, hoja_emergentes = hojas_tendencias
+            if len(hoja_tendencias) <= FILAS_MAX_EXCEL:
+                hoja_tendencias.to_excel(writer, sheet_name='Tendencias_Mensuales', index=False)
+            hoja_emergentes.to_excel(writer, sheet_name='Topicos_Emergentes', index=False)
+    os.replace(tmp_path, results_path)
+    log.event('resultados', f"💾 Resultados guardados: {results_path}")
+    return results_path
+
+
+def finish_export(model_dir, memory_plan, log, **results):
+    """Última tarea: pico real de memoria frente al plan y cierre del log"""
+    peak = peak_rss_bytes()
+    record_plan(model_dir, memory_plan, peak)
+    log.event('plan', f"🧠 Pico de RSS: {peak / 1024**2:,.0f} MB "
+              f"(estimado {memory_plan['estimacion_bytes']['pico'] / 1024**2:,.0f} MB)",
+              pico_real_bytes=peak)
+    log.flush()
+    return peak
+
+
+def render_export_status(model_name):
+    """Progreso de la exportación en segundo plano de un modelo (si hay una en curso o reciente)"""
+    export = get_export(model_name)
+    if export is None:
+        return None
+    status = pd.DataFrame(export.status())
+    if export.done():
+        failed = status[status['estado'] == 'error']
+        if len(failed):
+            st.error("❌ Algunas exportaciones fallaron: " +
+                     '; '.join(f"{row.tarea}: {row.error}" for row in failed.itertuples()))
+        return export
+    completed = (status['estado'] == 'completada').sum()
+    st.progress(completed / len(status), text=f"📦 Exportando en segundo plano: {completed}/{len(status)} tareas")
+    st.dataframe(status.drop(columns='error'), use_container_width=True, hide_index=True)
+    if st.button("🔄 Actualizar estado de la exportación", key=f"actualizar_exportacion_{model_name}"):
+        st.rerun()
+    return export
+
+
+def render_on_demand_download(key, label, file_name, mime, path=None, generate=None, version=None):
+    """
+    Descarga bajo demanda (ver descargas.py): los datos solo se leen o generan al pedirlos.
+    
+    Con `path` se muestra el tamaño y la ETA sin abrir el archivo, y al preparar
+    se lee por bloques con progreso. Con `generate` (función sin argumentos que
+    devuelve bytes) se genera al preparar; `version` identifica su contenido.
+    Solo se conserva en memoria una descarga preparada a la vez.
+    """
+    if path is not None:
+        version = file_version(path)
+        st.caption(f"📦 {download_summary(path)}")
+    prepared = st.session_state.setdefault('descargas', {})
+    entry = prepared.get(key)
+    
+    if entry is not None and entry[0] == version:
+        col_download, col_release = st.columns([3, 1])
+        with col_download:
+            st.download_button(label=label, data=entry[1], file_name=file_name, mime=mime,
+                               use_container_width=True, type="primary", key=f"{key}_descargar")
+        with col_release:
+            if st.button("✖️ Liberar", key=f"{key}_liberar", use_container_width=True,
+                         help="Libera de memoria los datos preparados"):
+                prepared.pop(key, None)
+                st.rerun()
+        return
+    
+    if st.button(f"📦 Preparar: {label}", key=f"{key}_preparar", use_container_width=True):
+        # Una sola descarga preparada en memoria a la vez
+        prepared.clear()
+        if path is not None:
+            bar = st.progress(0.0, text="Leyendo archivo...")
+            data = read_in_chunks(path, progress=lambda done, total, eta: bar.progress(
+                done / total, text=f"Leyendo {format_size(done)} de {format_size(total)} · "
+                                   f"quedan ~{format_seconds(eta)}"))
+        else:
+            with st.spinner("Generando archivo..."):
+                data = generate()
+        prepared[key] = (version, data)
+        st.rerun()
 
 
 # =============================================================================
@@ -556,6 +697,50 @@ def render_training_tab():
         st.markdown("##### 📂 Archivos de Datos")
         data_file = st.text_input("Archivo de Noticias (CSV)", value="data/noticias.csv")
         embeddings_file = st.text_input("Archivo de Embeddings (NPZ)", value="data/embeddings_precalculados.npz")
+        
+        # Modo escalable para corpus más grandes que la RAM
+        st.markdown("##### 🏗️ Corpus Grandes (opcional)")
+        
+        use_scalable = st.checkbox(
+            "Modo escalable (muestra + asignación por lotes)",
+            value=False,
+            help="Ajusta UMAP/HDBSCAN sobre una muestra estratificada por mes y asigna el resto "
+                 "en lotes paralelos leyendo los embeddings desde disco. Para millones de documentos."
+        )
+        
+        sample_size = MUESTRA_AJUSTE
+        n_workers = None
+        
+        if use_scalable:
+            col_sample, col_workers = st.columns(2)
+            with col_sample:
+                sample_size = st.number_input(
+                    "Tamaño de la muestra",
+                    min_value=10_000, max_value=2_000_000, value=MUESTRA_AJUSTE, step=10_000,
+                    help="Documentos usados para ajustar UMAP y HDBSCAN"
+                )
+            with col_workers:
+                n_workers = st.number_input(
+                    "Procesos",
+                    min_value=1, max_value=os.cpu_count() or 1, value=max((os.cpu_count() or 2) - 1, 1), step=1,
+                    help="Procesos paralelos para transformar los lotes"
+                )
+            
+            st.info("📊 Los textos no se cargan en memoria y el filtro de fechas se ignora")
+        
+        # Etapas opcionales
+        compute_full_similarity = st.checkbox(
+            "Calcular similitud completa documentos × tópicos",
+            value=False,
+            help="Guarda la matriz de similitud de cada documento con todos los tópicos (float16, en disco) "
+                 "y la participación diaria de cada tópico repartiendo cada documento entre sus tópicos más cercanos"
+        )
+        collapse_duplicates = st.checkbox(
+            "Colapsar casi-duplicados antes del clustering",
+            value=False,
+            help="Agrupa copias de agencia y artículos republicados (LSH sobre los embeddings + shingles de texto), "
+                 "ejecuta UMAP/HDBSCAN sobre un documento por grupo y asigna a cada copia el tópico de su grupo"
+        )
     
     with col2:
         st.markdown("#### ⚙️ Parámetros del Modelo")
@@ -647,6 +832,25 @@ def render_training_tab():
             - N Components: {n_components}
             - Topic Merge Delta: {topic_merge_delta}
             """)
+        
+        st.markdown("##### ⚡ Ejecución de UMAP")
+        
+        umap_mode = st.radio(
+            "Modo",
+            options=list(MODOS_UMAP),
+            format_func=lambda mode: {'reproducible': "Reproducible (semilla fija, 1 hilo)",
+                                      'rapido': "Rápido (sin semilla, todos los núcleos)"}[mode],
+            horizontal=True,
+            help="Con semilla fija UMAP optimiza en un solo hilo: mismos tópicos en cada ejecución. "
+                 "Sin semilla usa todos los núcleos en paralelo; los tópicos varían ligeramente"
+        )
+        umap_threads = None
+        if umap_mode == 'rapido':
+            umap_threads = st.number_input(
+                "Hilos de UMAP",
+                min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1, step=1,
+                help="Núcleos que usa UMAP en modo rápido"
+            )
     
     # Botón de entrenamiento
     st.markdown("---")
@@ -666,14 +870,29 @@ def render_training_tab():
                 'min_samples': min_samples,
                 'n_neighbors': n_neighbors,
                 'n_components': n_components,
-                'topic_merge_delta': topic_merge_delta
+                'topic_merge_delta': topic_merge_delta,
+                'modo_umap': umap_mode,
+                'hilos_umap': int(umap_threads) if umap_threads else None
             },
-            date_filter={'start_year': start_year, 'end_year': end_year} if use_date_filter else None
+            date_filter={'start_year': start_year, 'end_year': end_year} if use_date_filter else None,
+            scalable={'sample_size': sample_size, 'n_workers': n_workers} if use_scalable else None,
+            full_similarity=compute_full_similarity,
+            deduplicate=collapse_duplicates
         )
 
 
-def train_model(model_name, data_file, embeddings_file, config, date_filter=None):
-    """Ejecuta el entrenamiento del modelo con visualización de progreso"""
+def train_model(model_name, data_file, embeddings_file, config, date_filter=None, scalable=None,
+                full_similarity=False, deduplicate=False):
+    """
+    Ejecuta el entrenamiento del modelo con visualización de progreso
+
+    Si `scalable` es un dict ({'sample_size', 'n_workers'}), se entrena en modo
+    escalable (ver entrenamiento_escalable.train_scalable). Con `full_similarity`
+    se guarda además la matriz completa documentos × tópicos. Con `deduplicate`
+    el clustering se ejecuta sobre un representante por grupo de casi-duplicados
+    (ver duplicados.py).
+    """
+    from top2vec import Top2Vec
     
     # Contenedor de progreso
     progress_container = st.container()
@@ -701,15 +920,18 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
         log_container = st.expander("📋 Ver log detallado", expanded=True)
         log_text = log_container.empty()
         
-        logs = []
+        # Log estructurado: buffer circular para la UI + modelos/<nombre>/train_log.jsonl
+        log = TrainingLog(Path('modelos') / model_name, on_update=lambda lines: log_text.text('\n'.join(lines)))
         start_time = time.time()
+        # El servidor de Streamlit vive más que un entrenamiento: el pico de RSS
+        # que se compara con el plan debe empezar a contar aquí
+        peak_reset = reset_peak_rss()
         
         try:
             # Paso 1: Validar archivos
             progress_bar.progress(5)
             status_text.text("Validando archivos...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] Validando archivos...")
-            log_text.text('\n'.join(logs[-20:]))
+            log.event('validacion', "Validando archivos...")
             
             if not os.path.exists(data_file):
                 st.error(f"❌ No se encuentra el archivo: {data_file}")
@@ -719,91 +941,54 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
                 st.error(f"❌ No se encuentra el archivo: {embeddings_file}")
                 return
             
-            # Paso 2: Cargar datos
-            progress_bar.progress(10)
-            status_text.text("Cargando embeddings y datos...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] Cargando embeddings...")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            embedding_provider = PrecomputedEmbeddings(embeddings_file, data_file)
-            
-            resources = get_system_resources()
-            metric_cpu.metric("CPU", f"{resources['cpu_percent']:.1f}%")
-            metric_memoria.metric("RAM", f"{resources['memory_percent']:.1f}%")
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Embeddings cargados: {len(embedding_provider.embeddings):,} docs")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Paso 3: Preparar documentos
-            progress_bar.progress(20)
-            status_text.text("Preparando documentos...")
-            
-            # Aplicar filtro de fechas si está configurado
-            if date_filter and date_filter['start_year'] and date_filter['end_year']:
-                logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 📅 Aplicando filtro de fechas: {date_filter['start_year']}-{date_filter['end_year']}")
-                log_text.text('\n'.join(logs[-20:]))
-                
-                # Convertir pub_dates a datetime si no lo está
-                pub_dates_dt = pd.to_datetime(embedding_provider.pub_dates)
-                
-                # Crear máscara de fechas
-                start_date = pd.Timestamp(f"{date_filter['start_year']}-01-01")
-                end_date = pd.Timestamp(f"{date_filter['end_year']}-12-31")
-                
-                date_mask = (pub_dates_dt >= start_date) & (pub_dates_dt <= end_date)
-                indices_filtrados = np.where(date_mask)[0]
-                
-                # Filtrar todos los datos
-                original_count = len(embedding_provider.embeddings)
-                embedding_provider.embeddings = embedding_provider.embeddings[indices_filtrados]
-                embedding_provider.pub_dates = embedding_provider.pub_dates[indices_filtrados]
-                embedding_provider.doc_ids = embedding_provider.doc_ids[indices_filtrados]
-                
-                if embedding_provider.documents:
-                    embedding_provider.documents = [embedding_provider.documents[i] for i in indices_filtrados]
-                
-                filtered_count = len(embedding_provider.embeddings)
-                logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Filtrado: {original_count:,} → {filtered_count:,} docs ({filtered_count/original_count*100:.1f}%)")
-                log_text.text('\n'.join(logs[-20:]))
-            
-            # IMPORTANTE: Usar documentos del NPZ (ya tokenizados/procesados)
-            if embedding_provider.documents:
-                documents = embedding_provider.documents
-                logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Textos cargados: {len(documents):,}")
-            else:
-                documents = [f"Document {i}" for i in range(len(embedding_provider.embeddings))]
-                logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Usando placeholders")
-            
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # CRÍTICO: Siempre convertir doc_ids a strings (igual que código original)
-            # Esto es necesario para que Top2Vec funcione correctamente con embeddings precomputados
-            document_ids = [str(doc_id) for doc_id in embedding_provider.doc_ids.tolist()]
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 📋 IDs de documentos: {len(document_ids)} (como strings)")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Paso 4: Entrenar modelo
-            progress_bar.progress(30)
-            status_text.text("Entrenando Top2Vec (esto puede tomar 15-30 minutos)...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🚀 Iniciando entrenamiento Top2Vec...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] Configuración:")
-            logs.append(f"  • min_cluster_size: {config['min_cluster_size']}")
-            logs.append(f"  • min_samples: {config['min_samples']}")
-            logs.append(f"  • n_neighbors: {config['n_neighbors']}")
-            logs.append(f"  • n_components: {config['n_components']}")
-            logs.append(f"  • topic_merge_delta: {config['topic_merge_delta']}")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Actualizar métricas cada 5 segundos durante el entrenamiento
-            training_start = time.time()
+            # Huella de los datos: valida la alineación CSV/embeddings en milisegundos
+            # (el conteo de filas y el checksum de doc_id quedan cacheados junto a los archivos)
+            huella_datos = dataset_fingerprint(data_file, embeddings_file)
+            log.event('validacion', f"✅ Datos alineados: {huella_datos['num_filas']:,} filas (huella {huella_datos['huella'][:12]})",
+                      num_filas=huella_datos['num_filas'], huella=huella_datos['huella'])
+            
+            # Plan de memoria pre-vuelo: estima el pico con los metadatos del dataset
+            # (sin cargar nada) y elige estrategias si no cabe en la RAM disponible
+            embeddings_info = huella_datos['embeddings']
+            memory_plan = plan_training(
+                embeddings_info['num_filas'], embeddings_info['shape'][1], embeddings_info['dtype'],
+                config, text_bytes=huella_datos['noticias']['size'], scalable=scalable
+            )
+            memory_plan['pico_desde_entrenamiento'] = peak_reset
+            if not peak_reset:
+                log.event('plan', "⚠️ No se puede reiniciar el pico de RSS en este sistema: el pico real "
+                          "incluye la memoria usada antes de este entrenamiento", level='WARNING')
+            log.event('plan', f"🧮 {describe_plan(memory_plan)}",
+                      level='INFO' if memory_plan['cabe'] else 'WARNING', **memory_plan)
+            if not memory_plan['cabe']:
+                st.warning("⚠️ Incluso con todas las estrategias de ahorro, el pico estimado supera "
+                           "la memoria disponible. Cierra otras aplicaciones o reduce el dataset.")
+            if memory_plan['muestra_ajuste'] and not scalable:
+                scalable = {'sample_size': memory_plan['muestra_ajuste'],
+                            'n_workers': max((os.cpu_count() or 2) - 1, 1)}
+                # Cambia lo que se entrena: se avisa en pantalla, no solo en el log
+                disabled = ["textos de los documentos (Excel y documentos representativos sin texto)"]
+                if date_filter and date_filter['start_year'] and date_filter['end_year']:
+                    disabled.insert(0, f"filtro de fechas {date_filter['start_year']}-{date_filter['end_year']} "
+                                       "(se usa todo el corpus)")
+                if deduplicate:
+                    disabled.insert(0, "colapso de casi-duplicados")
+                st.warning(f"⚠️ El dataset no cabe en memoria con el entrenamiento normal: se activa el modo escalable "
+                           f"(UMAP y HDBSCAN sobre una muestra de {scalable['sample_size']:,} documentos). "
+                           f"Quedan desactivados: {'; '.join(disabled)}.")
+                log.event('plan', "⚙️ Modo escalable activado automáticamente por memoria. Desactivado: " +
+                          '; '.join(disabled), level='WARNING')
             
             # Configuración UMAP y HDBSCAN
             umap_args = {
                 'n_neighbors': config['n_neighbors'],
                 'n_components': config['n_components'],
                 'metric': 'cosine',
-                'random_state': 42
+                # Semilla y hilos según el modo (reproducible o rápido)
+                **config_mode_args(config)
             }
+            log.event('plan', f"⚡ UMAP en modo {describe_mode(config)}",
+                      modo_umap=config.get('modo_umap'), n_jobs=umap_args['n_jobs'])
             
             hdbscan_args = {
                 'min_cluster_size': config['min_cluster_size'],
@@ -812,209 +997,267 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
                 'cluster_selection_method': 'eom'
             }
             
-            # Entrenar usando método del notebook (crear modelo vacío y asignar atributos)
-            # Este es el método que se usó para crear el modelo funcional original
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔧 Creando modelo desde embeddings precomputados...")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Usar word_vectors y vocab del embedding_provider
-            word_vectors = embedding_provider.word_vectors
-            vocab = embedding_provider.vocab.tolist() if isinstance(embedding_provider.vocab, np.ndarray) else embedding_provider.vocab
-            word_indexes = embedding_provider.word_indexes
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Word vectors: {word_vectors.shape}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Vocabulario: {len(vocab)} palabras")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Crear instancia vacía de Top2Vec (método del notebook)
-            model = Top2Vec.__new__(Top2Vec)
-            
-            # Asignar atributos básicos
-            model.documents = np.array(documents, dtype="object")
-            model.num_documents = len(documents)
-            model.document_ids = np.array([str(i) for i in range(len(documents))])
-            model.doc_id2index = dict(zip(model.document_ids, list(range(len(model.document_ids)))))
-            model.doc_id_type = np.str_
-            model.document_ids_provided = False
-            
-            # Asignar embeddings precomputados
-            model.document_vectors = embedding_provider.embeddings
-            model.word_vectors = word_vectors
-            model.vocab = vocab
-            model.word_indexes = word_indexes
-            model.embedding_model = 'precomputed'
-            
-            # Inicializar variables de indexación
-            model.topic_index = None
-            model.serialized_topic_index = None
-            model.topics_indexed = False
-            model.document_index = None
-            model.serialized_document_index = None
-            model.documents_indexed = False
-            model.index_id2doc_id = None
-            model.doc_id2index_id = None
-            model.word_index = None
-            model.serialized_word_index = None
-            model.words_indexed = False
-            model.contextual_top2vec = False
-            model.verbose = False
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Modelo base creado")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Ejecutar clustering y generación de tópicos
-            progress_bar.progress(50)
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🎯 Ejecutando clustering UMAP + HDBSCAN...")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            model.compute_topics(
-                umap_args=umap_args,
-                hdbscan_args=hdbscan_args,
-                topic_merge_delta=config['topic_merge_delta'],
-                gpu_umap=False,
-                gpu_hdbscan=False,
-                index_topics=False
+            if scalable:
+                # Modo escalable: ajuste sobre una muestra y asignación del resto en lotes,
+                # leyendo los embeddings desde disco (memory-mapped)
+                if date_filter:
+                    log.event('escalable', "⚠️ El filtro de fechas se ignora en modo escalable", level='WARNING')
+                if deduplicate:
+                    log.event('escalable', "⚠️ El colapso de casi-duplicados se ignora en modo escalable", level='WARNING')
+                progress_bar.progress(10)
+                status_text.text("Entrenamiento escalable: muestra + asignación por lotes...")
+                log.event('escalable', f"🚀 Modo escalable: muestra de {scalable['sample_size']:,} docs, {scalable['n_workers']} procesos",
+                          **scalable)
+                
+                def report_scalable_progress(fraction, message):
+                    progress_bar.progress(10 + int(fraction * 80))
+                    status_text.text(message)
+                
+                training_start = time.time()
+                model, pub_dates, scalable_report = train_scalable(
+                    embeddings_file, data_file, huella_datos['huella'],
+                    umap_args, hdbscan_args, config['topic_merge_delta'],
+                    sample_size=scalable['sample_size'],
+                    n_workers=scalable['n_workers'],
+                    progress_callback=report_scalable_progress
+                )
+                doc_ids = load_doc_ids(data_file, len(pub_dates))
+                source_texts = None
+                dedup_stats = None
+                
+                log.event('escalable', f"✅ Muestra de ajuste: {scalable_report['muestra_ajuste']:,} de {scalable_report['num_documentos']:,} docs")
+                log.event('escalable', f"⚡ Transformación: {scalable_report['docs_por_segundo_transformacion']:,.0f} docs/s en {scalable_report['num_lotes']} lotes")
+                log.event('escalable', f"🧠 Pico de RSS: {scalable_report['pico_rss_mb']:,.0f} MB (procesos: {scalable_report['pico_rss_procesos_mb']:,.0f} MB)",
+                          **scalable_report)
+            else:
+                # Paso 2: Cargar datos
+                progress_bar.progress(10)
+                status_text.text("Cargando embeddings y datos...")
+                log.event('datos', "Cargando embeddings...")
+                
+                # Copia superficial: el filtro de fechas reasigna atributos y no debe tocar la caché
+                embedding_provider = copy.copy(
+                    load_embedding_provider(embeddings_file, data_file, huella_datos['huella'])
+                )
+                
+                resources = get_system_resources()
+                metric_cpu.metric("CPU", f"{resources['cpu_percent']:.1f}%")
+                metric_memoria.metric("RAM", f"{resources['memory_percent']:.1f}%")
+                
+                log.event('datos', f"✅ Embeddings cargados: {len(embedding_provider.embeddings):,} docs",
+                          num_documentos=len(embedding_provider.embeddings),
+                          cpu_percent=resources['cpu_percent'], memory_percent=resources['memory_percent'])
+                
+                # Paso 3: Preparar documentos
+                progress_bar.progress(20)
+                status_text.text("Preparando documentos...")
+                
+                # Aplicar filtro de fechas si está configurado
+                if date_filter and date_filter['start_year'] and date_filter['end_year']:
+                    log.event('datos', f"📅 Aplicando filtro de fechas: {date_filter['start_year']}-{date_filter['end_year']}")
+                    
+                    # Convertir pub_dates a datetime si no lo está
+                    pub_dates_dt = pd.to_datetime(embedding_provider.pub_dates)
+                    
+                    # Crear máscara de fechas
+                    start_date = pd.Timestamp(f"{date_filter['start_year']}-01-01")
+                    end_date = pd.Timestamp(f"{date_filter['end_year']}-12-31")
+                    
+                    date_mask = (pub_dates_dt >= start_date) & (pub_dates_dt <= end_date)
+                    indices_filtrados = np.where(date_mask)[0]
+                    
+                    # Filtrar todos los datos (vista sin copia si las filas del rango son contiguas)
+                    original_count = len(embedding_provider.embeddings)
+                    embedding_provider.embeddings = select_rows(embedding_provider.embeddings, indices_filtrados)
+                    embedding_provider.pub_dates = embedding_provider.pub_dates[indices_filtrados]
+                    embedding_provider.doc_ids = embedding_provider.doc_ids[indices_filtrados]
+                    
+                    if embedding_provider.documents is not None:
+                        embedding_provider.documents = embedding_provider.documents[indices_filtrados]
+                    
+                    filtered_count = len(embedding_provider.embeddings)
+                    log.event('datos', f"✅ Filtrado: {original_count:,} → {filtered_count:,} docs ({filtered_count/original_count*100:.1f}%)",
+                              docs_antes=original_count, docs_despues=filtered_count)
+                
+                # IMPORTANTE: Usar documentos del NPZ (ya tokenizados/procesados)
+                if embedding_provider.documents is not None:
+                    documents = embedding_provider.documents
+                    log.event('datos', f"✅ Textos cargados: {len(documents):,}")
+                else:
+                    documents = [f"Document {i}" for i in range(len(embedding_provider.embeddings))]
+                    log.event('datos', "⚠️ Usando placeholders", level='WARNING')
+                
+                # CRÍTICO: Siempre convertir doc_ids a strings (igual que código original)
+                # Esto es necesario para que Top2Vec funcione correctamente con embeddings precomputados
+                document_ids = [str(doc_id) for doc_id in embedding_provider.doc_ids.tolist()]
+                log.event('datos', f"📋 IDs de documentos: {len(document_ids)} (como strings)")
+                
+                # Casi-duplicados: el clustering se ejecuta sobre un representante por grupo
+                # y al final cada copia recibe el tópico de su representante
+                all_documents = documents
+                all_vectors = as_embedding_buffer(embedding_provider.embeddings)
+                dedup = None
+                if deduplicate:
+                    status_text.text("Detectando casi-duplicados...")
+                    dedup = find_near_duplicates(all_vectors, embedding_provider.pub_dates, embedding_provider.documents)
+                    documents = np.asarray(all_documents, dtype=object)[dedup['representantes']]
+                    log.event('deduplicacion', f"🧬 Casi-duplicados: {dedup['num_documentos']:,} → "
+                              f"{dedup['num_representantes']:,} docs ({dedup['ratio']*100:.1f}% colapsados) "
+                              f"en {dedup['segundos']:.1f} s",
+                              num_documentos=dedup['num_documentos'], num_representantes=dedup['num_representantes'],
+                              pares_duplicados=dedup['pares_duplicados'], segundos=dedup['segundos'])
+                
+                # Paso 4: Entrenar modelo
+                progress_bar.progress(30)
+                status_text.text("Entrenando Top2Vec (esto puede tomar 15-30 minutos)...")
+                log.event('entrenamiento', "🚀 Iniciando entrenamiento Top2Vec...")
+                log.event('entrenamiento', "Configuración: " + ', '.join(
+                    f"{key}={config[key]}" for key in
+                    ('min_cluster_size', 'min_samples', 'n_neighbors', 'n_components', 'topic_merge_delta')
+                ), **config)
+                
+                # Actualizar métricas cada 5 segundos durante el entrenamiento
+                training_start = time.time()
+                
+                # Entrenar usando método del notebook (crear modelo vacío y asignar atributos)
+                # Este es el método que se usó para crear el modelo funcional original
+                log.event('entrenamiento', "🔧 Creando modelo desde embeddings precomputados...")
+                
+                # Usar word_vectors y vocab del embedding_provider
+                word_vectors = embedding_provider.word_vectors
+                vocab = embedding_provider.vocab.tolist() if isinstance(embedding_provider.vocab, np.ndarray) else embedding_provider.vocab
+                word_indexes = embedding_provider.word_indexes
+                
+                log.event('entrenamiento', f"✅ Word vectors: {word_vectors.shape}")
+                log.event('entrenamiento', f"✅ Vocabulario: {len(vocab)} palabras")
+                
+                # Instancia vacía de Top2Vec con los atributos asignados (método del notebook).
+                # Embeddings precomputados: el buffer float32 compartido, sin copia,
+                # o solo las filas de los representantes si se colapsaron duplicados
+                model = new_precomputed_model(
+                    select_rows(all_vectors, dedup['representantes']) if dedup else all_vectors,
+                    word_vectors, vocab, word_indexes, documents, model_class=Top2Vec
+                )
+                
+                log.event('entrenamiento', "✅ Modelo base creado")
+                
+                # Ejecutar clustering y generación de tópicos
+                progress_bar.progress(50)
+                log.event('entrenamiento', "🎯 Ejecutando clustering UMAP + HDBSCAN...")
+                clustering_start = time.time()
+                
+                model.compute_topics(
+                    umap_args=umap_args,
+                    hdbscan_args=hdbscan_args,
+                    topic_merge_delta=config['topic_merge_delta'],
+                    gpu_umap=False,
+                    gpu_hdbscan=False,
+                    index_topics=False
+                )
+                
+                dedup_stats = None
+                if dedup is not None:
+                    expand_model(model, all_vectors, all_documents, dedup)
+                    dedup_stats = dedup_report(dedup, time.time() - clustering_start)
+                    log.event('deduplicacion', f"🧬 Asignaciones expandidas a {dedup['num_documentos']:,} docs "
+                              f"(ahorro estimado: {dedup_stats['ahorro_estimado_s']/60:.1f} min)", **dedup_stats)
+                
+                pub_dates = embedding_provider.pub_dates
+                doc_ids = embedding_provider.doc_ids
+                source_texts = embedding_provider.documents
+                scalable_report = None
+            
+            # Top-k de palabras de todos los tópicos en un solo producto matricial
+            topic_word_ids, all_word_scores = compute_topic_top_words(model.topic_vectors, model.word_vectors)
+            # Vocabulario limpio una sola vez (forma limpia, clave de deduplicación, descarte)
+            vocab_map = build_vocab_map(model.vocab)
+            # Niveles de agregación (macro-tópicos) y conteos diarios por nivel
+            num_topics_model = len(model.topic_vectors)
+            topic_hierarchy = compute_topic_hierarchy(
+                model.topic_vectors, np.bincount(model.doc_top, minlength=num_topics_model), model.word_vectors
+            )
+            daily_counts = compute_daily_topic_counts(
+                pub_dates, model.doc_top, num_topics_model, topic_hierarchy
             )
+            log.event('entrenamiento', f"🔀 Niveles de agregación: {sorted(topic_hierarchy)}")
+            # Documentos representativos de cada tópico y nivel (con fragmentos de texto)
+            representatives = compute_representative_documents(
+                model.doc_top, model.doc_dist, num_topics_model, pub_dates, source_texts,
+                topic_hierarchy, model.document_vectors
+            )
+            log.event('entrenamiento', "📄 Documentos representativos indexados",
+                      fragmentos_bytes=len(representatives['fragmentos']))
             
             progress_bar.progress(90)
             
             elapsed = time.time() - training_start
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Entrenamiento completado en {elapsed/60:.1f} minutos")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 📊 Tópicos encontrados: {model.get_num_topics()}")
-            
-            # DEBUG: Verificar estado del modelo
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔍 DEBUG: len(document_vectors) = {len(model.document_vectors)}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔍 DEBUG: len(doc_top) = {len(model.doc_top)}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔍 DEBUG: document_ids[:5] = {model.document_ids[:5]}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔍 DEBUG: document_ids dtype = {model.document_ids.dtype}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🔍 DEBUG: doc_top[:5] = {model.doc_top[:5]}")
-            
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Paso 5: Guardar modelo
+            log.event('entrenamiento', f"✅ Entrenamiento completado en {elapsed/60:.1f} minutos",
+                      segundos=round(elapsed, 1))
+            log.event('entrenamiento', f"📊 Tópicos encontrados: {model.get_num_topics()}",
+                      num_topicos=model.get_num_topics())
+            
+            # Estado del modelo (solo en el archivo de log, no en la UI)
+            log.event('entrenamiento', "Estado del modelo", level='DEBUG',
+                      len_document_vectors=len(model.document_vectors), len_doc_top=len(model.doc_top),
+                      document_ids=model.document_ids[:5].tolist(), document_ids_dtype=str(model.document_ids.dtype),
+                      doc_top=model.doc_top[:5].tolist())
+            
+            # Paso 5: el modelo ya está listo para explorar; el guardado y la
+            # exportación se hacen en segundo plano (ver exportacion_segundo_plano.py)
             progress_bar.progress(95)
-            status_text.text("Guardando modelo...")
+            status_text.text("Lanzando guardado y exportación en segundo plano...")
             
             model_dir = Path('modelos') / model_name
             model_dir.mkdir(parents=True, exist_ok=True)
-            
             model_path = model_dir / 'modelo.model'
-            model.save(str(model_path))
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 💾 Modelo guardado: {model_path}")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Guardar fechas junto con el modelo
-            pub_dates_path = model_dir / 'pub_dates.npy'
-            np.save(pub_dates_path, embedding_provider.pub_dates)
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 💾 Fechas guardadas: {pub_dates_path}")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Guardar metadata
+            results_path = model_dir / 'resultados_completos.xlsx'
             total_time = time.time() - start_time
-            metadata_path = save_model_metadata(config, model_path, model.get_num_topics(), total_time)
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 💾 Metadata guardada: {metadata_path}")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Calcular asignaciones de tópicos
-            progress_bar.progress(97)
-            status_text.text("Preparando asignaciones de tópicos...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 📊 Obteniendo asignaciones de tópicos...")
-            log_text.text('\n'.join(logs[-20:]))
             
             # Usar directamente doc_top y doc_dist que ya fueron calculados por Top2Vec
             num_docs = len(model.document_vectors)
             topic_assignments = model.doc_top  # Ya calculado internamente
             topic_scores_flat = model.doc_dist  # Ya calculado internamente
             
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Asignaciones calculadas")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Generar archivo Excel con resultados completos
-            progress_bar.progress(99)
-            status_text.text("Generando archivo de resultados...")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 📄 Generando Excel con resultados...")
-            log_text.text('\n'.join(logs[-20:]))
-            
-            # Obtener palabras clave de cada tópico
-            all_topic_words, all_word_scores, _ = model.get_topics()
-            
-            # Crear DataFrame con todos los documentos
-            results_df = pd.DataFrame({
-                'doc_id': range(num_docs),
-                'topico': topic_assignments,
-                'score_topico': topic_scores_flat,
-                'fecha': pd.to_datetime(embedding_provider.pub_dates[:num_docs])
-            })
-            
-            # Agregar palabras clave del tópico asignado (limpias)
-            def get_clean_keywords(topic_id):
-                words = all_topic_words[topic_id]
-                scores = all_word_scores[topic_id]
-                clean_w, clean_s = clean_topic_words(words, scores, target_count=10)
-                return ', '.join(clean_w)
-            
-            results_df['palabras_clave'] = results_df['topico'].apply(get_clean_keywords)
-            
-            # Si hay documentos originales, agregarlos
-            if embedding_provider.documents:
-                results_df['texto'] = embedding_provider.documents[:num_docs]
-            
-            # Reordenar columnas
-            cols = ['doc_id', 'topico', 'score_topico', 'fecha', 'palabras_clave']
-            if 'texto' in results_df.columns:
-                cols.append('texto')
-            results_df = results_df[cols]
-            
-            # Guardar Excel
-            results_path = model_dir / 'resultados_completos.xlsx'
-            with pd.ExcelWriter(results_path, engine='openpyxl') as writer:
-                # Hoja 1: Todos los documentos con sus tópicos
-                results_df.to_excel(writer, sheet_name='Documentos_y_Topicos', index=False)
-                
-                # Hoja 2: Resumen de tópicos
-                topic_sizes, topic_nums_sorted = model.get_topic_sizes()
-                summary_data = []
-                for i, topic_num in enumerate(topic_nums_sorted):
-                    words = all_topic_words[i]
-                    word_scores = all_word_scores[i]
-                    # Limpiar y deduplicar palabras
-                    clean_words, clean_scores = clean_topic_words(words, word_scores, target_count=10)
-                    summary_data.append({
-                        'topico_id': topic_num,
-                        'num_documentos': topic_sizes[i],
-                        'porcentaje': f"{(topic_sizes[i]/num_docs)*100:.2f}%",
-                        'top_10_palabras': ', '.join(clean_words),
-                        **{f'palabra_{j+1}': clean_words[j] if j < len(clean_words) else '' for j in range(10)}
-                    })
-                
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='Resumen_Topicos', index=False)
-                
-                # Hoja 3: Evolución temporal por tópico
-                temporal_data = []
-                for topic_num in topic_nums_sorted[:20]:  # Top 20 tópicos
-                    topic_docs = results_df[results_df['topico'] == topic_num]
-                    monthly = topic_docs.set_index('fecha').resample('M').size()
-                    for date, count in monthly.items():
-                        if count > 0:
-                            temporal_data.append({
-                                'topico': topic_num,
-                                'fecha': date,
-                                'num_docs': count
-                            })
-                
-                if temporal_data:
-                    df_temporal = pd.DataFrame(temporal_data)
-                    df_temporal.to_excel(writer, sheet_name='Evolucion_Temporal', index=False)
-            
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] 💾 Resultados guardados: {results_path}")
-            log_text.text('\n'.join(logs[-20:]))
+            # Palabras clave limpias de cada tópico (una vez por tópico, no por documento)
+            topic_keywords = topic_keywords_table(topic_word_ids, all_word_scores, vocab_map, target_count=10)
+            topic_keyword_strings = np.array([', '.join(words) for words, _ in topic_keywords], dtype=object)
+            topic_sizes, topic_nums_sorted = model.get_topic_sizes()
+            excel_texts = source_texts if not memory_plan['excluir_texto'] else None
+            
+            # Los hilos de fondo no pueden actualizar la UI: a partir de aquí solo escriben el log
+            log.on_update = None
+            export = start_export(model_name)
+            export.submit('modelo', save_trained_model, model, model_dir, pub_dates, doc_ids,
+                          (topic_word_ids, all_word_scores), vocab_map, topic_hierarchy, daily_counts,
+                          representatives, config, total_time, {'huella_datos': huella_datos, 'entrenamiento_escalable': scalable_report,
+                                                                 'deduplicacion': dedup_stats},
+                          log)
+            if full_similarity:
+                export.submit('similitud', compute_doc_topic_similarity,
+                              model_dir, model.document_vectors, model.topic_vectors, pub_dates)
+            # Dataset Parquet particionado por año (sin el límite de filas de Excel)
+            export.submit('parquet', export_assignments_parquet,
+                          model_dir, topic_assignments, topic_scores_flat, pub_dates,
+                          topic_keyword_ids(topic_word_ids, vocab_map), topic_keyword_strings, doc_ids)
+            # Hojas del Excel preparadas en paralelo y escritas juntas al final
+            excel_sheets = ['hoja_resumen', 'hoja_temporal', 'hojas_tendencias']
+            export.submit('hoja_resumen', build_summary_sheet, topic_sizes, topic_nums_sorted, topic_keywords, num_docs)
+            export.submit('hoja_temporal', build_temporal_sheet, topic_assignments, pub_dates, topic_nums_sorted)
+            export.submit('hojas_tendencias', build_trends_sheets, daily_counts, num_topics_model, topic_keyword_strings)
+            if not memory_plan['exportacion_streaming']:
+                export.submit('hoja_documentos', build_documents_sheet, topic_assignments, topic_scores_flat,
+                              pub_dates, doc_ids, topic_keyword_strings, excel_texts)
+                excel_sheets.append('hoja_documentos')
+            export.submit('excel', write_results_excel, results_path, log, after=excel_sheets)
+            # La metadata (de 'modelo') debe existir para registrar el plan de memoria
+            export.submit('cierre', finish_export, model_dir, memory_plan, log,
+                          after=[task for task in ('modelo', 'similitud', 'parquet', 'excel') if task in export.futures])
+            export.finish()
+            log.event('resultados', f"📦 Guardado y exportación en segundo plano: {', '.join(export.futures)}")
             
             # Completar
             progress_bar.progress(100)
-            status_text.text("✅ Entrenamiento completado!")
+            status_text.text("✅ Entrenamiento completado! (exportando en segundo plano)")
             
             # Actualizar métricas finales
             metric_tiempo.metric("Tiempo Total", f"{total_time/60:.1f} min")
@@ -1023,14 +1266,21 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
             metric_memoria.metric("RAM", f"{resources['memory_percent']:.1f}%")
             metric_eta.metric("Tópicos", f"{model.get_num_topics()}")
             
-            # Guardar en session state
+            # Guardar en session state: el explorador usa el modelo en memoria sin esperar a los archivos
             st.session_state.trained_model = model
             st.session_state.trained_model_data = {
                 'name': model_name,
                 'path': str(model_path),
-                'pub_dates': embedding_provider.pub_dates,
-                'metadata': load_model_metadata(model_dir),
+                'pub_dates': pub_dates,
+                'metadata': {'config': config, 'num_topics': model.get_num_topics(), 'huella_datos': huella_datos},
                 'topic_assignments': topic_assignments,
+                'topic_top_words': (topic_word_ids, all_word_scores),
+                'vocab_map': vocab_map,
+                'hierarchy': topic_hierarchy,
+                'daily_counts': daily_counts,
+                'representatives': representatives,
+                # modelo.model aún no existe: id de caché de esta ejecución
+                'cache_id': f"{model_name}:{log.run_id}",
                 'results_path': str(results_path)
             }
             st.session_state.current_model = model
@@ -1043,31 +1293,41 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
             - Tópicos encontrados: {model.get_num_topics()}
             - Documentos procesados: {num_docs:,}
             - Tiempo total: {total_time/60:.1f} minutos
+            
+            Ya puedes explorarlo en la pestaña **Explorar Resultados** mientras se guarda.
             """)
             
             # Mostrar ubicación de archivos generados
             st.info(f"""
-            📁 **Archivos generados:**
+            📁 **Archivos que se generan en segundo plano:**
             
             **Modelo:** `{model_path}`
             
             **Resultados completos:** `{results_path}`
             
+            **Dataset Parquet (por año):** `{model_dir / CARPETA_PARQUET}`
+            
             El archivo Excel contiene 3 hojas:
             - **Documentos_y_Topicos**: Todos los documentos con su tópico asignado
             - **Resumen_Topicos**: Estadísticas de cada tópico
             - **Evolucion_Temporal**: Evolución mensual de los top 20 tópicos
             
-            💡 Puedes abrir el Excel directamente desde la ubicación mostrada.
+            💡 El progreso y la descarga aparecen en la sección **Resultados Completos** del explorador.
             """)
+            if memory_plan['exportacion_streaming']:
+                st.caption("ℹ️ Por memoria (o por el límite de filas de Excel), la hoja "
+                           "Documentos_y_Topicos se omite: los documentos están en el dataset Parquet.")
+            elif memory_plan['excluir_texto']:
+                st.caption("ℹ️ Por memoria, el Excel se genera sin la columna `texto`.")
 
             
         except Exception as e:
             progress_bar.progress(0)
             status_text.text("")
             st.error(f"❌ Error durante el entrenamiento: {str(e)}")
-            logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ ERROR: {str(e)}")
-            log_text.text('\n'.join(logs[-20:]))
+            log.event('error', f"❌ ERROR: {str(e)}", level='ERROR')
+        finally:
+            log.flush()
 
 
 # =============================================================================
@@ -1077,6 +1337,8 @@ def train_model(model_name, data_file, embeddings_file, config, date_filter=None
 def render_exploration_tab():
     st.markdown("### 📊 Exploración de Resultados")
     
+    render_model_comparison()
+    
     # Selector de modelo
     col1, col2 = st.columns([2, 1])
     
@@ -1134,12 +1396,45 @@ def render_exploration_tab():
             
             st.json(metadata['config'])
         
+        # Log de las ejecuciones de entrenamiento guardadas con el modelo
+        training_runs = load_training_log(selected_model['path'])
+        if training_runs:
+            with st.expander("📜 Log de Entrenamiento", expanded=False):
+                col_run, col_level = st.columns([2, 1])
+                with col_run:
+                    run_id = st.selectbox(
+                        "Ejecución",
+                        options=sorted(training_runs, reverse=True),
+                        help="Cada entrenamiento con este nombre añade una ejecución al log"
+                    )
+                with col_level:
+                    min_level = st.selectbox("Nivel mínimo", options=list(NIVELES), index=1)
+                events = [e for e in training_runs[run_id] if NIVELES[e['nivel']] >= NIVELES[min_level]]
+                st.text('\n'.join(format_event(e) for e in events))
+                
+                # Métricas registradas por etapa
+                metrics_rows = [{'etapa': e['etapa'], 'ts': e['ts'], **e['metricas']}
+                                for e in events if e['metricas']]
+                if metrics_rows:
+                    st.dataframe(pd.DataFrame(metrics_rows).astype(str), use_container_width=True, hide_index=True)
+        
+        # Si el mismo archivo ya está cargado (misma huella), no volver a deserializarlo
+        selected_model_path = Path(selected_model['path']) / 'modelo.model'
+        huella_modelo = (file_fingerprint(selected_model_path)['huella']
+                         if selected_model_path.exists() else None)
+        current_data = st.session_state.current_model_data or {}
+        already_loaded = (st.session_state.current_model is not None and huella_modelo is not None and
+                          current_data.get('huella_modelo') == huella_modelo)
+        if already_loaded:
+            st.caption("ℹ️ Este modelo ya está cargado y no cambió en disco")
+        
         # Botón para cargar
-        if st.button("📥 Cargar Modelo", type="primary"):
+        if st.button("📥 Cargar Modelo", type="primary", disabled=already_loaded):
             with st.spinner("Cargando modelo..."):
                 try:
                     model_dir = Path(selected_model['path'])
                     model_path = model_dir / 'modelo.model'
+                    from top2vec import Top2Vec
                     model = Top2Vec.load(str(model_path))
                     
                     # Intentar cargar fechas del modelo guardado primero
@@ -1149,7 +1444,10 @@ def render_exploration_tab():
                     else:
                         # Fallback: cargar del archivo de embeddings original
                         embeddings_file = "data/embeddings_precalculados.npz"
-                        if Path(embeddings_file).exists():
+                        # Solo usar el NPZ si sus filas coinciden con los documentos del modelo
+                        # (se comprueba leyendo la cabecera, sin descomprimir los embeddings)
+                        if (Path(embeddings_file).exists() and
+                            npz_fingerprint(embeddings_file)['num_filas'] == len(model.document_vectors)):
                             data = np.load(embeddings_file, allow_pickle=True)
                             # Intentar cargar pub_dates de diferentes fuentes
                             if 'metadata' in data:
@@ -1167,13 +1465,18 @@ def render_exploration_tab():
                         # Usar doc_top que ya fue calculado por Top2Vec
                         topic_assignments = model.doc_top
                     
+                    # Las búsquedas cacheadas del modelo anterior ya no se usarán
+                    if current_data.get('cache_id'):
+                        QUERY_CACHE.invalidate(current_data['cache_id'])
+                    
                     st.session_state.current_model = model
                     st.session_state.current_model_data = {
                         'name': selected_model['name'],
                         'path': str(model_path),
                         'pub_dates': pub_dates,
                         'metadata': metadata,
-                        'topic_assignments': topic_assignments  # Guardar asignaciones
+                        'topic_assignments': topic_assignments,  # Guardar asignaciones
+                        'huella_modelo': huella_modelo
                     }
                     
                     st.success(f"✅ Modelo '{selected_model['name']}' cargado exitosamente!")
@@ -1191,13 +1494,148 @@ def render_exploration_tab():
         )
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_model_comparison(dir_a, dir_b, huella_a, huella_b):
+    """Comparación de dos modelos, cacheada en memoria por par de huellas"""
+    return compare_models(dir_a, dir_b)
+
+
+def render_model_comparison():
+    """Alineación de tópicos entre dos modelos guardados (tabla + heatmap)"""
+    import plotly.graph_objects as go
+    
+    available_models = list_available_models()
+    if len(available_models) < 2:
+        return
+    
+    with st.expander("🔀 Comparar Modelos", expanded=False):
+        names = [m['name'] for m in available_models]
+        paths = {m['name']: Path(m['path']) for m in available_models}
+        
+        col_a, col_b = st.columns(2)
+        with col_a:
+            name_a = st.selectbox("Modelo A", names, index=0, key="comparar_a")
+        with col_b:
+            name_b = st.selectbox("Modelo B", names, index=1, key="comparar_b")
+        
+        if name_a == name_b:
+            st.info("Selecciona dos modelos distintos")
+            return
+        
+        model_a, model_b = paths[name_a] / 'modelo.model', paths[name_b] / 'modelo.model'
+        if not (model_a.exists() and model_b.exists()):
+            st.warning("⚠️ Alguno de los modelos no tiene archivo modelo.model")
+            return
+        
+        try:
+            with st.spinner("Comparando tópicos..."):
+                result = cached_model_comparison(
+                    str(paths[name_a]), str(paths[name_b]),
+                    file_fingerprint(model_a)['huella'], file_fingerprint(model_b)['huella']
+                )
+        except Exception as e:
+            st.error(f"Error comparando modelos: {e}")
+            return
+        
+        similarity = result['similitud']
+        overlap = result['solapamiento']
+        rows, cols = result['filas'], result['columnas']
+        
+        # Tabla de alineación: pares emparejados, ordenados por similitud
+        alignment_df = pd.DataFrame({
+            f'Tópico {name_a}': rows,
+            f'Palabras {name_a}': [result['palabras_a'][r] for r in rows],
+            f'Tópico {name_b}': cols,
+            f'Palabras {name_b}': [result['palabras_b'][c] for c in cols],
+            'Similitud': similarity[rows, cols].round(3)
+        })
+        if overlap is not None:
+            alignment_df['Solapamiento docs (Jaccard)'] = overlap[rows, cols].round(3)
+        else:
+            st.caption("ℹ️ Sin solapamiento de documentos: no se pudo verificar que ambos modelos "
+                       "usen los mismos datos (huella distinta o ausente)")
+        alignment_df = alignment_df.sort_values('Similitud', ascending=False).reset_index(drop=True)
+        
+        col_m1, col_m2, col_m3 = st.columns(3)
+        with col_m1:
+            st.metric("Pares emparejados", len(rows))
+        with col_m2:
+            st.metric("Similitud media", f"{similarity[rows, cols].mean():.3f}")
+        with col_m3:
+            st.metric("Pares con similitud > 0.8", int((similarity[rows, cols] > 0.8).sum()))
+        
+        st.dataframe(alignment_df, use_container_width=True, hide_index=True)
+        
+        # Heatmap con filas y columnas reordenadas según el emparejamiento
+        unmatched_b = np.setdiff1d(np.arange(similarity.shape[1]), cols)
+        col_order = np.concatenate([cols, unmatched_b])
+        unmatched_a = np.setdiff1d(np.arange(similarity.shape[0]), rows)
+        row_order = np.concatenate([rows, unmatched_a])
+        fig_heatmap = go.Figure(data=go.Heatmap(
+            z=similarity[np.ix_(row_order, col_order)],
+            x=[f"B{c}" for c in col_order],
+            y=[f"A{r}" for r in row_order],
+            colorscale='viridis',
+            colorbar=dict(title="Similitud")
+        ))
+        fig_heatmap.update_layout(
+            title=f"Similitud de tópicos: {name_a} (filas) vs {name_b} (columnas)",
+            height=600,
+            yaxis=dict(autorange='reversed')
+        )
+        st.plotly_chart(fig_heatmap, use_container_width=True)
+
+
 def render_topic_explorer(model, model_data):
     """Renderiza el explorador interactivo de tópicos"""
+    import plotly.express as px
+    import plotly.graph_objects as go
     
     st.markdown("### 🔍 Explorador de Tópicos")
     
-    # Obtener información del modelo
-    topic_sizes, topic_nums = model.get_topic_sizes()
+    # Artefactos precalculados al entrenar (se cargan una vez y quedan en model_data,
+    # es decir en session_state, para no releerlos en cada rerun)
+    model_dir = Path(model_data['path']).parent
+    num_topics_model = len(model.topic_vectors)
+    if 'topic_top_words' not in model_data:
+        model_data['topic_top_words'] = get_topic_top_words(model, model_dir)
+    if 'vocab_map' not in model_data:
+        model_data['vocab_map'] = get_vocab_map(model, model_dir)
+    if 'hierarchy' not in model_data:
+        model_data['hierarchy'] = get_topic_hierarchy(model, model_dir)
+    if 'daily_counts' not in model_data and 'topic_assignments' in model_data:
+        model_data['daily_counts'] = get_daily_topic_counts(
+            model_dir, model_data['pub_dates'], model_data['topic_assignments'],
+            num_topics_model, model_data['hierarchy']
+        )
+    if 'representatives' not in model_data:
+        model_data['representatives'] = get_representative_documents(
+            model, model_dir, model_data['pub_dates'], model_data['hierarchy']
+        )
+    if 'cache_id' not in model_data:
+        # Id de caché de consultas: huella del archivo (cambia si el modelo se re-entrena)
+        model_data['cache_id'] = model_data.get('huella_modelo') or model_cache_id(model_data['path'])
+    hierarchy = model_data['hierarchy']
+    
+    # Nivel de agregación: original o uno de los niveles de macro-tópicos precalculados
+    aggregation_level = num_topics_model
+    if hierarchy:
+        aggregation_level = st.select_slider(
+            "🔀 Nivel de agregación",
+            options=[num_topics_model] + sorted(hierarchy, reverse=True),
+            format_func=lambda n: f"Original ({n} tópicos)" if n == num_topics_model else f"{n} macro-tópicos",
+            help="Agrupa los tópicos en macro-tópicos sin re-entrenar (niveles precalculados al entrenar)"
+        )
+    
+    # Obtener información del modelo en el nivel elegido
+    if aggregation_level == num_topics_model:
+        topic_sizes, topic_nums = model.get_topic_sizes()
+        topic_word_ids, topic_word_scores = model_data['topic_top_words']
+    else:
+        level_data = hierarchy[aggregation_level]
+        topic_sizes = level_data['tamanos']
+        topic_nums = np.arange(len(topic_sizes))
+        topic_word_ids, topic_word_scores = level_data['word_ids'], level_data['scores']
     num_topics = len(topic_nums)
     
     # Header con métricas
@@ -1228,24 +1666,18 @@ def render_topic_explorer(model, model_data):
     
     selected_topic_num = topic_nums[selected_topic_idx]
     
-    # Obtener información del tópico
-    # Cachear palabras de tópicos en session_state para evitar recalcular
-    # Usar el path del modelo como identificador único
-    current_model_id = model_data.get('path', id(model))
-    
-    if ('cached_topic_words' not in st.session_state or 
-        'cached_model_id' not in st.session_state or 
-        st.session_state.cached_model_id != current_model_id):
-        all_topic_words, all_word_scores, _ = model.get_topics()
-        st.session_state.cached_topic_words = all_topic_words
-        st.session_state.cached_word_scores = all_word_scores
-        st.session_state.cached_model_id = current_model_id
-    
-    words = st.session_state.cached_topic_words[selected_topic_num]
-    word_scores = st.session_state.cached_word_scores[selected_topic_num]
-    
-    # Limpiar y deduplicar palabras (eliminar variantes con puntuación)
-    top_words, top_scores = clean_topic_words(words, word_scores, target_count=20)
+    # Insignia de estabilidad (solo para los tópicos originales, no para macro-tópicos)
+    stability = (model_data.get('metadata') or {}).get('estabilidad')
+    if aggregation_level == num_topics_model:
+        badge = stability_badge(stability, selected_topic_num)
+        if badge:
+            st.markdown(f"**Estabilidad:** {badge}")
+    
+    # Palabras limpias y deduplicadas por búsqueda en el vocabulario limpio (sin regex)
+    top_words, top_scores = clean_topic_keywords(
+        topic_word_ids[selected_topic_num], topic_word_scores[selected_topic_num],
+        model_data['vocab_map'], target_count=20
+    )
     
     # Layout en dos columnas (más ancho)
     col_left, col_right = st.columns([1.2, 1.8])
@@ -1300,31 +1732,23 @@ def render_topic_explorer(model, model_data):
         
         # Crear serie temporal
         try:
-            # Usar las asignaciones de tópicos pre-calculadas
-            if 'topic_assignments' not in model_data:
+            # Usar los conteos diarios precalculados (por día y tópico, en cada nivel)
+            if 'daily_counts' not in model_data:
                 st.error("Las asignaciones de tópicos no están disponibles. Por favor, recarga el modelo.")
                 return
             
-            topic_assignments = model_data['topic_assignments']
-            pub_dates_subset = model_data['pub_dates'][:len(topic_assignments)]
-            
-            # Convertir fechas a datetime
-            fechas = pd.to_datetime(pub_dates_subset)
-            
-            df_temporal = pd.DataFrame({
-                'fecha': fechas,
-                'topico': topic_assignments
-            })
-            
-            # Filtrar por tópico seleccionado
-            df_topic = df_temporal[df_temporal['topico'] == selected_topic_num].copy()
+            count_dates, count_tables = model_data['daily_counts']
+            daily_topic = pd.Series(
+                count_tables[aggregation_level][:, selected_topic_num],
+                index=pd.DatetimeIndex(count_dates)
+            )
+            daily_topic = daily_topic[daily_topic > 0]
             
-            if len(df_topic) == 0:
+            if len(daily_topic) == 0:
                 st.warning(f"No hay documentos en el tópico {selected_topic_num}")
             else:
                 # Agrupar por la frecuencia seleccionada
-                df_topic = df_topic.set_index('fecha')
-                conteo = df_topic.resample(freq_map[freq_option]).size().reset_index(name='frecuencia')
+                conteo = daily_topic.resample(freq_map[freq_option]).sum().reset_index()
                 conteo.columns = ['fecha', 'frecuencia']
                 
                 # Filtrar fechas con frecuencia > 0
@@ -1353,14 +1777,14 @@ def render_topic_explorer(model, model_data):
                 
                 st.plotly_chart(fig, use_container_width=True)
                 
-                # Botón para descargar gráfico
-                fig_bytes = fig.to_image(format="png", width=1200, height=600)
-                st.download_button(
+                # Botón para descargar gráfico (la imagen se renderiza solo si se pide)
+                render_on_demand_download(
+                    key="grafico_evolucion",
                     label="💾 Descargar Gráfico (PNG)",
-                    data=fig_bytes,
                     file_name=f"evolucion_temporal_topico_{selected_topic_num}_{freq_option.lower()}.png",
                     mime="image/png",
-                    use_container_width=True
+                    generate=lambda: fig.to_image(format="png", width=1200, height=600),
+                    version=(model_data['cache_id'], aggregation_level, selected_topic_num, freq_option)
                 )
                 
                 # Estadísticas temporales
@@ -1369,14 +1793,14 @@ def render_topic_explorer(model, model_data):
                 col_a, col_b, col_c, col_d = st.columns(4)
                 
                 with col_a:
-                    st.metric("Total Docs", len(df_topic))
+                    st.metric("Total Docs", int(daily_topic.sum()))
                 with col_b:
                     st.metric(f"Promedio {freq_option}", f"{conteo['frecuencia'].mean():.1f}")
                 with col_c:
                     st.metric(f"Máximo {freq_option}", conteo['frecuencia'].max())
                 with col_d:
-                    fecha_min = df_topic.index.min().strftime('%Y-%m-%d')
-                    fecha_max = df_topic.index.max().strftime('%Y-%m-%d')
+                    fecha_min = daily_topic.index.min().strftime('%Y-%m-%d')
+                    fecha_max = daily_topic.index.max().strftime('%Y-%m-%d')
                     st.metric("Rango", f"{fecha_min} a {fecha_max}")
             
         except Exception as e:
@@ -1388,22 +1812,275 @@ def render_topic_explorer(model, model_data):
     
     with st.expander("📄 Ver Documentos Representativos", expanded=False):
         try:
-            documents, document_scores, document_ids = model.search_documents_by_topic(
-                topic_num=selected_topic_num,
-                num_docs=5
+            # Índice precalculado al entrenar: sin búsquedas ni cálculo vectorial
+            representatives = model_data['representatives']
+            if not len(representatives['fragmento_docs']):
+                # Modelos entrenados en modo escalable no guardan los textos
+                st.info("ℹ️ Este modelo no incluye los textos de los documentos (entrenado en modo escalable).")
+            else:
+                view = st.radio("Mostrar", ["Más representativos", "Recientes por mes"], horizontal=True,
+                                key="vista_representativos")
+                if view == "Más representativos":
+                    page_size = 5
+                    level_index = representatives['niveles'][aggregation_level]
+                    available = int(np.diff(level_index['indptr'])[selected_topic_num])
+                    num_pages = max((available + page_size - 1) // page_size, 1)
+                    page = st.number_input(f"Página (de {num_pages})", min_value=1, max_value=num_pages, value=1,
+                                           key=f"pagina_docs_{aggregation_level}_{selected_topic_num}")
+                    start = (page - 1) * page_size
+                    document_ids, document_scores, documents = topic_representatives(
+                        representatives, aggregation_level, selected_topic_num, start, page_size
+                    )
+                    for i, (doc, score, doc_id) in enumerate(zip(documents, document_scores, document_ids), start + 1):
+                        st.markdown(f"**Documento {i}** (ID: {doc_id}, Relevancia: {score:.3f})")
+                        st.text_area(label="", value=doc, height=100, key=f"doc_{i}", label_visibility="collapsed")
+                else:
+                    recent = topic_recent_representatives(representatives, aggregation_level, selected_topic_num)
+                    if not recent:
+                        st.info("ℹ️ No hay fechas disponibles para este tópico.")
+                    for month, document_ids, document_scores, documents in recent or []:
+                        st.markdown(f"##### 📅 {pd.Timestamp(month):%Y-%m}")
+                        for doc, score, doc_id in zip(documents, document_scores, document_ids):
+                            st.markdown(f"**ID: {doc_id}** (Relevancia: {score:.3f})")
+                            st.text_area(label="", value=doc, height=100, key=f"doc_reciente_{doc_id}",
+                                         label_visibility="collapsed")
+        except Exception as e:
+            st.error(f"Error obteniendo documentos: {e}")
+    
+    with st.expander("🧮 Participación Multi-tópico", expanded=False):
+        try:
+            # Recién entrenado, la exportación en segundo plano puede estar escribiendo la similitud
+            export = get_export(Path(model_dir).name)
+            similarity_running = export is not None and export.running('similitud')
+            intensities = model_data.get('intensities')
+            if intensities is None and not similarity_running:
+                intensities = load_daily_topic_intensities(model_dir, hierarchy)
+                # Solo se guarda un resultado real: un None se vuelve a comprobar en el siguiente rerun
+                if intensities is not None:
+                    model_data['intensities'] = intensities
+            
+            if similarity_running:
+                st.info("⏳ Similitud documentos × tópicos en curso (exportación en segundo plano). "
+                        "Vuelve a abrir esta sección cuando termine.")
+            elif intensities is None:
+                st.info("ℹ️ Este modelo no tiene la similitud documentos × tópicos precalculada.")
+                if st.button("🧮 Calcular similitud documentos × tópicos", key="calcular_similitud"):
+                    with st.spinner("Calculando por bloques..."):
+                        compute_doc_topic_similarity(
+                            model_dir, model.document_vectors, model.topic_vectors, model_data['pub_dates']
+                        )
+                    st.rerun()
+            else:
+                # Participación suave (cada documento repartido entre sus tópicos más cercanos)
+                # frente a la asignación dura (un tópico por documento), por periodo
+                fechas_idx = pd.DatetimeIndex(intensities['fechas'])
+                freq = freq_map[freq_option]
+                docs_period = pd.Series(intensities['documentos'], index=fechas_idx).resample(freq).sum()
+                soft = pd.Series(
+                    intensities['participacion'][aggregation_level][:, selected_topic_num], index=fechas_idx
+                ).resample(freq).sum()
+                count_dates, count_tables = model_data['daily_counts']
+                hard = pd.Series(
+                    count_tables[aggregation_level][:, selected_topic_num], index=pd.DatetimeIndex(count_dates)
+                ).resample(freq).sum()
+                
+                valid = docs_period > 0
+                fig_share = go.Figure()
+                fig_share.add_trace(go.Scatter(
+                    x=docs_period.index[valid], y=(soft[valid] / docs_period[valid]) * 100,
+                    mode='lines', name='Participación suave'
+                ))
+                fig_share.add_trace(go.Scatter(
+                    x=docs_period.index[valid], y=(hard.reindex(docs_period.index, fill_value=0)[valid] / docs_period[valid]) * 100,
+                    mode='lines', name='Asignación dura', line=dict(dash='dot')
+                ))
+                fig_share.update_layout(
+                    title=f"Participación {freq_option} del Tópico {selected_topic_num} (% de documentos)",
+                    xaxis_title="Fecha",
+                    yaxis_title="% de documentos",
+                    hovermode='x unified',
+                    height=400
+                )
+                st.plotly_chart(fig_share, use_container_width=True)
+        except Exception as e:
+            st.error(f"Error calculando la participación multi-tópico: {e}")
+    
+    with st.expander("📈 Tendencias Normalizadas y Tópicos Emergentes", expanded=False):
+        try:
+            # Todas las métricas de todos los tópicos a la vez, cacheadas por modelo, nivel y frecuencia
+            count_dates, count_tables = model_data['daily_counts']
+            trends = cached_topic_trends(model_data['cache_id'], aggregation_level, count_dates,
+                                         count_tables[aggregation_level], freq_map[freq_option])
+            periods = trends['periodos'].to_timestamp()
+            
+            fig_trend = go.Figure()
+            fig_trend.add_trace(go.Bar(
+                x=periods, y=trends['participacion'][:, selected_topic_num] * 100,
+                name='Participación', marker_color='#aec7e8'
+            ))
+            fig_trend.add_trace(go.Scatter(
+                x=periods, y=trends['media_movil'][:, selected_topic_num] * 100,
+                mode='lines', name=f"Media móvil ({trends['ventana']} periodos)", line=dict(color='#1f77b4', width=2)
+            ))
+            fig_trend.add_trace(go.Scatter(
+                x=periods, y=trends['zscore'][:, selected_topic_num],
+                mode='lines', name='Z-score', yaxis='y2', line=dict(color='#d62728', dash='dot')
+            ))
+            fig_trend.update_layout(
+                title=f"Participación {freq_option} del Tópico {selected_topic_num} (normalizada por volumen)",
+                xaxis_title="Fecha",
+                yaxis=dict(title="% de documentos del periodo"),
+                yaxis2=dict(title="Z-score", overlaying='y', side='right', showgrid=False),
+                hovermode='x unified',
+                height=400
             )
+            st.plotly_chart(fig_trend, use_container_width=True)
+            
+            st.markdown(f"##### 🚀 Tópicos Emergentes (últimos {PERIODOS_RECIENTES} periodos frente a los "
+                        f"{trends['ventana']} anteriores)")
+            emerging = emerging_topics(trends).head(15)
+            emerging.insert(1, 'palabras_clave', [
+                ', '.join(clean_topic_keywords(topic_word_ids[t], topic_word_scores[t],
+                                               model_data['vocab_map'], target_count=5)[0])
+                for t in emerging['topico']
+            ])
+            st.dataframe(pd.DataFrame({
+                'Tópico': emerging['topico'],
+                'Palabras clave': emerging['palabras_clave'],
+                '% reciente': (emerging['participacion_reciente'] * 100).round(3),
+                '% base': (emerging['participacion_base'] * 100).round(3),
+                'Crecimiento (%)': (emerging['crecimiento'] * 100).round(1),
+                'Puntuación': emerging['puntuacion'].round(2)
+            }), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"Error calculando las tendencias: {e}")
+    
+    with st.expander("🎲 Estabilidad de Tópicos", expanded=False):
+        try:
+            if stability:
+                col_s1, col_s2, col_s3 = st.columns(3)
+                with col_s1:
+                    st.metric("ARI medio", f"{stability['ari_medio']:.3f}")
+                with col_s2:
+                    st.metric("Ejecuciones", stability['num_ejecuciones'])
+                with col_s3:
+                    stable_share = np.mean(np.array(stability['fraccion_reaparece']) >= 0.8)
+                    st.metric("Tópicos estables", f"{stable_share:.0%}")
+                
+                st.dataframe(pd.DataFrame({
+                    'Tópico': np.arange(len(stability['similitud_media'])),
+                    'Similitud media': stability['similitud_media'],
+                    'Reaparece (% ejecuciones)': np.array(stability['fraccion_reaparece']) * 100
+                }), use_container_width=True, hide_index=True)
+            else:
+                st.info("ℹ️ Este modelo aún no tiene evaluación de estabilidad.")
+            
+            config = (model_data.get('metadata') or {}).get('config')
+            if config:
+                num_runs = st.number_input("Ejecuciones (semillas)", min_value=2, max_value=20,
+                                           value=NUM_EJECUCIONES, step=1, key="estabilidad_ejecuciones")
+                if st.button("🎲 Evaluar estabilidad", key="evaluar_estabilidad"):
+                    with st.spinner(f"Re-entrenando UMAP + HDBSCAN en {num_runs} submuestras..."):
+                        stability = evaluate_topic_stability(
+                            model.document_vectors, model.topic_vectors, model.doc_top, config, num_runs=num_runs
+                        )
+                    save_stability(model_dir, stability)
+                    model_data['metadata']['estabilidad'] = stability
+                    st.rerun()
+        except Exception as e:
+            st.error(f"Error evaluando la estabilidad: {e}")
+    
+    with st.expander("🧬 Evolución Dinámica (Ventanas de Tiempo)", expanded=False):
+        try:
+            if 'dynamic' not in model_data:
+                model_data['dynamic'] = load_dynamic_topics(model_dir)
+            dynamic = model_data['dynamic']
             
-            for i, (doc, score, doc_id) in enumerate(zip(documents, document_scores, document_ids), 1):
-                st.markdown(f"**Documento {i}** (ID: {doc_id}, Relevancia: {score:.3f})")
-                st.text_area(
-                    label="",
-                    value=doc[:500] + "..." if len(doc) > 500 else doc,
-                    height=100,
-                    key=f"doc_{i}",
-                    label_visibility="collapsed"
-                )
+            if dynamic is not None:
+                st.caption(f"Modo {dynamic['modo']} · {len(dynamic['etiquetas'])} ventanas · "
+                           f"{len(dynamic['vectores'])} tópicos · enlaces con similitud ≥ {dynamic['umbral']:.2f}")
+                
+                # Diagrama de flujo: los tópicos más grandes de cada ventana y sus enlaces
+                max_topics = st.slider("Tópicos por ventana", min_value=5, max_value=50, value=15,
+                                       key="dinamico_topicos")
+                offsets = dynamic['offsets']
+                shown = np.zeros(offsets[-1], dtype=bool)
+                node_y = np.zeros(offsets[-1])
+                for w in range(len(offsets) - 1):
+                    window_sizes = dynamic['tamanos'][offsets[w]:offsets[w + 1]]
+                    largest = offsets[w] + np.argsort(-window_sizes)[:max_topics]
+                    shown[largest] = True
+                    node_y[largest] = (np.arange(len(largest)) + 0.5) / max(len(largest), 1)
+                window_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+                keywords = dynamic.get('palabras_clave')
+                labels = [f"{dynamic['etiquetas'][w]} · T{t - offsets[w]}" +
+                          (f": {keywords[t]}" if keywords is not None else "")
+                          for t, w in enumerate(window_of)]
+                
+                sources = offsets[dynamic['enlace_ventana']] + dynamic['enlace_origen']
+                targets = offsets[dynamic['enlace_ventana'] + 1] + dynamic['enlace_destino']
+                visible = shown[sources] & shown[targets]
+                nodes = np.flatnonzero(shown)
+                node_index = np.full(offsets[-1], -1)
+                node_index[nodes] = np.arange(len(nodes))
+                
+                fig_flow = go.Figure(go.Sankey(
+                    arrangement='snap',
+                    node=dict(label=[labels[n] for n in nodes], pad=8, thickness=12,
+                              x=(window_of[nodes] + 0.5) / (len(offsets) - 1), y=node_y[nodes]),
+                    link=dict(
+                        source=node_index[sources[visible]], target=node_index[targets[visible]],
+                        # Ancho: documentos del tópico destino, repartidos entre los tópicos que llegan a él
+                        value=dynamic['tamanos'][targets[visible]] / np.maximum(
+                            np.bincount(targets[visible], minlength=offsets[-1])[targets[visible]], 1),
+                        customdata=dynamic['enlace_similitud'][visible],
+                        hovertemplate='Similitud: %{customdata:.2f}<extra></extra>'
+                    )
+                ))
+                fig_flow.update_layout(title="Evolución de tópicos entre ventanas", height=600)
+                st.plotly_chart(fig_flow, use_container_width=True)
+                
+                # Nacimientos, fusiones, divisiones y muertes por transición
+                events = window_events(dynamic)
+                if len(events):
+                    fig_events = go.Figure()
+                    for column, color in (('nacimientos', '#2ca02c'), ('fusiones', '#1f77b4'),
+                                          ('divisiones', '#ff7f0e'), ('muertes', '#d62728')):
+                        fig_events.add_trace(go.Bar(x=events['ventana'], y=events[column],
+                                                    name=column.capitalize(), marker_color=color))
+                    fig_events.update_layout(barmode='group', title="Eventos por transición entre ventanas",
+                                             xaxis_title="Ventana", yaxis_title="Tópicos", height=350)
+                    st.plotly_chart(fig_events, use_container_width=True)
+                
+                st.markdown("##### 🔗 Cadenas de Evolución")
+                st.dataframe(chain_table(dynamic), use_container_width=True, hide_index=True)
+            else:
+                st.info("ℹ️ Este modelo aún no tiene tópicos dinámicos.")
+            
+            config = (model_data.get('metadata') or {}).get('config')
+            if config:
+                col_d1, col_d2, col_d3 = st.columns(3)
+                with col_d1:
+                    window_mode = st.selectbox("Ventanas", ["anual", "movil"], key="dinamico_modo",
+                                               format_func=lambda m: "Anuales" if m == 'anual' else "Móviles")
+                with col_d2:
+                    window_months = st.number_input("Meses por ventana (móviles)", min_value=3, max_value=120,
+                                                    value=MESES_VENTANA, key="dinamico_meses")
+                with col_d3:
+                    window_step = st.number_input("Paso en meses (móviles)", min_value=1, max_value=120,
+                                                  value=PASO_VENTANA, key="dinamico_paso")
+                if st.button("🧬 Entrenar tópicos dinámicos", key="entrenar_dinamico"):
+                    with st.spinner("Entrenando un modelo por ventana en procesos paralelos..."):
+                        dynamic = train_dynamic_topics(
+                            model.document_vectors, model_data['pub_dates'], config, mode=window_mode,
+                            months=int(window_months), step=int(window_step),
+                            word_vectors=model.word_vectors, vocab_map=model_data['vocab_map']
+                        )
+                    save_dynamic_topics(model_dir, dynamic)
+                    model_data['dynamic'] = dynamic
+                    st.rerun()
         except Exception as e:
-            st.error(f"Error obteniendo documentos: {e}")
+            st.error(f"Error con los tópicos dinámicos: {e}")
     
     with st.expander("📊 Distribución de Documentos", expanded=False):
         try:
@@ -1440,8 +2117,11 @@ def render_topic_explorer(model, model_data):
         model_dir = Path(model_data['path']).parent
         results_path = model_dir / 'resultados_completos.xlsx'
     
-    # Verificar si existe el archivo
-    if results_path.exists():
+    # Exportación en segundo plano en curso: progreso en vez de la descarga
+    export = render_export_status(model_data['name'])
+    if export is not None and not export.done():
+        st.caption("La descarga aparecerá aquí cuando el Excel esté listo.")
+    elif results_path.exists():
         st.info(f"""
         📁 **Archivo de resultados completos generado automáticamente:**
         
@@ -1453,16 +2133,14 @@ def render_topic_explorer(model, model_data):
         - **Evolucion_Temporal**: Evolución mensual de los top 20 tópicos
         """)
         
-        # Botón para descargar el archivo de resultados
-        with open(results_path, 'rb') as f:
-            st.download_button(
-                label="📥 Descargar Resultados Completos (Excel)",
-                data=f.read(),
-                file_name=f"resultados_{model_data['name']}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True,
-                type="primary"
-            )
+        # Botón para descargar el archivo de resultados (se lee solo si se pide)
+        render_on_demand_download(
+            key=f"resultados_{model_data['name']}",
+            label="📥 Descargar Resultados Completos (Excel)",
+            file_name=f"resultados_{model_data['name']}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            path=results_path
+        )
     else:
         st.info(f"""
         📁 **El archivo con los datos completos está en la ruta:**
@@ -2389,6 +3067,8 @@ def render_quick_start_help():
 
 def render_data_info_help():
     """Información sobre los datos y configuración"""
+    import psutil
+    
     st.markdown("### 📊 Datos y Configuración del Sistema")
     
     # Verificar archivos de datos
@@ -2398,6 +3078,15 @@ def render_data_info_help():
     noticias_file = data_dir / "noticias.csv"
     embeddings_file = data_dir / "embeddings_precalculados.npz"
     
+    # Manifiesto del dataset (cacheado por huella en los archivos .huella.json):
+    # no se lee el CSV completo ni se descomprimen los embeddings
+    try:
+        manifest = dataset_manifest(noticias_file, embeddings_file)
+        manifest_error = None
+    except Exception as e:
+        manifest = {'noticias': None, 'embeddings': None}
+        manifest_error = e
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -2405,20 +3094,17 @@ def render_data_info_help():
             file_size = noticias_file.stat().st_size / (1024**2)  # MB
             st.success(f"✅ **noticias.csv** encontrado ({file_size:.0f} MB)")
             
-            # Leer información del dataset
-            try:
-                df_sample = pd.read_csv(noticias_file, nrows=1000)
-                df_info = pd.read_csv(noticias_file, usecols=['date'])
-                
+            info = manifest['noticias']
+            if info is not None:
                 st.info(f"""
                 **Información del Dataset:**
-                - 📄 Documentos: ~{len(df_info):,}
-                - 📅 Fecha inicial: {df_info['date'].min()}
-                - 📅 Fecha final: {df_info['date'].max()}
-                - 📋 Columnas: {', '.join(df_sample.columns[:5].tolist())}...
+                - 📄 Documentos: {info['num_filas']:,}
+                - 📅 Fecha inicial: {info['fecha_min'] or 'N/A'}
+                - 📅 Fecha final: {info['fecha_max'] or 'N/A'}
+                - 📋 Columnas: {', '.join(info['columnas'][:5])}{'...' if len(info['columnas']) > 5 else ''}
                 """)
-            except Exception as e:
-                st.warning(f"No se pudo leer información detallada: {e}")
+            else:
+                st.warning(f"No se pudo leer información detallada: {manifest_error}")
         else:
             st.error("❌ **noticias.csv** NO encontrado")
             st.markdown("""
@@ -2433,16 +3119,17 @@ def render_data_info_help():
             file_size = embeddings_file.stat().st_size / (1024**2)  # MB
             st.success(f"✅ **embeddings_precalculados.npz** encontrado ({file_size:.0f} MB)")
             
-            try:
-                embeddings_data = np.load(embeddings_file)
+            info = manifest['embeddings']
+            if info is not None:
                 st.info(f"""
                 **Información de Embeddings:**
-                - 🧠 Vectores: {embeddings_data['embeddings'].shape[0]:,}
-                - 📏 Dimensiones: {embeddings_data['embeddings'].shape[1]}
-                - 💾 Tamaño en memoria: ~{embeddings_data['embeddings'].nbytes / (1024**2):.0f} MB
+                - 🧠 Vectores: {info['shape'][0]:,}
+                - 📏 Dimensiones: {info['shape'][1]}
+                - 🔢 Tipo: {info['dtype']}
+                - 💾 Tamaño en memoria: ~{info['bytes'] / (1024**2):.0f} MB
                 """)
-            except Exception as e:
-                st.warning(f"No se pudo leer información detallada: {e}")
+            else:
+                st.warning(f"No se pudo leer información detallada: {manifest_error}")
         else:
             st.error("❌ **embeddings_precalculados.npz** NO encontrado")
             st.markdown("""
@@ -2820,7 +3507,8 @@ def render_faq_help():
         - ⚠️ **HDBSCAN**: Mayormente sí
         
         **Para mayor reproducibilidad:**
-        1. Usa `random_state` fijo en configuración
+        1. Entrena en modo UMAP "Reproducible" (semilla fija; en `configuracion.py`: `MODO_UMAP = "reproducible"`).
+           El modo "Rápido" usa todos los núcleos pero no fija la semilla
         2. Guarda el modelo entrenado
         3. Documenta la versión de paquetes usados
         
@@ -0,0 +1,882 @@
+"""
+ARTEFACTOS PRECALCULADOS DEL MODELO
+===================================
+
+Estructuras compactas que se calculan una vez al terminar el entrenamiento y
+se guardan en la carpeta del modelo (junto a `modelo.model` y
+`pub_dates.npy`), para que las exportaciones y el explorador las lean
+directamente en lugar de recalcularlas tópico por tópico.
+
+- `palabras_topicos.npz`: top-k palabras de cada tópico (ids y scores)
+- `vocabulario_limpio.npz`: forma limpia de cada palabra del vocabulario,
+  clave de deduplicación y marca de descarte
+- `jerarquia_topicos.npz`: reducciones jerárquicas de tópicos a varios niveles
+  (mapeo tópico original → macro-tópico, vectores, tamaños y palabras)
+- `conteos_diarios.npz`: documentos por día y tópico para cada nivel
+- `topicos.npz`: vectores de tópicos y asignación de cada documento, para
+  comparar modelos sin deserializar `modelo.model`
+- `documentos_representativos.npz`: en cada nivel, los documentos más
+  representativos de cada tópico y los mejores de cada mes reciente, con
+  fragmentos de texto (UTF-8 concatenado + offsets) para mostrarlos sin
+  cargar los textos ni calcular similitudes
+
+Etapa opcional (ver compute_doc_topic_similarity):
+
+- `similitud_documentos_topicos.npy`: matriz completa documentos × tópicos de
+  similitud coseno en float16, para leer con memory-mapping
+- `similitud_top_k.npz`: variante dispersa (CSR) con los k tópicos más
+  similares de cada documento
+- `intensidades_diarias.npz`: por día y tópico, suma de similitudes y de
+  participaciones (reparto suave de cada documento entre sus k tópicos)
+
+Los niveles de la jerarquía se identifican por su número de tópicos; el
+nivel original es el número de tópicos del modelo.
+
+Los artefactos que dependen de los tópicos guardan la huella del modelo que
+los generó (ver model_fingerprint): al leerlos se descartan si no coincide,
+aunque la forma sea la esperada.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Número de palabras guardadas por tópico (igual que Top2Vec.get_topics)
+TOP_K_PALABRAS = 50
+
+ARCHIVO_PALABRAS_TOPICOS = 'palabras_topicos.npz'
+ARCHIVO_VOCABULARIO_LIMPIO = 'vocabulario_limpio.npz'
+ARCHIVO_JERARQUIA = 'jerarquia_topicos.npz'
+ARCHIVO_CONTEOS_DIARIOS = 'conteos_diarios.npz'
+ARCHIVO_TOPICOS = 'topicos.npz'
+ARCHIVO_SIMILITUD_DOCUMENTOS = 'similitud_documentos_topicos.npy'
+ARCHIVO_SIMILITUD_TOP_K = 'similitud_top_k.npz'
+ARCHIVO_INTENSIDADES_DIARIAS = 'intensidades_diarias.npz'
+ARCHIVO_DOCUMENTOS_REPRESENTATIVOS = 'documentos_representativos.npz'
+
+# Tópicos por documento en la variante dispersa y documentos por bloque
+TOP_K_SIMILITUD = 5
+TAMANO_BLOQUE_SIMILITUD = 50_000
+
+# Documentos representativos por tópico, meses recientes por tópico,
+# documentos por mes y caracteres por fragmento de texto
+DOCS_REPRESENTATIVOS = 50
+MESES_RECIENTES = 12
+DOCS_POR_MES = 3
+LONGITUD_FRAGMENTO = 500
+
+# Niveles de agregación precalculados (número de macro-tópicos)
+NIVELES_JERARQUIA = (5, 10, 20, 50)
+
+# Limpieza de palabras (compiladas una sola vez)
+_RE_PUNTUACION_BORDES = re.compile(r'^[^\w]+|[^\w]+$', re.UNICODE)
+_RE_SUFIJO_CON_PUNTO = re.compile(r'\.[a-záéíóúñ]+$', re.IGNORECASE)
+_RE_PUNTUACION_INTERNA = re.compile(r'[\?\!\-\(\)\[\]"\'\;\:\,]')
+_RE_DIGITO = re.compile(r'\d')
+_SUFIJOS_STOP = ('.el', '.la', '.de', '.y', '.en', '.los', '.las', '.un', '.una', '.al', '.del',
+                 '.por', '.con', '.sin', '.para', '.sobre', '.entre', '.o', '.u')
+
+
+def compute_topic_top_words(topic_vectors, word_vectors, k=TOP_K_PALABRAS, batch_size=256):
+    """
+    Calcula las k palabras más cercanas a cada tópico en un solo paso vectorizado.
+
+    Un producto matricial tópicos × vocabulario por lote de tópicos y un
+    argpartition para quedarse con el top-k (solo se ordenan k columnas).
+
+    Args:
+        topic_vectors: Matriz (T × d) de vectores de tópicos
+        word_vectors: Matriz (V × d) de vectores de palabras
+        k: Palabras por tópico
+        batch_size: Tópicos por lote (acota la memoria a batch_size × V)
+
+    Returns:
+        Tupla (word_ids, scores), ambas de forma (T × k), ordenadas por score
+        descendente. word_ids es int32 y scores float32.
+    """
+    word_vectors = np.asarray(word_vectors)
+    topic_vectors = np.asarray(topic_vectors, dtype=word_vectors.dtype)
+    num_topics = topic_vectors.shape[0]
+    k = min(k, word_vectors.shape[0])
+
+    word_ids = np.empty((num_topics, k), dtype=np.int32)
+    scores = np.empty((num_topics, k), dtype=np.float32)
+
+    for start in range(0, num_topics, batch_size):
+        end = min(start + batch_size, num_topics)
+        res = topic_vectors[start:end] @ word_vectors.T
+        top = np.argpartition(-res, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(res, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        word_ids[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+
+    return word_ids, scores
+
+
+def model_fingerprint(topic_vectors, doc_top):
+    """Huella de un modelo entrenado: sus vectores de tópicos y la asignación de cada documento"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(topic_vectors, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(doc_top, dtype=np.int32).tobytes())
+    return digest.hexdigest()
+
+
+def _fingerprint_matches(data, huella):
+    """True si el archivo no guarda huella (artefactos antiguos) o si coincide con la pedida"""
+    return huella is None or 'huella_modelo' not in data.files or str(data['huella_modelo']) == huella
+
+
+def save_topic_top_words(model_dir, word_ids, scores, huella=None):
+    """Guarda el top-k de palabras por tópico en la carpeta del modelo (con la huella del modelo)"""
+    path = Path(model_dir) / ARCHIVO_PALABRAS_TOPICOS
+    extra = {'huella_modelo': np.array(huella)} if huella else {}
+    np.savez(path, word_ids=word_ids, scores=scores, **extra)
+    return path
+
+
+def load_topic_top_words(model_dir, huella=None):
+    """Carga (word_ids, scores) guardados, o None si no existen o son de otro modelo (huella distinta)"""
+    path = Path(model_dir) / ARCHIVO_PALABRAS_TOPICOS
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        if not _fingerprint_matches(data, huella):
+            return None
+        return data['word_ids'], data['scores']
+
+
+def get_topic_top_words(model, model_dir=None, k=TOP_K_PALABRAS):
+    """
+    Devuelve el top-k de palabras por tópico, leyéndolo de disco si existe.
+
+    Para modelos antiguos (sin el archivo) o si el archivo es de otro modelo
+    (huella distinta), lo calcula una vez y lo guarda.
+
+    Args:
+        model: Modelo Top2Vec
+        model_dir: Carpeta donde se guardan los artefactos del modelo (opcional)
+        k: Palabras por tópico
+
+    Returns:
+        Tupla (word_ids, scores) de forma (num_topicos × k)
+    """
+    huella = model_fingerprint(model.topic_vectors, model.doc_top) if model_dir else None
+    stored = load_topic_top_words(model_dir, huella) if model_dir else None
+
+    if stored is not None:
+        word_ids, scores = stored
+        if word_ids.shape[0] == len(model.topic_vectors) and word_ids.shape[1] >= min(k, len(model.vocab)):
+            return word_ids, scores
+
+    word_ids, scores = compute_topic_top_words(model.topic_vectors, model.word_vectors, k=k)
+    if model_dir:
+        try:
+            save_topic_top_words(model_dir, word_ids, scores, huella)
+        except OSError:
+            pass
+    return word_ids, scores
+
+
+def clean_word(word):
+    """
+    Limpia una palabra del vocabulario eliminando variantes con puntuación.
+
+    Returns:
+        La forma limpia, o '' si la palabra debe descartarse (vacía o con números)
+    """
+    # Quitar puntuación periférica
+    cleaned = _RE_PUNTUACION_BORDES.sub('', word)
+    # Quitar palabras con punto seguido de letras (ej: ".el", ".de") o signos
+    if _RE_SUFIJO_CON_PUNTO.search(cleaned) or cleaned.lower().endswith(_SUFIJOS_STOP):
+        cleaned = cleaned.split('.')[0]
+    # Quitar signos de puntuación internos o finales
+    cleaned = _RE_PUNTUACION_INTERNA.sub('', cleaned)
+    # Filtrar palabras que contienen números
+    if _RE_DIGITO.search(cleaned):
+        return ''
+    return cleaned
+
+
+def clean_topic_words(words, scores, target_count=20):
+    """
+    Limpia y deduplicar palabras de tópicos eliminando variantes con puntuación.
+    
+    Versión por llamada (limpia cada palabra con regex). Para tópicos de un
+    modelo entrenado es preferible clean_topic_keywords con el vocabulario
+    limpio precalculado.
+    
+    Args:
+        words: Lista de palabras del tópico
+        scores: Lista de scores correspondientes
+        target_count: Número de palabras únicas a retornar
+    
+    Returns:
+        Tupla (palabras_limpias, scores_limpios)
+    """
+    seen_clean = {}
+    for word, score in zip(words, scores):
+        cleaned = clean_word(word)
+        # Si la versión limpia está vacía (o tenía números), skip
+        if not cleaned:
+            continue
+        if cleaned.lower() not in seen_clean or score > seen_clean[cleaned.lower()][1]:
+            seen_clean[cleaned.lower()] = (cleaned, score)
+        if len(seen_clean) >= target_count:
+            break
+    items = sorted(seen_clean.values(), key=lambda x: x[1], reverse=True)
+    clean_words = [item[0] for item in items]
+    clean_scores = [item[1] for item in items]
+    return clean_words, clean_scores
+
+
+def build_vocab_map(vocab):
+    """
+    Limpia todo el vocabulario una sola vez.
+
+    Returns:
+        dict con arrays indexados por id de palabra:
+        - 'clean': forma limpia de la palabra
+        - 'dedup_key': entero compartido por las palabras con la misma forma
+          limpia (sin distinguir mayúsculas)
+        - 'drop': True si la palabra se descarta
+    """
+    clean = np.array([clean_word(str(word)) for word in vocab], dtype=str)
+    drop = clean == ''
+    _, dedup_key = np.unique(np.char.lower(clean), return_inverse=True)
+    return {
+        'clean': clean,
+        'dedup_key': dedup_key.astype(np.int32),
+        'drop': drop
+    }
+
+
+def save_vocab_map(model_dir, vocab_map):
+    """Guarda el vocabulario limpio en la carpeta del modelo"""
+    path = Path(model_dir) / ARCHIVO_VOCABULARIO_LIMPIO
+    np.savez(path, **vocab_map)
+    return path
+
+
+def load_vocab_map(model_dir):
+    """Carga el vocabulario limpio guardado, o None si el modelo no lo tiene"""
+    path = Path(model_dir) / ARCHIVO_VOCABULARIO_LIMPIO
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in ('clean', 'dedup_key', 'drop')}
+
+
+def get_vocab_map(model, model_dir=None):
+    """
+    Devuelve el vocabulario limpio, leyéndolo de disco si existe.
+
+    Para modelos antiguos (sin el archivo) lo construye una vez y lo guarda.
+    """
+    vocab_map = load_vocab_map(model_dir) if model_dir else None
+    if vocab_map is not None and len(vocab_map['clean']) == len(model.vocab):
+        return vocab_map
+
+    vocab_map = build_vocab_map(model.vocab)
+    if model_dir:
+        try:
+            save_vocab_map(model_dir, vocab_map)
+        except OSError:
+            pass
+    return vocab_map
+
+
+def clean_topic_keywords(word_ids, scores, vocab_map, target_count=20):
+    """
+    Palabras limpias y deduplicadas de un tópico usando solo búsquedas en arrays.
+
+    Equivale a clean_topic_words sobre las mismas palabras (ordenadas por
+    score descendente), sin ejecutar ninguna regex.
+
+    Args:
+        word_ids: Ids de palabras del tópico, ordenados por score descendente
+        scores: Scores correspondientes
+        vocab_map: Resultado de build_vocab_map / get_vocab_map
+        target_count: Número de palabras únicas a retornar
+
+    Returns:
+        Tupla (palabras_limpias, scores_limpios)
+    """
+    word_ids = np.asarray(word_ids)
+    scores = np.asarray(scores)
+
+    keep = ~vocab_map['drop'][word_ids]
+    word_ids = word_ids[keep]
+    scores = scores[keep]
+
+    # Primera aparición de cada clave = la de mayor score (entrada ordenada)
+    _, first = np.unique(vocab_map['dedup_key'][word_ids], return_index=True)
+    first = np.sort(first)[:target_count]
+
+    return vocab_map['clean'][word_ids[first]].tolist(), scores[first].tolist()
+
+
+def topic_keywords_table(word_ids, scores, vocab_map, target_count=10):
+    """
+    Palabras clave limpias de todos los tópicos.
+
+    Returns:
+        Lista con una tupla (palabras_limpias, scores_limpios) por tópico
+    """
+    return [clean_topic_keywords(ids, sc, vocab_map, target_count) for ids, sc in zip(word_ids, scores)]
+
+
+def compute_topic_hierarchy(topic_vectors, topic_sizes, word_vectors=None, levels=NIVELES_JERARQUIA):
+    """
+    Reduce los tópicos jerárquicamente y guarda una "foto" en cada nivel.
+
+    Igual que Top2Vec.hierarchical_topic_reduction, fusiona iterativamente el
+    tópico más pequeño con el más similar (vector combinado = media ponderada
+    por tamaño), pero trabajando solo con vectores y tamaños de tópicos: no
+    recorre los documentos, así que tarda milisegundos.
+
+    Args:
+        topic_vectors: Matriz (T × d) de vectores de tópicos
+        topic_sizes: Documentos por tópico (T,)
+        word_vectors: Si se pasa, calcula también el top-k de palabras por nivel
+        levels: Números de macro-tópicos a precalcular (se ignoran los >= T)
+
+    Returns:
+        dict {nivel: {'mapa', 'vectores', 'tamanos'[, 'word_ids', 'scores']}}.
+        'mapa' asigna a cada tópico original su macro-tópico; los macro-tópicos
+        se numeran por tamaño descendente (0 = el más grande).
+    """
+    topic_vectors = np.asarray(topic_vectors, dtype=np.float64)
+    num_topics = len(topic_vectors)
+    targets = sorted({int(level) for level in levels if 1 <= level < num_topics}, reverse=True)
+
+    vectors = topic_vectors.copy()
+    sizes = np.asarray(topic_sizes, dtype=np.float64).copy()
+    active = np.ones(num_topics, dtype=bool)
+    labels = np.arange(num_topics)  # tópico original -> fila del grupo que lo contiene
+    num_active = num_topics
+
+    hierarchy = {}
+    for target in targets:
+        while num_active > target:
+            rows = np.flatnonzero(active)
+            smallest = rows[np.argmin(sizes[rows])]
+            sims = vectors[rows] @ vectors[smallest]
+            sims[rows == smallest] = -np.inf
+            most_sim = rows[np.argmax(sims)]
+
+            # Vector combinado ponderado por tamaño (mínimo 1 para tópicos vacíos)
+            w_small, w_sim = max(sizes[smallest], 1), max(sizes[most_sim], 1)
+            combined = (vectors[smallest] * w_small + vectors[most_sim] * w_sim) / (w_small + w_sim)
+            vectors[most_sim] = combined / np.linalg.norm(combined)
+            sizes[most_sim] += sizes[smallest]
+            active[smallest] = False
+            labels[labels == smallest] = most_sim
+            num_active -= 1
+
+        rows = np.flatnonzero(active)
+        order = rows[np.argsort(-sizes[rows], kind='stable')]
+        new_ids = np.empty(num_topics, dtype=np.int32)
+        new_ids[order] = np.arange(len(order), dtype=np.int32)
+
+        level = {
+            'mapa': new_ids[labels],
+            'vectores': vectors[order].astype(np.float32),
+            'tamanos': sizes[order].astype(np.int64)
+        }
+        if word_vectors is not None:
+            level['word_ids'], level['scores'] = compute_topic_top_words(level['vectores'], word_vectors)
+        hierarchy[target] = level
+
+    return hierarchy
+
+
+def save_topic_hierarchy(model_dir, hierarchy):
+    """Guarda todos los niveles de la jerarquía en un solo .npz"""
+    arrays = {'niveles': np.array(sorted(hierarchy), dtype=np.int32)}
+    for level, data in hierarchy.items():
+        for field, values in data.items():
+            arrays[f'{field}_{level}'] = values
+    path = Path(model_dir) / ARCHIVO_JERARQUIA
+    np.savez(path, **arrays)
+    return path
+
+
+def load_topic_hierarchy(model_dir):
+    """Carga la jerarquía guardada ({} si el modelo no la tiene)"""
+    path = Path(model_dir) / ARCHIVO_JERARQUIA
+    if not path.exists():
+        return {}
+    hierarchy = {}
+    with np.load(path) as data:
+        for level in data['niveles'].tolist():
+            suffix = f'_{level}'
+            hierarchy[level] = {key[:-len(suffix)]: data[key] for key in data.files if key.endswith(suffix)}
+    return hierarchy
+
+
+def get_topic_hierarchy(model, model_dir=None, levels=NIVELES_JERARQUIA):
+    """
+    Devuelve la jerarquía de tópicos, leyéndola de disco si existe.
+
+    Para modelos antiguos (sin el archivo) la calcula una vez y la guarda.
+    """
+    hierarchy = load_topic_hierarchy(model_dir) if model_dir else {}
+    num_topics = len(model.topic_vectors)
+    if hierarchy and all(len(level['mapa']) == num_topics for level in hierarchy.values()):
+        return hierarchy
+
+    topic_sizes = np.bincount(np.asarray(model.doc_top), minlength=num_topics)
+    hierarchy = compute_topic_hierarchy(model.topic_vectors, topic_sizes, model.word_vectors, levels)
+    if model_dir and hierarchy:
+        try:
+            save_topic_hierarchy(model_dir, hierarchy)
+        except OSError:
+            pass
+    return hierarchy
+
+
+def compute_daily_topic_counts(pub_dates, doc_top, num_topics, hierarchy=None):
+    """
+    Tabla de documentos por día y tópico, para el nivel original y cada nivel reducido.
+
+    Args:
+        pub_dates: Fecha de cada documento
+        doc_top: Tópico asignado a cada documento
+        num_topics: Número de tópicos del modelo
+        hierarchy: Jerarquía de compute_topic_hierarchy (opcional)
+
+    Returns:
+        Tupla (fechas, tablas): fechas es un array datetime64[D] con los días
+        que tienen documentos y tablas un dict {nivel: matriz (días × nivel)}
+    """
+    days = pd.to_datetime(np.asarray(pub_dates)).values.astype('datetime64[D]')
+    doc_top = np.asarray(doc_top)[:len(days)]
+    valid = ~np.isnat(days)
+    fechas, day_index = np.unique(days[valid], return_inverse=True)
+
+    flat = day_index * num_topics + doc_top[valid]
+    counts = np.bincount(flat, minlength=len(fechas) * num_topics)
+    counts = counts.reshape(len(fechas), num_topics).astype(np.int32)
+
+    tables = {num_topics: counts}
+    for level, data in (hierarchy or {}).items():
+        # Sumar columnas de los tópicos originales que forman cada macro-tópico
+        reduced = np.zeros((len(fechas), level), dtype=np.int32)
+        np.add.at(reduced.T, data['mapa'], counts.T)
+        tables[level] = reduced
+
+    return fechas, tables
+
+
+def save_daily_topic_counts(model_dir, fechas, tables):
+    """Guarda las tablas de conteos diarios de todos los niveles"""
+    path = Path(model_dir) / ARCHIVO_CONTEOS_DIARIOS
+    np.savez(path, fechas=fechas, **{f'conteos_{level}': table for level, table in tables.items()})
+    return path
+
+
+def get_daily_topic_counts(model_dir, pub_dates, doc_top, num_topics, hierarchy=None):
+    """
+    Devuelve (fechas, tablas) de conteos diarios, leyéndolas de disco si existen.
+
+    Para modelos antiguos (sin el archivo) las calcula una vez y las guarda.
+    """
+    path = Path(model_dir) / ARCHIVO_CONTEOS_DIARIOS if model_dir else None
+    expected = {num_topics, *(hierarchy or {})}
+
+    if path is not None and path.exists():
+        with np.load(path) as data:
+            fechas = data['fechas']
+            tables = {int(key.split('_')[1]): data[key] for key in data.files if key.startswith('conteos_')}
+        if expected <= set(tables):
+            return fechas, tables
+
+    fechas, tables = compute_daily_topic_counts(pub_dates, doc_top, num_topics, hierarchy)
+    if path is not None:
+        try:
+            save_daily_topic_counts(model_dir, fechas, tables)
+        except OSError:
+            pass
+    return fechas, tables
+
+
+def save_topic_assignments(model_dir, topic_vectors, doc_top):
+    """Guarda los vectores de tópicos y el tópico asignado a cada documento"""
+    path = Path(model_dir) / ARCHIVO_TOPICOS
+    np.savez(path, topic_vectors=np.asarray(topic_vectors, dtype=np.float32),
+             doc_top=np.asarray(doc_top, dtype=np.int32))
+    return path
+
+
+def load_topic_assignments(model_dir):
+    """Carga (topic_vectors, doc_top) guardados, o None si el modelo no los tiene"""
+    path = Path(model_dir) / ARCHIVO_TOPICOS
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        return data['topic_vectors'], data['doc_top']
+
+
+def compute_doc_topic_similarity(model_dir, document_vectors, topic_vectors, pub_dates=None,
+                                 k=TOP_K_SIMILITUD, chunk_size=TAMANO_BLOQUE_SIMILITUD):
+    """
+    Matriz completa documentos × tópicos (similitud coseno), calculada por bloques.
+
+    En una sola pasada por bloques de documentos (memoria acotada por el bloque):
+    escribe la matriz en float16 en un .npy con memory-mapping, guarda la variante
+    dispersa con los k tópicos más similares de cada documento y, si se pasan las
+    fechas, acumula las intensidades diarias por tópico.
+
+    La participación de un documento en un tópico es su similitud (positiva)
+    con ese tópico dividida por la suma sobre sus k tópicos más similares.
+
+    Returns:
+        Ruta de la matriz .npy
+    """
+    from scipy import sparse
+
+    model_dir = Path(model_dir)
+    num_docs, num_topics = len(document_vectors), len(topic_vectors)
+    k = min(k, num_topics)
+    topics = np.asarray(topic_vectors, dtype=np.float32)
+    topics = topics / np.linalg.norm(topics, axis=1, keepdims=True)
+
+    path = model_dir / ARCHIVO_SIMILITUD_DOCUMENTOS
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=(num_docs, num_topics))
+    top_idx = np.empty((num_docs, k), dtype=np.int32)
+    top_val = np.empty((num_docs, k), dtype=np.float32)
+
+    if pub_dates is not None:
+        days = pd.to_datetime(np.asarray(pub_dates)).values.astype('datetime64[D]')
+        fechas, day_index = np.unique(days, return_inverse=True)
+        similarity_sums = np.zeros((len(fechas), num_topics), dtype=np.float64)
+        share_sums = np.zeros((len(fechas), num_topics), dtype=np.float64)
+
+    for start in range(0, num_docs, chunk_size):
+        end = min(start + chunk_size, num_docs)
+        chunk = np.asarray(document_vectors[start:end], dtype=np.float32)
+        sims = (chunk / np.linalg.norm(chunk, axis=1, keepdims=True)) @ topics.T
+        matrix[start:end] = sims
+
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        values = np.take_along_axis(sims, part, axis=1)
+        top_idx[start:end] = part
+        top_val[start:end] = values
+
+        if pub_dates is not None:
+            # Suma por día con una matriz one-hot dispersa (días × documentos del bloque)
+            rows = np.arange(end - start)
+            onehot = sparse.csr_matrix((np.ones(end - start), (day_index[start:end], rows)),
+                                       shape=(len(fechas), end - start))
+            similarity_sums += onehot @ sims
+            positive = np.maximum(values, 0)
+            shares = positive / np.maximum(positive.sum(axis=1, keepdims=True), 1e-12)
+            share_matrix = sparse.csr_matrix((shares.ravel(), (np.repeat(rows, k), part.ravel())),
+                                             shape=(end - start, num_topics))
+            share_sums += (onehot @ share_matrix).toarray()
+
+    matrix.flush()
+    del matrix
+
+    top_k = sparse.csr_matrix((top_val.ravel(), top_idx.ravel(), np.arange(0, num_docs * k + 1, k)),
+                              shape=(num_docs, num_topics))
+    sparse.save_npz(model_dir / ARCHIVO_SIMILITUD_TOP_K, top_k)
+
+    if pub_dates is not None:
+        np.savez(model_dir / ARCHIVO_INTENSIDADES_DIARIAS, fechas=fechas,
+                 documentos=np.bincount(day_index, minlength=len(fechas)).astype(np.int32),
+                 similitud=similarity_sums.astype(np.float32), participacion=share_sums.astype(np.float32))
+    return path
+
+
+def load_doc_topic_similarity(model_dir):
+    """Matriz documentos × tópicos en modo memory-mapped (None si no se calculó)"""
+    path = Path(model_dir) / ARCHIVO_SIMILITUD_DOCUMENTOS
+    return np.load(path, mmap_mode='r') if path.exists() else None
+
+
+def load_doc_topic_top_k(model_dir):
+    """Variante dispersa (CSR documentos × tópicos) con los k tópicos de cada documento"""
+    from scipy import sparse
+    path = Path(model_dir) / ARCHIVO_SIMILITUD_TOP_K
+    return sparse.load_npz(path) if path.exists() else None
+
+
+def load_daily_topic_intensities(model_dir, hierarchy=None):
+    """
+    Intensidades diarias por tópico (None si no se calcularon).
+
+    Returns:
+        dict con 'fechas', 'documentos' (por día) y, para cada nivel, las sumas
+        diarias de 'similitud' y 'participacion' ({nivel: días × nivel})
+    """
+    path = Path(model_dir) / ARCHIVO_INTENSIDADES_DIARIAS
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        result = {'fechas': data['fechas'], 'documentos': data['documentos']}
+        similarity, shares = data['similitud'], data['participacion']
+
+    num_topics = similarity.shape[1]
+    result['similitud'] = {num_topics: similarity}
+    result['participacion'] = {num_topics: shares}
+    for level, level_data in (hierarchy or {}).items():
+        # Las participaciones de un macro-tópico son la suma de las de sus tópicos
+        reduced = np.zeros((len(shares), level), dtype=np.float32)
+        np.add.at(reduced.T, level_data['mapa'], shares.T)
+        result['participacion'][level] = reduced
+    return result
+
+
+def rank_topic_documents(labels, scores, num_topics, n=DOCS_REPRESENTATIVOS):
+    """
+    Los `n` documentos de mayor score de cada tópico.
+
+    Agrupa los documentos por tópico con un solo ordenamiento estable y, en
+    cada grupo, un argpartition (solo se ordenan los n elegidos).
+
+    Returns:
+        Tupla (indptr, docs, doc_scores) estilo CSR: los documentos del tópico t
+        son docs[indptr[t]:indptr[t + 1]], ordenados por score descendente
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores, dtype=np.float32)
+    order = np.argsort(labels, kind='stable')
+    bounds = np.searchsorted(labels[order], np.arange(num_topics + 1))
+
+    selected = []
+    for topic in range(num_topics):
+        members = order[bounds[topic]:bounds[topic + 1]]
+        if len(members) > n:
+            members = members[np.argpartition(-scores[members], n - 1)[:n]]
+        selected.append(members[np.argsort(-scores[members], kind='stable')])
+
+    indptr = np.zeros(num_topics + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(members) for members in selected])
+    docs = np.concatenate(selected).astype(np.int64) if selected else np.empty(0, dtype=np.int64)
+    return indptr, docs, scores[docs]
+
+
+def rank_recent_documents(labels, scores, months, num_topics, num_months=MESES_RECIENTES, per_month=DOCS_POR_MES):
+    """
+    Los `per_month` documentos de mayor score de cada tópico en cada uno de sus
+    `num_months` meses más recientes con documentos.
+
+    Un solo lexsort (tópico, mes descendente, score descendente) y rangos
+    dentro de cada grupo calculados con diferencias de índices.
+
+    Returns:
+        Tupla (indptr, docs, doc_scores, doc_months) estilo CSR por tópico,
+        ordenada por mes descendente y score descendente
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores, dtype=np.float32)
+    docs = np.flatnonzero(~np.isnat(months))
+    month_num = months[docs].astype(np.int64)
+
+    order = np.lexsort((-scores[docs], -month_num, labels[docs]))
+    docs, month_num = docs[order], month_num[order]
+    topic = labels[docs].astype(np.int64)
+
+    # Grupos (tópico, mes) consecutivos y rango de cada documento dentro de su grupo
+    new_group = np.ones(len(docs), dtype=bool)
+    new_group[1:] = (topic[1:] != topic[:-1]) | (month_num[1:] != month_num[:-1])
+    group = np.cumsum(new_group) - 1
+    group_start = np.flatnonzero(new_group)
+    rank = np.arange(len(docs)) - group_start[group]
+
+    # Ordinal de cada mes dentro de su tópico (0 = el más reciente)
+    group_topic = topic[group_start]
+    first_group = np.searchsorted(group_topic, group_topic)
+    month_rank = (np.arange(len(group_start)) - first_group)[group]
+
+    keep = (rank < per_month) & (month_rank < num_months)
+    docs, topic = docs[keep], topic[keep]
+    indptr = np.searchsorted(topic, np.arange(num_topics + 1)).astype(np.int64)
+    return indptr, docs.astype(np.int64), scores[docs], months[docs]
+
+
+def level_document_scores(document_vectors, doc_top, level_data, chunk_size=TAMANO_BLOQUE_SIMILITUD):
+    """
+    Macro-tópico de cada documento y su similitud con el vector del macro-tópico.
+
+    Un producto fila a fila por bloques (cada documento solo con su macro-tópico).
+    """
+    labels = np.asarray(level_data['mapa'])[np.asarray(doc_top)]
+    vectors = np.asarray(level_data['vectores'], dtype=np.float32)
+    scores = np.empty(len(labels), dtype=np.float32)
+    for start in range(0, len(labels), chunk_size):
+        end = min(start + chunk_size, len(labels))
+        chunk = np.asarray(document_vectors[start:end], dtype=np.float32)
+        norms = np.maximum(np.linalg.norm(chunk, axis=1), 1e-12)
+        scores[start:end] = np.einsum('ij,ij->i', chunk, vectors[labels[start:end]]) / norms
+    return labels, scores
+
+
+def compute_representative_documents(doc_top, doc_dist, num_topics, pub_dates=None, documents=None,
+                                     hierarchy=None, document_vectors=None, n=DOCS_REPRESENTATIVOS,
+                                     snippet_length=LONGITUD_FRAGMENTO):
+    """
+    Índice de documentos representativos de todos los tópicos (y niveles).
+
+    En el nivel original el score es doc_dist (el mismo orden que
+    Top2Vec.search_documents_by_topic); en cada macro-tópico, la similitud con
+    su vector (requiere document_vectors).
+
+    Args:
+        doc_top, doc_dist: Tópico asignado y score de cada documento
+        num_topics: Número de tópicos del modelo
+        pub_dates: Fechas (opcional, para los recientes por mes)
+        documents: Textos (opcional, para los fragmentos)
+        hierarchy: Jerarquía de compute_topic_hierarchy (opcional)
+        document_vectors: Embeddings de los documentos (para los niveles reducidos)
+        n: Documentos representativos por tópico
+        snippet_length: Caracteres por fragmento
+
+    Returns:
+        dict {'niveles': {nivel: {...}}, 'num_documentos', 'fragmento_docs',
+        'fragmento_offsets', 'fragmentos'}
+    """
+    months = None
+    if pub_dates is not None:
+        months = pd.to_datetime(np.asarray(pub_dates)).values.astype('datetime64[M]')
+
+    rankings = {num_topics: (np.asarray(doc_top), doc_dist)}
+    if document_vectors is not None:
+        for level, level_data in (hierarchy or {}).items():
+            rankings[level] = level_document_scores(document_vectors, doc_top, level_data)
+
+    levels = {}
+    for level, (labels, scores) in rankings.items():
+        indptr, docs, doc_scores = rank_topic_documents(labels, scores, level, n)
+        levels[level] = {'indptr': indptr, 'docs': docs, 'scores': doc_scores}
+        if months is not None:
+            (levels[level]['recientes_indptr'], levels[level]['recientes_docs'],
+             levels[level]['recientes_scores'], levels[level]['recientes_meses']) = rank_recent_documents(
+                labels, scores, months, level)
+
+    # Fragmentos de texto de todos los documentos elegidos (una vez por documento)
+    chosen = np.unique(np.concatenate([data[key] for data in levels.values()
+                                       for key in ('docs', 'recientes_docs') if key in data]))
+    snippets = []
+    if documents is not None:
+        for doc in chosen:
+            text = str(documents[doc])
+            snippets.append((text[:snippet_length] + '...' if len(text) > snippet_length else text).encode('utf-8'))
+    offsets = np.zeros(len(snippets) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(snippet) for snippet in snippets])
+
+    return {
+        'niveles': levels,
+        'num_documentos': len(doc_top),
+        'fragmento_docs': chosen if snippets else np.empty(0, dtype=np.int64),
+        'fragmento_offsets': offsets,
+        'fragmentos': np.frombuffer(b''.join(snippets), dtype=np.uint8)
+    }
+
+
+def save_representative_documents(model_dir, index, huella=None):
+    """Guarda el índice de documentos representativos en un solo .npz (con la huella del modelo)"""
+    arrays = {
+        'niveles': np.array(sorted(index['niveles']), dtype=np.int32),
+        'num_documentos': np.int64(index['num_documentos']),
+        **{key: index[key] for key in ('fragmento_docs', 'fragmento_offsets', 'fragmentos')}
+    }
+    for level, data in index['niveles'].items():
+        for field, values in data.items():
+            arrays[f'{field}_{level}'] = values
+    if huella:
+        arrays['huella_modelo'] = np.array(huella)
+    path = Path(model_dir) / ARCHIVO_DOCUMENTOS_REPRESENTATIVOS
+    np.savez(path, **arrays)
+    return path
+
+
+def load_representative_documents(model_dir, huella=None):
+    """Carga el índice de documentos representativos (None si no existe o es de otro modelo: huella distinta)"""
+    path = Path(model_dir) / ARCHIVO_DOCUMENTOS_REPRESENTATIVOS
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        if not _fingerprint_matches(data, huella):
+            return None
+        index = {key: data[key] for key in ('fragmento_docs', 'fragmento_offsets', 'fragmentos')}
+        index['num_documentos'] = int(data['num_documentos'])
+        index['niveles'] = {}
+        for level in data['niveles'].tolist():
+            suffix = f'_{level}'
+            index['niveles'][level] = {key[:-len(suffix)]: data[key] for key in data.files if key.endswith(suffix)}
+    return index
+
+
+def get_representative_documents(model, model_dir=None, pub_dates=None, hierarchy=None):
+    """
+    Devuelve el índice de documentos representativos, leyéndolo de disco si existe.
+
+    Para modelos antiguos (sin el archivo) o si el archivo es de otro modelo
+    (huella distinta), lo calcula una vez y lo guarda.
+    """
+    huella = model_fingerprint(model.topic_vectors, model.doc_top) if model_dir else None
+    index = load_representative_documents(model_dir, huella) if model_dir else None
+    num_topics = len(model.topic_vectors)
+    expected = {num_topics, *(hierarchy or {})}
+    if index is not None and index['num_documentos'] == len(model.doc_top) and expected <= set(index['niveles']):
+        return index
+
+    index = compute_representative_documents(
+        model.doc_top, model.doc_dist, num_topics, pub_dates, getattr(model, 'documents', None),
+        hierarchy, model.document_vectors
+    )
+    if model_dir:
+        try:
+            save_representative_documents(model_dir, index, huella)
+        except OSError:
+            pass
+    return index
+
+
+def representative_snippets(index, docs):
+    """Fragmentos de texto de los documentos pedidos (None si el índice no tiene textos)"""
+    if not len(index['fragmento_docs']):
+        return None
+    positions = np.searchsorted(index['fragmento_docs'], docs)
+    offsets, blob = index['fragmento_offsets'], index['fragmentos']
+    return [blob[offsets[p]:offsets[p + 1]].tobytes().decode('utf-8') for p in positions]
+
+
+def topic_representatives(index, level, topic, start=0, count=5):
+    """
+    Página de documentos representativos de un tópico, sin cálculo vectorial.
+
+    Returns:
+        Tupla (docs, scores, fragmentos); fragmentos es None si no hay textos
+    """
+    data = index['niveles'][level]
+    begin, end = data['indptr'][topic], data['indptr'][topic + 1]
+    docs = data['docs'][begin:end][start:start + count]
+    return docs, data['scores'][begin:end][start:start + count], representative_snippets(index, docs)
+
+
+def topic_recent_representatives(index, level, topic):
+    """
+    Mejores documentos de cada mes reciente de un tópico (None si el índice no tiene fechas).
+
+    Returns:
+        Lista de (mes, docs, scores, fragmentos) del mes más reciente al más antiguo
+    """
+    data = index['niveles'][level]
+    if 'recientes_indptr' not in data:
+        return None
+    begin, end = data['recientes_indptr'][topic], data['recientes_indptr'][topic + 1]
+    docs, scores = data['recientes_docs'][begin:end], data['recientes_scores'][begin:end]
+    months = data['recientes_meses'][begin:end]
+    snippets = representative_snippets(index, docs)
+    # Los documentos de cada mes son consecutivos (orden por mes descendente)
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(months) else np.empty(0, dtype=int)
+    bounds = np.append(starts, len(months))
+    return [(months[a], docs[a:b], scores[a:b], snippets[a:b] if snippets is not None else None)
+            for a, b in zip(bounds[:-1], bounds[1:])]
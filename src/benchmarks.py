@@ -0,0 +1,403 @@
+"""
+MICRO-BENCHMARKS
+================
+
+Mediciones rápidas (con datos sintéticos) de las optimizaciones del
+pipeline. No necesitan los archivos de data/ ni un modelo entrenado.
+
+El repositorio no tiene suite de tests: las cotas que se comprueban aquí con
+assert (pico de RSS en `memoria`, ninguna dependencia pesada al importar la app
+en `importacion`) solo se verifican al ejecutar este script a
+mano; nada lo ejecuta automáticamente.
+
+Uso:
+    python benchmarks.py                 # ejecuta todos
+    python benchmarks.py vocabulario     # solo uno
+    python benchmarks.py busqueda_lote
+    python benchmarks.py importacion      # arranque en frío de la app
+    python benchmarks.py memoria          # pico de RSS al cargar embeddings y crear el modelo
+    python benchmarks.py tendencias       # métricas de tendencia de todos los tópicos
+    python benchmarks.py duplicados       # detección de casi-duplicados (LSH + coseno)
+    python benchmarks.py modos_umap       # UMAP reproducible vs rápido (requiere umap y hdbscan)
+"""
+
+import ast
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def _timeit(func, repeat=3):
+    """Mejor tiempo (segundos) de `repeat` ejecuciones"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _synthetic_vocab(num_words, seed=42):
+    """Vocabulario con variantes de puntuación y números, como el de las noticias"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyzáéíóúñ'))
+    decorations = ['', '', '', '.', ',', '"', '(', '.el', '.de', '-', '2020', ':']
+    vocab = []
+    for _ in range(num_words):
+        word = ''.join(rng.choice(letters, size=rng.integers(3, 12)))
+        deco = decorations[rng.integers(len(decorations))]
+        vocab.append(deco + word if deco in ('"', '(') else word + deco)
+    return vocab
+
+
+def bench_vocabulario(num_words=50_000, num_topics=300, k=50, target_count=20, num_docs=20_000):
+    """Limpieza por llamada (regex por palabra) vs vocabulario limpio precalculado"""
+    from artefactos_modelo import build_vocab_map, clean_topic_keywords, clean_topic_words
+
+    rng = np.random.default_rng(0)
+    vocab = _synthetic_vocab(num_words)
+    vocab_array = np.asarray(vocab, dtype=object)
+    word_ids = rng.integers(0, num_words, size=(num_topics, k))
+    scores = -np.sort(-rng.random((num_topics, k)), axis=1)
+
+    def per_call():
+        return [clean_topic_words(vocab_array[ids], sc, target_count) for ids, sc in zip(word_ids, scores)]
+
+    start = time.perf_counter()
+    vocab_map = build_vocab_map(vocab)
+    build_time = time.perf_counter() - start
+
+    def lookup():
+        return [clean_topic_keywords(ids, sc, vocab_map, target_count) for ids, sc in zip(word_ids, scores)]
+
+    assert [w for w, _ in per_call()] == [w for w, _ in lookup()], "Los dos caminos no coinciden"
+
+    # Palabras clave por documento: antes se limpiaban en cada fila del Excel
+    doc_topics = rng.integers(0, num_topics, size=num_docs)
+
+    def per_document():
+        return [', '.join(clean_topic_words(vocab_array[word_ids[t]], scores[t], 10)[0]) for t in doc_topics]
+
+    def per_document_lookup():
+        keywords = np.array([', '.join(clean_topic_keywords(ids, sc, vocab_map, 10)[0])
+                             for ids, sc in zip(word_ids, scores)], dtype=object)
+        return keywords[doc_topics]
+
+    t_per_call = _timeit(per_call)
+    t_lookup = _timeit(lookup)
+    t_per_document = _timeit(per_document, repeat=1)
+    t_per_document_lookup = _timeit(per_document_lookup)
+    print(f"Vocabulario: {num_words:,} palabras, {num_topics} tópicos × {k} palabras")
+    print(f"  • Construcción del vocabulario limpio (una vez): {build_time * 1000:.1f} ms")
+    print(f"  • Todos los tópicos, limpieza por llamada:       {t_per_call * 1000:.1f} ms")
+    print(f"  • Todos los tópicos, vocabulario limpio:         {t_lookup * 1000:.1f} ms")
+    print(f"  • Aceleración: {t_per_call / t_lookup:.1f}x")
+    print(f"  • {num_docs:,} documentos, limpieza por fila:        {t_per_document * 1000:.1f} ms")
+    print(f"  • {num_docs:,} documentos, indexación por tópico:    {t_per_document_lookup * 1000:.1f} ms")
+    print(f"  • Aceleración: {t_per_document / t_per_document_lookup:.1f}x")
+
+
+def bench_busqueda_lote(num_docs=300_000, dim=300, num_words=20_000, num_queries=200, k=10):
+    """Una búsqueda por consulta (recorrido completo cada vez) vs búsqueda por lotes en bloques"""
+    from types import SimpleNamespace
+    from consultas_modelo import ModelQueries, _top_k_indexes
+
+    rng = np.random.default_rng(0)
+    vocab = [f'palabra{i}' for i in range(num_words)]
+    model = SimpleNamespace(
+        vocab=vocab,
+        word_indexes={w: i for i, w in enumerate(vocab)},
+        word_vectors=rng.standard_normal((num_words, dim), dtype=np.float32),
+        topic_vectors=rng.standard_normal((50, dim), dtype=np.float32),
+        document_vectors=rng.standard_normal((num_docs, dim), dtype=np.float32),
+        doc_top=rng.integers(0, 50, num_docs),
+        documents=None
+    )
+    queries = ModelQueries(model)
+    keyword_sets = [[vocab[i] for i in rng.integers(0, num_words, 3)] for _ in range(num_queries)]
+
+    def one_by_one():
+        results = []
+        for keywords in keyword_sets:
+            scores = model.document_vectors @ queries.keyword_vector(keywords)
+            results.append(_top_k_indexes(scores, k))
+        return results
+
+    expected = one_by_one()
+    batch, informe = queries.search_keyword_sets(keyword_sets, num_docs=k)
+    got = batch['fila'].values.reshape(num_queries, k)
+    assert all(set(e) == set(g) for e, g in zip(expected, got)), "Los dos caminos no coinciden"
+
+    t_loop = _timeit(one_by_one, repeat=1)
+    t_batch = _timeit(lambda: queries.search_keyword_sets(keyword_sets, num_docs=k), repeat=3)
+    print(f"Búsqueda: {num_queries} consultas × {num_docs:,} documentos (dim {dim}), top-{k}")
+    print(f"  • Una consulta a la vez: {t_loop * 1000:.0f} ms ({num_queries / t_loop:.0f} consultas/s)")
+    print(f"  • Por lotes en bloques:  {t_batch * 1000:.0f} ms ({num_queries / t_batch:.0f} consultas/s)")
+    print(f"  • Aceleración: {t_loop / t_batch:.1f}x")
+
+
+# Dependencias pesadas que no deben cargarse al abrir la app (se importan al usarlas)
+MODULOS_PESADOS = ['top2vec', 'umap', 'hdbscan', 'numba', 'gensim', 'sklearn', 'wordcloud',
+                   'matplotlib', 'plotly', 'PIL', 'psutil', 'pyarrow']
+
+
+def _app_modules(app_file=Path(__file__).parent / 'app.py'):
+    """Módulos propios que app.py importa al arrancar (imports de nivel superior con un .py en src/)"""
+    tree = ast.parse(app_file.read_text(encoding='utf-8'))
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return [name for name in dict.fromkeys(names) if (app_file.parent / f'{name}.py').exists()]
+
+
+# Módulos propios que importa app.py al arrancar (leídos de sus imports: la lista no se queda atrás)
+MODULOS_APP = _app_modules()
+
+
+def _import_times(statement):
+    """Ejecuta `statement` en un intérprete nuevo con -X importtime"""
+    check = f"import sys; print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'{statement}; {check}'],
+        cwd=Path(__file__).parent, capture_output=True, text=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and '|' in line and 'self [us]' not in line:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            times.append((name.strip(), int(self_us), int(cumulative_us)))
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return result.returncode, times, loaded
+
+
+def bench_importacion(top=10):
+    """
+    Tiempo de importación en frío de la app y comprobación de que no carga dependencias pesadas.
+
+    La comprobación solo se hace con `python benchmarks.py importacion`.
+    """
+    statement = 'import app'
+    returncode, times, loaded = _import_times(statement)
+    if returncode != 0:
+        # Sin streamlit instalado se mide la cadena de módulos propios que importa app.py
+        statement = 'import ' + ', '.join(MODULOS_APP)
+        returncode, times, loaded = _import_times(statement)
+        assert returncode == 0, "No se pudieron importar los módulos de la app"
+
+    # pandas carga pyarrow por su cuenta si está instalado: no cuenta como importación de la app
+    _, _, baseline = _import_times('import numpy, pandas')
+    loaded = [m for m in loaded if m not in baseline]
+
+    top_level = [t for t in times if '.' not in t[0].strip()]
+    total_us = sum(cumulative for _, _, cumulative in top_level)
+    heaviest = sorted(top_level, key=lambda t: -t[2])[:top]
+
+    print(f"Importación en frío: `{statement}`")
+    print(f"  • Tiempo total: {total_us / 1000:.0f} ms ({len(times)} módulos)")
+    for name, _, cumulative in heaviest:
+        print(f"      {cumulative / 1000:8.1f} ms  {name}")
+    print(f"  • Dependencias pesadas cargadas: {', '.join(loaded) or 'ninguna'}")
+    assert not loaded, f"Se importan al arrancar: {', '.join(loaded)}"
+
+
+# Pico de RSS admitido al cargar y filtrar los embeddings y construir el modelo, en múltiplos de la matriz float32
+FACTOR_PICO_RSS = 1.5
+
+_SCRIPT_MEMORIA = '''
+import json, sys
+import numpy as np
+from entrenamiento_escalable import (as_embedding_buffer, load_embeddings_float32, new_precomputed_model,
+                                     peak_rss_bytes, select_rows)
+try:
+    from top2vec import Top2Vec
+except ImportError:
+    Top2Vec = object
+
+def compute_topics(self, **kwargs):
+    # Sin UMAP ni HDBSCAN: el modelo debe recibir el buffer cargado, sin copia
+    assert np.shares_memory(self.document_vectors, vectors)
+    self.doc_top = np.zeros(self.num_documents, dtype=np.int64)
+
+Top2VecSinClustering = type('Top2VecSinClustering', (Top2Vec,), {'compute_topics': compute_topics})
+path, mode = sys.argv[1], sys.argv[2]
+base = peak_rss_bytes()
+if mode == 'directo':
+    vectors = np.load(path)['embeddings'].astype(np.float32)
+    subset = vectors[np.arange(len(vectors) // 4, len(vectors) // 2)]
+else:
+    # Mismo camino que app.train_model: buffer float32, filtro de fechas, modelo vacío y compute_topics
+    with np.load(path) as data:
+        word_vectors = as_embedding_buffer(data['word_vectors'])
+        vocab = data['vocab'].tolist()
+    vectors = load_embeddings_float32(path)
+    subset = as_embedding_buffer(select_rows(vectors, np.arange(len(vectors) // 4, len(vectors) // 2)))
+    assert np.shares_memory(subset, vectors) and subset.flags.c_contiguous and not subset.flags.writeable
+    documents = [f"Document {i}" for i in range(len(subset))]
+    model = new_precomputed_model(subset, word_vectors, vocab, {w: i for i, w in enumerate(vocab)}, documents,
+                                  model_class=Top2VecSinClustering)
+    model.compute_topics(umap_args={}, hdbscan_args={}, topic_merge_delta=0.1, gpu_umap=False, gpu_hdbscan=False,
+                         index_topics=False)
+print(json.dumps({'base': base, 'pico': peak_rss_bytes(), 'bytes': vectors.nbytes}))
+'''
+
+
+def _peak_rss_run(npz_path, mode):
+    """Incremento del pico de RSS (bytes) de cargar y filtrar en un intérprete nuevo"""
+    result = subprocess.run([sys.executable, '-c', _SCRIPT_MEMORIA, str(npz_path), mode],
+                            cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    info = json.loads(result.stdout)
+    return info['pico'] - info['base'], info['bytes']
+
+
+def bench_memoria(num_docs=100_000, dim=256, num_words=5_000):
+    """
+    Pico de RSS de un .npz float64: carga directa + astype frente al camino de app.train_model.
+
+    La cota FACTOR_PICO_RSS solo se comprueba con `python benchmarks.py memoria`.
+
+    El segundo carga el buffer float32 por bloques, filtra por fechas y crea el
+    modelo con new_precomputed_model (Top2Vec.__new__ y asignación de
+    atributos). compute_topics se sustituye por una comprobación de que el
+    modelo comparte el buffer: UMAP y HDBSCAN no se miden.
+    """
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        npz_path = Path(tmp) / 'embeddings.npz'
+        np.savez(npz_path, embeddings=rng.standard_normal((num_docs, dim)),
+                 word_vectors=rng.standard_normal((num_words, dim)), vocab=np.array([f'w{i}' for i in range(num_words)]))
+
+        direct, matrix_bytes = _peak_rss_run(npz_path, 'directo')
+        buffered, _ = _peak_rss_run(npz_path, 'buffer')
+
+    mb = 1024 ** 2
+    print(f"Memoria: {num_docs:,} embeddings float64 × {dim} (float32: {matrix_bytes / mb:.0f} MB)")
+    print(f"  • Carga directa + astype + filtro: +{direct / mb:.0f} MB ({direct / matrix_bytes:.1f}× la matriz)")
+    print(f"  • Camino de train_model (buffer + filtro + modelo): +{buffered / mb:.0f} MB "
+          f"({buffered / matrix_bytes:.1f}× la matriz)")
+    assert buffered <= FACTOR_PICO_RSS * matrix_bytes, \
+        f"Pico de RSS {buffered / matrix_bytes:.1f}× la matriz (máximo {FACTOR_PICO_RSS}×)"
+
+
+def bench_tendencias(num_docs=1_000_000, num_topics=300, years=16, limit_seconds=1.0):
+    """Tendencias normalizadas de todos los tópicos: conteos diarios + métricas a cada frecuencia"""
+    from artefactos_modelo import compute_daily_topic_counts
+    from tendencias_topicos import compute_topic_trends, emerging_topics
+
+    rng = np.random.default_rng(0)
+    pub_dates = np.datetime64('2008-01-01') + rng.integers(0, years * 365, num_docs).astype('timedelta64[D]')
+    doc_top = rng.integers(0, num_topics, num_docs)
+
+    def full_pipeline():
+        fechas, tables = compute_daily_topic_counts(pub_dates, doc_top, num_topics)
+        for freq in ('W', 'M', 'Q', 'Y'):
+            emerging_topics(compute_topic_trends(fechas, tables[num_topics], freq))
+        return fechas, tables
+
+    elapsed = _timeit(full_pipeline)
+    fechas, tables = full_pipeline()
+    per_freq = _timeit(lambda: compute_topic_trends(fechas, tables[num_topics], 'M'))
+
+    print(f"Tendencias: {num_docs:,} documentos, {num_topics} tópicos, {years} años")
+    print(f"  • Conteos diarios + 4 frecuencias + emergentes: {elapsed * 1000:.0f} ms")
+    print(f"  • Solo métricas mensuales (desde los conteos precalculados): {per_freq * 1000:.1f} ms")
+    assert elapsed < limit_seconds, f"Tendencias en {elapsed:.2f} s (máximo {limit_seconds} s)"
+
+
+def bench_duplicados(num_docs=200_000, dim=384, copy_fraction=0.15, days=3000):
+    """Casi-duplicados: copias con ruido publicadas en días cercanos a su original"""
+    from duplicados import find_near_duplicates
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((num_docs, dim), dtype=np.float32)
+    pub_dates = np.datetime64('2008-01-01') + rng.integers(0, days, num_docs).astype('timedelta64[D]')
+    copies = rng.choice(num_docs, int(num_docs * copy_fraction), replace=False)
+    originals = rng.choice(np.setdiff1d(np.arange(num_docs), copies), len(copies))
+    vectors[copies] = vectors[originals] + 0.1 * rng.standard_normal((len(copies), dim), dtype=np.float32)
+    pub_dates[copies] = pub_dates[originals] + rng.integers(0, 3, len(copies)).astype('timedelta64[D]')
+
+    elapsed = _timeit(lambda: find_near_duplicates(vectors, pub_dates), repeat=1)
+    dedup = find_near_duplicates(vectors, pub_dates)
+    recall = np.mean(dedup['grupo'][copies] == dedup['grupo'][originals])
+
+    print(f"Casi-duplicados: {num_docs:,} documentos × {dim} dims, {len(copies):,} copias")
+    print(f"  • Tiempo: {elapsed:.2f} s ({dedup['pares_candidatos']:,} pares candidatos)")
+    print(f"  • Representantes: {dedup['num_representantes']:,} ({dedup['ratio'] * 100:.1f}% colapsados)")
+    print(f"  • Copias detectadas: {recall * 100:.1f}%")
+
+
+def bench_modos_umap(num_docs=30_000, dim=128, num_clusters=40):
+    """
+    UMAP + HDBSCAN en modo reproducible y rápido: aceleración y diferencia en las asignaciones.
+
+    Comparación pendiente: todavía no hay cifras registradas (umap y hdbscan no
+    estaban instalados donde se añadió). Sin esas dependencias se informa y no
+    se ejecuta.
+    """
+    import os
+
+    try:
+        import hdbscan
+        import umap
+        from sklearn.metrics import adjusted_rand_score
+    except ImportError as error:
+        print(f"Modos de UMAP: comparación pendiente, falta {error.name} (requiere umap-learn, hdbscan y scikit-learn)")
+        return
+
+    from ejecucion_umap import umap_mode_args
+    from estabilidad_topicos import model_args
+
+    # Documentos alrededor de centros de tópicos (como embeddings de noticias agrupadas)
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, num_clusters, num_docs)] + 0.6 * rng.standard_normal((num_docs, dim), dtype=np.float32)
+    umap_args, hdbscan_args = model_args({'n_neighbors': 50, 'n_components': 5, 'min_cluster_size': 50,
+                                          'min_samples': 25})
+
+    def run(mode):
+        start = time.perf_counter()
+        reduced = umap.UMAP(**{**umap_args, **umap_mode_args(mode)}).fit_transform(vectors)
+        labels = hdbscan.HDBSCAN(**hdbscan_args).fit(reduced).labels_
+        return time.perf_counter() - start, labels
+
+    # Una ejecución previa compila las funciones de numba (no se mide)
+    umap.UMAP(**{**umap_args, **umap_mode_args('rapido')}).fit_transform(vectors[:2000])
+
+    reproducible_time, reproducible = run('reproducible')
+    fast_time, fast = run('rapido')
+    fast_time_2, fast_2 = run('rapido')
+    _, reproducible_2 = run('reproducible')
+
+    print(f"Modos de UMAP: {num_docs:,} documentos × {dim} dims, {os.cpu_count()} núcleos")
+    print(f"  • Reproducible: {reproducible_time:.1f} s · {reproducible.max() + 1} tópicos")
+    print(f"  • Rápido:       {min(fast_time, fast_time_2):.1f} s · {fast.max() + 1} tópicos "
+          f"(×{reproducible_time / min(fast_time, fast_time_2):.1f})")
+    print(f"  • ARI reproducible vs reproducible: {adjusted_rand_score(reproducible, reproducible_2):.3f}")
+    print(f"  • ARI reproducible vs rápido:       {adjusted_rand_score(reproducible, fast):.3f}")
+    print(f"  • ARI rápido vs rápido:             {adjusted_rand_score(fast, fast_2):.3f}")
+
+
+BENCHMARKS = {
+    'vocabulario': bench_vocabulario,
+    'busqueda_lote': bench_busqueda_lote,
+    'importacion': bench_importacion,
+    'memoria': bench_memoria,
+    'tendencias': bench_tendencias,
+    'duplicados': bench_duplicados,
+    'modos_umap': bench_modos_umap,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        print("\n" + "=" * 70)
+        BENCHMARKS[name]()
@@ -0,0 +1,133 @@
+"""
+CACHÉ DE CONSULTAS (LRU + TTL)
+==============================
+
+Los analistas repiten las mismas búsquedas ("inflación", "ipc", "precios",
+"banco central"...) y cada una recalcula el vector de consulta y recorre todos
+los documentos. Esta caché guarda los resultados de las búsquedas de tópicos,
+documentos y palabras:
+
+- Clave: id del modelo + operación + palabras ordenadas (positivas y
+  negativas) + parámetros (num_docs, num_topics, ...)
+- Tamaño máximo (LRU: se descarta la entrada usada hace más tiempo) y TTL
+- Métricas de aciertos/fallos
+- El id del modelo es la huella de `modelo.model`: si el modelo cambia en
+  disco cambia el id y sus entradas antiguas dejan de usarse (y se eliminan
+  con `invalidate`)
+
+Una única instancia (`QUERY_CACHE`) se comparte entre el explorador, la capa
+de consultas (consultas_modelo.py) y los scripts.
+
+Los resultados se devuelven tal cual están en caché: no modificarlos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from huellas_datos import file_fingerprint
+
+CACHE_MAX_ENTRADAS = 512
+CACHE_TTL_SEGUNDOS = 3600
+
+
+class QueryCache:
+    """Caché LRU con TTL y métricas de aciertos, segura entre hilos"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRADAS, ttl_seconds=CACHE_TTL_SEGUNDOS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el valor cacheado para `key` o lo calcula con `compute()` y lo guarda"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expired += 1
+            self.misses += 1
+
+        # Se calcula fuera del lock: consultas distintas no se bloquean entre sí
+        value = compute()
+
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, model_id=None):
+        """Elimina las entradas de un modelo (o todas si model_id es None)"""
+        with self.lock:
+            if model_id is None:
+                self.entries.clear()
+            else:
+                for key in [k for k in self.entries if k[0] == model_id]:
+                    del self.entries[key]
+
+    def stats(self):
+        """Métricas de uso de la caché"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self.entries),
+                'max_entradas': self.max_entries,
+                'aciertos': self.hits,
+                'fallos': self.misses,
+                'expirados': self.expired,
+                'tasa_aciertos': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# Instancia compartida por el explorador, la capa de consultas y los scripts
+QUERY_CACHE = QueryCache()
+
+
+def _keywords_key(keywords):
+    """Palabras ordenadas tal cual (el orden no cambia la consulta; mayúsculas y espacios sí)"""
+    return tuple(sorted(str(w) for w in (keywords or [])))
+
+
+def query_key(model_id, operation, keywords=None, keywords_neg=None, **params):
+    """Clave de caché de una consulta"""
+    return (model_id, operation, _keywords_key(keywords), _keywords_key(keywords_neg),
+            tuple(sorted(params.items())))
+
+
+def model_cache_id(model_path):
+    """Id de caché de un modelo guardado: la huella de su archivo"""
+    return file_fingerprint(Path(model_path))['huella']
+
+
+def cached_search(model, model_id, method, **kwargs):
+    """
+    Llama a un método de búsqueda de Top2Vec a través de la caché compartida.
+
+    Ejemplo:
+        cached_search(model, model_id, 'search_documents_by_keywords',
+                      keywords=['inflación', 'precios'], num_docs=10)
+
+    Args:
+        model: Modelo Top2Vec
+        model_id: Id del modelo (ver model_cache_id)
+        method: 'search_topics', 'search_documents_by_keywords',
+                'search_documents_by_topic', 'similar_words', ...
+        **kwargs: Argumentos del método (se pasan sin modificar: el vocabulario
+                  distingue mayúsculas, p. ej. "BCE" o "Fed")
+    """
+    params = {k: v for k, v in kwargs.items() if k not in ('keywords', 'keywords_neg')}
+    key = query_key(model_id, method, kwargs.get('keywords'), kwargs.get('keywords_neg'), **params)
+    return QUERY_CACHE.get_or_compute(key, lambda: getattr(model, method)(**kwargs))
@@ -0,0 +1,173 @@
+"""
+COMPARACIÓN ENTRE MODELOS
+=========================
+
+Alinea los tópicos de dos modelos guardados en `modelos/`:
+
+- Similitud coseno entre todos los pares de vectores de tópicos (un producto
+  matricial).
+- Solapamiento de asignaciones (Jaccard entre los conjuntos de documentos de
+  cada par de tópicos) a partir de una tabla de contingencia dispersa. Solo
+  tiene sentido si ambos modelos se entrenaron sobre los mismos documentos.
+- Emparejamiento óptimo uno a uno (algoritmo húngaro) que maximiza la
+  similitud total.
+
+El resultado se guarda en `modelos/<A>/comparaciones/<B>.npz` junto con las
+huellas de ambos modelos, de modo que repetir la comparación no requiere
+cargar ningún modelo.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from artefactos_modelo import (
+    load_topic_assignments, load_topic_top_words, load_vocab_map, save_topic_assignments,
+    get_topic_top_words, get_vocab_map, topic_keywords_table
+)
+from huellas_datos import file_fingerprint
+
+CARPETA_COMPARACIONES = 'comparaciones'
+
+
+def load_model_topics(model_dir):
+    """
+    Carga lo necesario para comparar un modelo: vectores de tópicos, asignaciones
+    y palabras clave por tópico.
+
+    Lee los artefactos guardados al entrenar; solo para modelos antiguos se
+    deserializa `modelo.model` (una vez, guardando los artefactos que faltan).
+
+    Returns:
+        dict con 'topic_vectors', 'doc_top' y 'keywords' (lista de str)
+    """
+    model_dir = Path(model_dir)
+    assignments = load_topic_assignments(model_dir)
+    top_words = load_topic_top_words(model_dir)
+    vocab_map = load_vocab_map(model_dir)
+
+    if assignments is None or top_words is None or vocab_map is None:
+        from top2vec import Top2Vec
+        model = Top2Vec.load(str(model_dir / 'modelo.model'))
+        assignments = (model.topic_vectors, model.doc_top)
+        try:
+            save_topic_assignments(model_dir, *assignments)
+        except OSError:
+            pass
+        top_words = get_topic_top_words(model, model_dir)
+        vocab_map = get_vocab_map(model, model_dir)
+
+    topic_vectors, doc_top = assignments
+    keywords = [', '.join(words[:5]) for words, _ in topic_keywords_table(*top_words, vocab_map, target_count=5)]
+    return {'topic_vectors': topic_vectors, 'doc_top': doc_top, 'keywords': keywords}
+
+
+def topic_similarity_matrix(vectors_a, vectors_b):
+    """Similitud coseno entre cada tópico de A (filas) y cada tópico de B (columnas)"""
+    a = vectors_a / np.linalg.norm(vectors_a, axis=1, keepdims=True)
+    b = vectors_b / np.linalg.norm(vectors_b, axis=1, keepdims=True)
+    return (a @ b.T).astype(np.float32)
+
+
+def assignment_overlap(doc_top_a, doc_top_b, num_topics_a, num_topics_b):
+    """
+    Jaccard entre los documentos de cada par de tópicos (mismos documentos, mismo orden).
+
+    La intersección sale de una tabla de contingencia dispersa (un solo pase
+    sobre los documentos); la unión, de los tamaños de cada tópico.
+    """
+    from scipy import sparse
+
+    doc_top_a = np.asarray(doc_top_a)
+    doc_top_b = np.asarray(doc_top_b)
+    contingency = sparse.coo_matrix(
+        (np.ones(len(doc_top_a), dtype=np.int64), (doc_top_a, doc_top_b)),
+        shape=(num_topics_a, num_topics_b)
+    ).toarray()
+    sizes_a = np.bincount(doc_top_a, minlength=num_topics_a)
+    sizes_b = np.bincount(doc_top_b, minlength=num_topics_b)
+    union = sizes_a[:, None] + sizes_b[None, :] - contingency
+    return (contingency / np.maximum(union, 1)).astype(np.float32)
+
+
+def align_topics(similarity):
+    """Emparejamiento uno a uno que maximiza la similitud total (algoritmo húngaro)"""
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(similarity, maximize=True)
+    return rows, cols
+
+
+def _same_documents(dir_a, dir_b, topics_a, topics_b):
+    """
+    True si ambos modelos asignan los mismos documentos (misma huella de datos y tamaño).
+
+    Sin la huella de alguno de los dos (modelos antiguos) no se puede
+    verificar: se devuelve False y la comparación omite el solapamiento.
+    """
+    if len(topics_a['doc_top']) != len(topics_b['doc_top']):
+        return False
+    huellas = []
+    for model_dir in (dir_a, dir_b):
+        metadata_path = Path(model_dir) / 'metadata.json'
+        huella = None
+        if metadata_path.exists():
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                huella = (json.load(f).get('huella_datos') or {}).get('huella')
+        huellas.append(huella)
+    return None not in huellas and huellas[0] == huellas[1]
+
+
+def compare_models(dir_a, dir_b):
+    """
+    Compara dos modelos guardados, reutilizando el resultado cacheado si ninguno cambió.
+
+    Returns:
+        dict con 'similitud' (T_a × T_b), 'solapamiento' (T_a × T_b o None),
+        'filas'/'columnas' (emparejamiento), 'palabras_a', 'palabras_b'
+    """
+    dir_a, dir_b = Path(dir_a), Path(dir_b)
+    huella_a = file_fingerprint(dir_a / 'modelo.model')['huella']
+    huella_b = file_fingerprint(dir_b / 'modelo.model')['huella']
+    cache_path = dir_a / CARPETA_COMPARACIONES / f'{dir_b.name}.npz'
+
+    if cache_path.exists():
+        with np.load(cache_path) as data:
+            if str(data['huella_a']) == huella_a and str(data['huella_b']) == huella_b:
+                return {
+                    'similitud': data['similitud'],
+                    'solapamiento': data['solapamiento'] if 'solapamiento' in data.files else None,
+                    'filas': data['filas'],
+                    'columnas': data['columnas'],
+                    'palabras_a': data['palabras_a'].tolist(),
+                    'palabras_b': data['palabras_b'].tolist()
+                }
+
+    topics_a = load_model_topics(dir_a)
+    topics_b = load_model_topics(dir_b)
+
+    similarity = topic_similarity_matrix(topics_a['topic_vectors'], topics_b['topic_vectors'])
+    overlap = None
+    if _same_documents(dir_a, dir_b, topics_a, topics_b):
+        overlap = assignment_overlap(topics_a['doc_top'], topics_b['doc_top'], *similarity.shape)
+    rows, cols = align_topics(similarity)
+
+    result = {
+        'similitud': similarity,
+        'solapamiento': overlap,
+        'filas': rows,
+        'columnas': cols,
+        'palabras_a': topics_a['keywords'],
+        'palabras_b': topics_b['keywords']
+    }
+
+    arrays = {key: value for key, value in result.items() if value is not None}
+    arrays['palabras_a'] = np.array(result['palabras_a'], dtype=str)
+    arrays['palabras_b'] = np.array(result['palabras_b'], dtype=str)
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        np.savez(cache_path, huella_a=huella_a, huella_b=huella_b, **arrays)
+    except OSError:
+        pass
+    return result
@@ -25,6 +25,8 @@ COLUMNA_ID = "doc_id"           # Columna con el ID único de cada noticia
 CARPETA_MODELOS = "modelos"
 CARPETA_RESULTADOS = "resultados"
 NOMBRE_MODELO = "modelo_top2vec.model"
+# Artefactos precalculados del modelo (top-k de palabras, representativos): carpeta propia del modelo
+CARPETA_ARTEFACTOS = "modelos/modelo_top2vec"
 
 
 # =============================================================================
@@ -70,9 +72,18 @@ UMAP_CONFIG = {
     'metric': 'cosine',
     
     # Semilla aleatoria (para reproducibilidad)
+    # En modo "rapido" se quita (ver MODO_UMAP)
     'random_state': 42
 }
 
+# Modo de ejecución de UMAP
+# "reproducible" = semilla fija: mismos tópicos en cada ejecución, pero UMAP usa un solo hilo
+# "rapido"       = sin semilla y en paralelo (todos los núcleos), los tópicos varían ligeramente
+MODO_UMAP = "reproducible"
+
+# Hilos de UMAP en modo "rapido" (None = todos los núcleos)
+HILOS_UMAP = None
+
 
 # =============================================================================
 # 🔗 PARÁMETROS DE FUSIÓN DE TÓPICOS
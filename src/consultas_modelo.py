@@ -0,0 +1,355 @@
+"""
+CONSULTAS SOBRE UN MODELO CARGADO
+=================================
+
+Capa de consultas en memoria sobre un modelo Top2Vec guardado. Se carga una
+vez (modelo + artefactos precalculados) y responde consultas por lotes:
+
+- Información de tópicos (tamaño y palabras clave limpias)
+- Documentos de un tópico o por palabras clave
+- Búsqueda por lotes de muchos conceptos a la vez (search_keyword_sets)
+- Palabras similares
+- Serie temporal de documentos por tópico
+- Asignación de documentos nuevos (a partir de su embedding)
+
+La usan el servicio HTTP (servicio_consultas.py) y los scripts de análisis.
+Las búsquedas pasan por la caché compartida de cache_consultas.py.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from artefactos_modelo import (
+    get_daily_topic_counts, get_topic_top_words, get_vocab_map, topic_keywords_table
+)
+from cache_consultas import QUERY_CACHE, model_cache_id, query_key
+
+# Documentos por bloque en la búsqueda por lotes (acota la matriz de scores a bloque × consultas)
+BLOQUE_DOCUMENTOS = 65_536
+
+
+class ModelQueries:
+    """Modelo cargado con sus artefactos, listo para responder consultas"""
+
+    def __init__(self, model, model_dir=None, pub_dates=None, model_id=None):
+        self.model = model
+        self.model_dir = Path(model_dir) if model_dir else None
+
+        # Id para la caché de consultas: huella del archivo del modelo si existe
+        if model_id is None and self.model_dir and (self.model_dir / 'modelo.model').exists():
+            model_id = model_cache_id(self.model_dir / 'modelo.model')
+        self.model_id = model_id or f'memoria-{id(model)}'
+
+        if pub_dates is None and self.model_dir and (self.model_dir / 'pub_dates.npy').exists():
+            pub_dates = np.load(self.model_dir / 'pub_dates.npy', allow_pickle=True)
+        self.pub_dates = pd.to_datetime(pub_dates).values if pub_dates is not None else None
+
+        # doc_id del CSV de cada fila (como en las exportaciones); sin doc_ids.npy los resultados dan la fila
+        self.doc_ids = None
+        if self.model_dir and (self.model_dir / 'doc_ids.npy').exists():
+            self.doc_ids = np.load(self.model_dir / 'doc_ids.npy', allow_pickle=True)
+
+        self.num_topics = len(model.topic_vectors)
+        self.topic_sizes = np.bincount(np.asarray(model.doc_top), minlength=self.num_topics)
+        self.word_ids, self.word_scores = get_topic_top_words(model, self.model_dir)
+        self.vocab_map = get_vocab_map(model, self.model_dir)
+        self.keywords = topic_keywords_table(self.word_ids, self.word_scores, self.vocab_map, target_count=10)
+
+        # Vectores normalizados para similitud coseno (una sola vez)
+        self.topic_vectors = _l2_normalize(np.asarray(model.topic_vectors, dtype=np.float32))
+        self.word_vectors = _l2_normalize(np.asarray(model.word_vectors, dtype=np.float32))
+        self._daily_counts = None
+
+    @classmethod
+    def from_dir(cls, model_dir):
+        """
+        Carga `modelo.model` (y pub_dates.npy) desde la carpeta de un modelo.
+
+        También admite el formato de ejecutar_modelo.py: `<carpeta>.model` junto
+        a la carpeta, que solo contiene los artefactos.
+        """
+        from top2vec import Top2Vec
+        model_dir = Path(model_dir)
+        model_path = model_dir / 'modelo.model'
+        if not model_path.exists():
+            model_path = model_dir.with_suffix('.model')
+        return cls(Top2Vec.load(str(model_path)), model_dir, model_id=model_cache_id(model_path))
+
+    # -------------------------------------------------------------------------
+    # Tópicos
+    # -------------------------------------------------------------------------
+
+    def _check_topics(self, topic_nums):
+        topic_nums = np.asarray(topic_nums, dtype=np.int64)
+        invalid = topic_nums[(topic_nums < 0) | (topic_nums >= self.num_topics)]
+        if len(invalid):
+            raise ValueError(f"Tópicos inexistentes: {invalid.tolist()} (el modelo tiene {self.num_topics})")
+        return topic_nums
+
+    def topic_info(self, topic_nums=None):
+        """Tamaño y palabras clave de cada tópico (todos si topic_nums es None)"""
+        topic_nums = self._check_topics(range(self.num_topics) if topic_nums is None else topic_nums)
+        return [
+            {
+                'topico': int(t),
+                'num_documentos': int(self.topic_sizes[t]),
+                'palabras': list(self.keywords[t][0]),
+                'scores': [round(float(s), 4) for s in self.keywords[t][1]]
+            }
+            for t in topic_nums
+        ]
+
+    def assign_vectors(self, vectors):
+        """Tópico más cercano (y su similitud) para embeddings de documentos nuevos"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape[1] != self.topic_vectors.shape[1]:
+            raise ValueError(f"Los vectores deben tener dimensión {self.topic_vectors.shape[1]}")
+        sims = _l2_normalize(vectors) @ self.topic_vectors.T
+        topics = np.argmax(sims, axis=1)
+        return topics, sims[np.arange(len(topics)), topics]
+
+    def topic_series(self, topic_nums, freq='M'):
+        """Documentos por periodo de cada tópico, a partir de los conteos diarios"""
+        topic_nums = self._check_topics(topic_nums)
+        if self._daily_counts is None:
+            if self.pub_dates is None:
+                raise ValueError("El modelo no tiene fechas de publicación (pub_dates.npy)")
+            fechas, tables = get_daily_topic_counts(
+                self.model_dir, self.pub_dates, self.model.doc_top, self.num_topics
+            )
+            self._daily_counts = (fechas, tables[self.num_topics])
+        fechas, counts = self._daily_counts
+
+        daily = pd.DataFrame(counts[:, topic_nums], index=pd.DatetimeIndex(fechas), columns=topic_nums)
+        return daily.resample(freq).sum()
+
+    # -------------------------------------------------------------------------
+    # Documentos
+    # -------------------------------------------------------------------------
+
+    def _document_id(self, idx):
+        """('doc_id', doc_id del CSV) si el modelo los tiene; si no, ('fila', posición en el modelo)"""
+        if self.doc_ids is None:
+            return 'fila', int(idx)
+        value = self.doc_ids[idx]
+        return 'doc_id', value.item() if isinstance(value, np.generic) else value
+
+    def _documents(self, doc_indexes, scores):
+        """Lista de resultados (doc_id o fila, score, fecha y texto si el modelo lo tiene)"""
+        results = []
+        for idx, score in zip(doc_indexes, scores):
+            field, value = self._document_id(idx)
+            item = {field: value, 'score': round(float(score), 4)}
+            if self.pub_dates is not None:
+                item['fecha'] = str(pd.Timestamp(self.pub_dates[idx]).date())
+            if self.model.documents is not None:
+                item['texto'] = str(self.model.documents[idx])
+            results.append(item)
+        return results
+
+    def documents_by_topic(self, topic_num, num_docs=10):
+        """Documentos asignados al tópico, ordenados por similitud con él"""
+        topic_num = int(self._check_topics([topic_num])[0])
+
+        def compute():
+            members = np.flatnonzero(np.asarray(self.model.doc_top) == topic_num)
+            dist = np.asarray(self.model.doc_dist)[members]
+            best = _top_k_indexes(dist, num_docs)
+            return self._documents(members[best], dist[best])
+
+        key = query_key(self.model_id, 'documents_by_topic', topic_num=topic_num, num_docs=num_docs)
+        return QUERY_CACHE.get_or_compute(key, compute)
+
+    def keyword_vector(self, keywords, keywords_neg=None):
+        """Vector de consulta combinado (mismo criterio que Top2Vec._get_combined_vec)"""
+        keywords_neg = keywords_neg or []
+        missing = [w for w in list(keywords) + list(keywords_neg) if w not in self.model.word_indexes]
+        if missing:
+            raise ValueError(f"Palabras fuera del vocabulario: {missing}")
+        pos = self.word_vectors[[self.model.word_indexes[w] for w in keywords]]
+        neg = self.word_vectors[[self.model.word_indexes[w] for w in keywords_neg]]
+        combined = (pos.sum(axis=0) - neg.sum(axis=0)) / (len(pos) + len(neg))
+        return combined / np.linalg.norm(combined)
+
+    def documents_by_keywords(self, keywords, keywords_neg=None, num_docs=10):
+        """Documentos más similares a una combinación de palabras clave"""
+        # Palabras tal cual: el vocabulario distingue mayúsculas ("BCE", "Fed"); la clave las ordena
+        keywords, keywords_neg = [str(w) for w in keywords], [str(w) for w in (keywords_neg or [])]
+
+        def compute():
+            query = self.keyword_vector(keywords, keywords_neg)
+            scores = self.model.document_vectors @ query
+            best = _top_k_indexes(scores, num_docs)
+            return self._documents(best, scores[best])
+
+        key = query_key(self.model_id, 'documents_by_keywords', keywords, keywords_neg, num_docs=num_docs)
+        return QUERY_CACHE.get_or_compute(key, compute)
+
+    def keyword_set_vectors(self, keyword_sets):
+        """
+        Vectores de consulta de muchos conjuntos de palabras en una sola pasada.
+
+        Cada conjunto es una lista de palabras, un texto ("tipo de cambio", se
+        separa por espacios) o un dict {'palabras': [...], 'negativas': [...]}.
+        Las palabras fuera del vocabulario se ignoran.
+
+        Returns:
+            Tupla (matriz de consultas normalizada, máscara de consultas válidas,
+            palabras ignoradas por consulta)
+        """
+        rows, cols, weights, ignored = [], [], [], []
+        for q, keyword_set in enumerate(keyword_sets):
+            if isinstance(keyword_set, dict):
+                pos, neg = keyword_set.get('palabras', []), keyword_set.get('negativas') or []
+            else:
+                pos, neg = (keyword_set.split() if isinstance(keyword_set, str) else keyword_set), []
+            terms = [(str(w), 1.0) for w in pos] + [(str(w), -1.0) for w in neg]
+            known = [(self.model.word_indexes[w], sign) for w, sign in terms if w in self.model.word_indexes]
+            ignored.append([w for w, _ in terms if w not in self.model.word_indexes])
+            for word_id, sign in known:
+                rows.append(q)
+                cols.append(word_id)
+                weights.append(sign / len(known))
+
+        # Matriz dispersa consultas × vocabulario: una sola multiplicación por los word vectors
+        selection = sparse.csr_matrix((weights, (rows, cols)), shape=(len(keyword_sets), len(self.word_vectors)))
+        queries = np.asarray(selection @ self.word_vectors, dtype=np.float32)
+        valid = np.linalg.norm(queries, axis=1) > 0
+        return _l2_normalize(queries), valid, ignored
+
+    def search_keyword_sets(self, keyword_sets, num_docs=10, block_size=BLOQUE_DOCUMENTOS, labels=None):
+        """
+        Búsqueda por lotes: los documentos más similares a cada conjunto de palabras.
+
+        Todas las consultas se puntúan juntas contra la matriz de documentos por
+        bloques (multiplicación matricial bloque × consultas) con top-k por consulta.
+
+        Args:
+            keyword_sets: Lista de conjuntos de palabras (ver keyword_set_vectors)
+            num_docs: Documentos por consulta
+            block_size: Documentos por bloque
+            labels: Nombre de cada consulta en el resultado (por defecto, el texto de la consulta)
+
+        Returns:
+            Tupla (DataFrame con columnas consulta, rango, doc_id (o fila si el
+            modelo no tiene doc_ids.npy), score, fecha;
+            informe con tiempos, consultas por segundo y consultas sin vocabulario)
+        """
+        start = time.perf_counter()
+        if labels is None:
+            labels = [_keyword_set_label(k) for k in keyword_sets]
+        queries, valid, ignored = self.keyword_set_vectors(keyword_sets)
+        valid_idx = np.flatnonzero(valid)
+
+        doc_idx, scores = blocked_top_k(self.model.document_vectors, queries[valid_idx], num_docs, block_size)
+        k = doc_idx.shape[1]
+
+        rows = doc_idx.ravel()
+        results = pd.DataFrame({
+            'consulta': np.repeat(np.asarray(labels, dtype=object)[valid_idx], k),
+            'rango': np.tile(np.arange(1, k + 1), len(valid_idx)),
+            **({'doc_id': self.doc_ids[rows]} if self.doc_ids is not None else {'fila': rows}),
+            'score': scores.ravel()
+        })
+        if self.pub_dates is not None:
+            results['fecha'] = self.pub_dates[rows]
+        elapsed = time.perf_counter() - start
+
+        informe = {
+            'consultas': len(keyword_sets),
+            'documentos': int(len(self.model.document_vectors)),
+            'tiempo_s': round(elapsed, 4),
+            'consultas_por_segundo': round(len(keyword_sets) / max(elapsed, 1e-9), 1),
+            'consultas_sin_vocabulario': [labels[i] for i in np.flatnonzero(~valid)],
+            'palabras_ignoradas': {labels[i]: words for i, words in enumerate(ignored) if words}
+        }
+        return results, informe
+
+    # -------------------------------------------------------------------------
+    # Palabras
+    # -------------------------------------------------------------------------
+
+    def similar_words(self, words, num_words=10):
+        """Palabras más similares a cada palabra de la lista (un producto matricial)"""
+        missing = [w for w in words if w not in self.model.word_indexes]
+        if missing:
+            raise ValueError(f"Palabras fuera del vocabulario: {missing}")
+
+        def compute():
+            ids = [self.model.word_indexes[w] for w in words]
+            sims = self.word_vectors[ids] @ self.word_vectors.T
+            sims[np.arange(len(ids)), ids] = -np.inf  # excluir la propia palabra
+
+            results = {}
+            for word, row in zip(words, sims):
+                best = _top_k_indexes(row, num_words)
+                results[word] = [{'palabra': self.model.vocab[i], 'score': round(float(row[i]), 4)} for i in best]
+            return results
+
+        key = query_key(self.model_id, 'similar_words', words=tuple(words), num_words=num_words)
+        return QUERY_CACHE.get_or_compute(key, compute)
+
+
+def _l2_normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k_indexes(scores, k):
+    """Índices de los k mayores valores, ordenados de mayor a menor"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _keyword_set_label(keyword_set):
+    if isinstance(keyword_set, str):
+        return keyword_set
+    if isinstance(keyword_set, dict):
+        label = ' '.join(keyword_set.get('palabras', []))
+        neg = keyword_set.get('negativas')
+        return f"{label} -{' -'.join(neg)}" if neg else label
+    return ' '.join(keyword_set)
+
+
+def blocked_top_k(document_vectors, queries, k, block_size=BLOQUE_DOCUMENTOS):
+    """
+    Top-k de documentos para varias consultas, recorriendo los documentos por bloques.
+
+    La memoria de trabajo es bloque × consultas, y la matriz de documentos puede
+    ser un memmap (solo se lee un bloque a la vez).
+
+    Returns:
+        Tupla (índices, scores), ambas de forma (consultas × k), de mayor a menor
+    """
+    num_queries = len(queries)
+    k = min(k, len(document_vectors))
+    best_idx = np.empty((num_queries, 0), dtype=np.int64)
+    best_scores = np.empty((num_queries, 0), dtype=np.float32)
+    if num_queries == 0 or k == 0:
+        return best_idx, best_scores
+
+    queries_t = np.ascontiguousarray(np.asarray(queries, dtype=np.float32).T)
+    for start in range(0, len(document_vectors), block_size):
+        block = np.asarray(document_vectors[start:start + block_size], dtype=np.float32)
+        block_scores = (block @ queries_t).T  # consultas × bloque
+
+        # Candidatos del bloque + mejores acumulados → quedarse con los k mejores
+        kb = min(k, block_scores.shape[1])
+        part = np.argpartition(-block_scores, kb - 1, axis=1)[:, :kb]
+        cand_scores = np.concatenate([best_scores, np.take_along_axis(block_scores, part, axis=1)], axis=1)
+        cand_idx = np.concatenate([best_idx, part + start], axis=1)
+        if cand_scores.shape[1] > k:
+            keep = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+            cand_scores = np.take_along_axis(cand_scores, keep, axis=1)
+            cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+        best_scores, best_idx = cand_scores, cand_idx
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
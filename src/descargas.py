@@ -0,0 +1,93 @@
+"""
+DESCARGAS BAJO DEMANDA
+======================
+
+Los archivos de resultados pueden pesar cientos de MB. `st.download_button`
+necesita los datos al renderizarse, así que leerlos en cada rerun cuesta
+memoria y E/S aunque nadie descargue nada.
+
+Aquí están las piezas sin Streamlit del flujo bajo demanda que usa la app
+(ver app.render_on_demand_download):
+
+- Tamaño y tiempo estimado de descarga a partir de `stat` (sin abrir el archivo).
+- Lectura por bloques con progreso y ETA de lectura, solo cuando el usuario
+  pide preparar la descarga.
+"""
+
+import io
+import time
+from pathlib import Path
+
+# Bytes por bloque al leer un archivo para descargarlo
+BLOQUE_DESCARGA = 8 * 1024 * 1024
+# Velocidad de referencia para estimar el tiempo de descarga (red local / VPN)
+VELOCIDAD_DESCARGA_BYTES = 10 * 1024 * 1024
+
+
+def format_size(num_bytes):
+    """Tamaño legible (KB, MB, GB)"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def format_seconds(seconds):
+    """Duración legible (s o min)"""
+    return f"{seconds:.0f} s" if seconds < 90 else f"{seconds / 60:.1f} min"
+
+
+def file_version(path):
+    """Identifica el contenido de un archivo sin leerlo (ruta, tamaño, mtime)"""
+    stat = Path(path).stat()
+    return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def download_summary(path, bytes_per_second=VELOCIDAD_DESCARGA_BYTES):
+    """Texto con el tamaño del archivo y el tiempo estimado de descarga"""
+    size = Path(path).stat().st_size
+    return f"{format_size(size)} · ~{format_seconds(size / bytes_per_second)} de descarga"
+
+
+def read_in_chunks(path, chunk_size=BLOQUE_DESCARGA, progress=None):
+    """
+    Lee un archivo por bloques sobre un buffer preasignado, sin copias intermedias.
+
+    El buffer es el de un BytesIO del tamaño del archivo: `getvalue()` (lo que
+    hace st.download_button) devuelve ese mismo buffer sin copiarlo, así que
+    preparar una descarga ocupa una vez el tamaño del archivo.
+
+    Args:
+        path: Ruta del archivo
+        chunk_size: Bytes por bloque
+        progress: Función opcional progress(leidos, total, eta_segundos) llamada tras cada bloque
+
+    Returns:
+        io.BytesIO con el contenido del archivo (posición al principio)
+    """
+    total = Path(path).stat().st_size
+    stream = io.BytesIO()
+    if total:
+        # Reserva el buffer completo de una vez (escribir el último byte rellena con ceros)
+        stream.seek(total - 1)
+        stream.write(b'\0')
+    view = stream.getbuffer()
+    start = time.perf_counter()
+    done = 0
+    try:
+        with open(path, 'rb') as f:
+            while done < total:
+                read = f.readinto(view[done:done + chunk_size])
+                if not read:
+                    break
+                done += read
+                if progress is not None:
+                    elapsed = time.perf_counter() - start
+                    eta = elapsed / done * (total - done) if done else 0.0
+                    progress(done, total, eta)
+    finally:
+        view.release()
+    # El archivo pudo encoger mientras se leía
+    stream.truncate(done)
+    stream.seek(0)
+    return stream
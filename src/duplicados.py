@@ -0,0 +1,327 @@
+"""
+DETECCIÓN Y COLAPSO DE CASI-DUPLICADOS
+======================================
+
+Los corpus de noticias económicas están llenos de copias de agencia y
+artículos republicados casi idénticos. Inflan `num_documentos`, distorsionan
+las series temporales y multiplican el tiempo de UMAP y HDBSCAN sin aportar
+información nueva.
+
+Etapa previa a `compute_topics`:
+
+1. Candidatos por LSH (hiperplanos aleatorios sobre los embeddings). Cada
+   tabla usa BITS_LSH bits y, si hay fechas, bloques de DIAS_BLOQUE días (con
+   un desfase de medio bloque en tablas alternas, para no perder las copias
+   que caen a ambos lados de un borde). Solo se comparan documentos de la
+   misma cubeta.
+2. Verificación: similitud coseno exacta de cada par candidato y, si hay
+   textos, Jaccard de shingles de palabras (comprobación rápida sobre las
+   primeras MAX_PALABRAS_SHINGLES palabras, solo para los pares que pasan el
+   coseno).
+3. Grupos: componentes conexas de los pares duplicados, partidas en estrella.
+   Una cadena A~B, B~C, C~D no basta: cada miembro se compara (coseno y, si
+   hay textos, shingles) con el representante, el primer documento del grupo;
+   los que no se le parecen forman grupos nuevos con el mismo criterio. Cada
+   grupo tiene un peso igual al número de copias.
+
+El clustering se ejecuta sobre los representantes y `expand_model` devuelve
+al modelo todos los documentos: los vectores de tópicos se recalculan como
+media de los representantes ponderada por su número de copias (y con ellos
+las palabras de cada tópico) y cada copia hereda el tópico de su
+representante, de modo que vectores, asignaciones, tamaños de tópicos y
+conteos temporales siguen contando cada copia.
+
+Con los valores por defecto (14 bits × 8 tablas) un par con coseno 0.98 se
+detecta con probabilidad ~0.98 y uno con coseno 0.95, con ~0.87.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from artefactos_modelo import compute_topic_top_words
+
+# Similitud coseno mínima entre dos copias
+UMBRAL_COSENO_DUPLICADO = 0.95
+# Jaccard mínimo de shingles de palabras (si hay textos)
+UMBRAL_SHINGLES = 0.5
+# Bits por tabla y número de tablas LSH
+BITS_LSH = 14
+TABLAS_LSH = 8
+# Días por bloque temporal (las copias se publican en fechas cercanas)
+DIAS_BLOQUE = 7
+# Tamaño máximo de una cubeta (las mayores se parten para acotar los pares)
+MAX_CUBETA = 256
+# Palabras por shingle y palabras de cada texto que se comparan
+LONGITUD_SHINGLE = 5
+MAX_PALABRAS_SHINGLES = 300
+# Filas por bloque al recorrer los embeddings y pares por bloque al verificar
+TAMANO_BLOQUE = 50_000
+TAMANO_BLOQUE_PARES = 200_000
+
+
+def lsh_keys(vectors, pub_dates=None, bits=BITS_LSH, tables=TABLAS_LSH, block_days=DIAS_BLOQUE, seed=42,
+             chunk_size=TAMANO_BLOQUE):
+    """
+    Claves LSH (documentos × tablas) y normas de los vectores, en un pase por bloques.
+
+    La clave combina el signo de `bits` proyecciones aleatorias con el bloque
+    temporal del documento (si hay fechas).
+    """
+    num_docs, dim = vectors.shape
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((dim, tables * bits)).astype(np.float32)
+    weights = (1 << np.arange(bits, dtype=np.int64))
+
+    keys = np.empty((num_docs, tables), dtype=np.int64)
+    norms = np.empty(num_docs, dtype=np.float32)
+    for start in range(0, num_docs, chunk_size):
+        batch = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        norms[start:start + chunk_size] = np.linalg.norm(batch, axis=1)
+        signs = (batch @ planes > 0).reshape(len(batch), tables, bits)
+        keys[start:start + chunk_size] = signs @ weights
+
+    if pub_dates is not None:
+        days = pd.to_datetime(pub_dates).values.astype('datetime64[D]').astype(np.int64)
+        offsets = (np.arange(tables) % 2) * (block_days // 2)
+        blocks = (days[:, None] + offsets[None, :]) // block_days
+        keys += (blocks - blocks.min()) << bits
+    return keys, norms
+
+
+def bucket_pairs(keys, max_bucket=MAX_CUBETA):
+    """
+    Pares (i, j) con i < j de documentos con la misma clave.
+
+    Las cubetas de más de `max_bucket` documentos se parten en trozos
+    consecutivos, de modo que el número de pares queda acotado.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.arange(len(keys))
+    bucket_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    bucket_size = np.diff(np.r_[bucket_start, len(keys)])
+    starts = np.repeat(bucket_start, bucket_size)
+    # Sub-cubetas consecutivas de como máximo max_bucket elementos
+    starts = starts + (positions - starts) // max_bucket * max_bucket
+    ends = np.minimum(np.repeat(bucket_start + bucket_size, bucket_size), starts + max_bucket)
+
+    partners = ends - positions - 1
+    total = int(partners.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first = np.repeat(positions, partners)
+    offsets = np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+    second = first + 1 + offsets
+    first, second = order[first], order[second]
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def pair_cosines(vectors, norms, first, second, chunk_size=TAMANO_BLOQUE_PARES):
+    """Similitud coseno de cada par, por bloques de pares"""
+    cosines = np.empty(len(first), dtype=np.float32)
+    for start in range(0, len(first), chunk_size):
+        a = np.asarray(vectors[first[start:start + chunk_size]], dtype=np.float32)
+        b = np.asarray(vectors[second[start:start + chunk_size]], dtype=np.float32)
+        dots = np.einsum('ij,ij->i', a, b)
+        cosines[start:start + chunk_size] = dots / np.maximum(
+            norms[first[start:start + chunk_size]] * norms[second[start:start + chunk_size]], 1e-12)
+    return cosines
+
+
+def shingles(text, k=LONGITUD_SHINGLE, max_words=MAX_PALABRAS_SHINGLES):
+    """Conjunto de hashes de los k-gramas de palabras del principio del texto"""
+    words = str(text).lower().split()[:max_words]
+    if len(words) < k:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i:i + k])) for i in range(len(words) - k + 1)}
+
+
+def shingle_similarity(documents, first, second):
+    """Jaccard de shingles de cada par (los conjuntos se calculan una vez por documento)"""
+    cache = {}
+
+    def get(doc):
+        if doc not in cache:
+            cache[doc] = shingles(documents[doc])
+        return cache[doc]
+
+    similarity = np.empty(len(first), dtype=np.float32)
+    for n, (i, j) in enumerate(zip(first.tolist(), second.tolist())):
+        a, b = get(i), get(j)
+        similarity[n] = len(a & b) / max(len(a | b), 1)
+    return similarity
+
+
+def star_groups(vectors, norms, labels, documents=None, threshold=UMBRAL_COSENO_DUPLICADO,
+                shingle_threshold=UMBRAL_SHINGLES):
+    """
+    Parte las componentes conexas en grupos donde cada miembro es duplicado del representante.
+
+    En cada ronda, el primer documento pendiente de cada componente es el
+    representante y se le asignan los pendientes que se le parecen; el resto
+    pasa a la ronda siguiente. Cada ronda resuelve al menos un documento por
+    componente.
+
+    Returns:
+        Índice del representante de cada documento
+    """
+    representative = np.arange(len(labels))
+    pending = np.flatnonzero(np.bincount(labels)[labels] > 1)
+    while len(pending):
+        # pending está ordenado: la primera aparición de cada componente es su documento más antiguo
+        _, first, inverse = np.unique(labels[pending], return_index=True, return_inverse=True)
+        reps = pending[first][inverse]
+        members = pending != reps
+        keep = ~members
+        keep[members] = pair_cosines(vectors, norms, pending[members], reps[members]) >= threshold
+        check = keep & members
+        if documents is not None and check.any():
+            keep[check] = shingle_similarity(documents, pending[check], reps[check]) >= shingle_threshold
+        representative[pending[keep]] = reps[keep]
+        pending = pending[~keep]
+    return representative
+
+
+def find_near_duplicates(vectors, pub_dates=None, documents=None, threshold=UMBRAL_COSENO_DUPLICADO,
+                         shingle_threshold=UMBRAL_SHINGLES, bits=BITS_LSH, tables=TABLAS_LSH,
+                         block_days=DIAS_BLOQUE, max_bucket=MAX_CUBETA):
+    """
+    Agrupa los casi-duplicados de un corpus.
+
+    Args:
+        vectors: Embeddings de los documentos (array o memmap)
+        pub_dates: Fechas de publicación (opcional: bloques temporales)
+        documents: Textos (opcional: verificación por shingles)
+        threshold: Similitud coseno mínima
+        shingle_threshold: Jaccard mínimo de shingles
+
+    Returns:
+        dict con 'representantes' (índices ordenados del primer documento de
+        cada grupo), 'grupo' (posición en representantes de cada documento),
+        'pesos' (copias de cada representante: ponderan los vectores de
+        tópicos en expand_model) y estadísticas ('num_documentos',
+        'num_representantes', 'ratio', 'pares_candidatos', 'pares_duplicados',
+        'segundos')
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    start = time.time()
+    num_docs = len(vectors)
+    keys, norms = lsh_keys(vectors, pub_dates, bits, tables, block_days)
+
+    found = []
+    num_candidates = 0
+    for table in range(tables):
+        first, second = bucket_pairs(keys[:, table], max_bucket)
+        num_candidates += len(first)
+        keep = pair_cosines(vectors, norms, first, second) >= threshold
+        found.append(first[keep] * num_docs + second[keep])
+
+    # Pares únicos (un mismo par sale en varias tablas); los shingles se comprueban una vez por par
+    pairs = np.unique(np.concatenate(found))
+    first, second = pairs // num_docs, pairs % num_docs
+    if documents is not None and len(first):
+        keep = shingle_similarity(documents, first, second) >= shingle_threshold
+        first, second = first[keep], second[keep]
+
+    graph = sparse.coo_matrix((np.ones(len(first), dtype=np.int8), (first, second)), shape=(num_docs, num_docs))
+    _, labels = connected_components(graph, directed=False)
+
+    # Sin encadenar: cada miembro se parece a su representante (el primer documento del grupo)
+    representative = star_groups(vectors, norms, labels, documents, threshold, shingle_threshold)
+    representatives, group, weights = np.unique(representative, return_inverse=True, return_counts=True)
+
+    return {
+        'representantes': representatives,
+        'grupo': group,
+        'pesos': weights,
+        'num_documentos': int(num_docs),
+        'num_representantes': int(len(representatives)),
+        'ratio': float(1 - len(representatives) / num_docs) if num_docs else 0.0,
+        'pares_candidatos': int(num_candidates),
+        'pares_duplicados': int(len(first)),
+        'segundos': round(time.time() - start, 2)
+    }
+
+
+def weighted_topic_vectors(rep_vectors, rep_top, weights, topic_vectors):
+    """
+    Media normalizada de los representantes de cada tópico, ponderada por su número de copias.
+
+    Es el vector que tendría el tópico si el clustering hubiera visto cada
+    copia (las copias son casi idénticas a su representante). Los tópicos sin
+    representantes conservan su vector.
+    """
+    from scipy import sparse
+
+    num_topics, num_reps = len(topic_vectors), len(rep_top)
+    membership = sparse.csr_matrix((np.asarray(weights, dtype=np.float32), (rep_top, np.arange(num_reps))),
+                                   shape=(num_topics, num_reps))
+    sums = np.asarray(membership @ np.asarray(rep_vectors, dtype=np.float32), dtype=np.float32)
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return np.where(norms > 0, sums / np.maximum(norms, 1e-12), np.asarray(topic_vectors, dtype=np.float32))
+
+
+def expand_model(model, document_vectors, documents, dedup, batch_size=TAMANO_BLOQUE):
+    """
+    Devuelve al modelo entrenado sobre los representantes todos los documentos.
+
+    Los vectores de tópicos se ponderan por copias (weighted_topic_vectors) y
+    las palabras de cada tópico se recalculan con ellos. Cada copia hereda el
+    tópico de su representante (su score es la similitud con el vector del
+    tópico). Los tópicos se reordenan por tamaño con las copias incluidas, como
+    Top2Vec._reorder_topics.
+    """
+    group = dedup['grupo']
+    num_docs = len(group)
+    doc_top = np.asarray(model.doc_top)[group]
+    topic_vectors = weighted_topic_vectors(model.document_vectors, model.doc_top, dedup['pesos'], model.topic_vectors)
+    word_ids, word_scores = compute_topic_top_words(topic_vectors, model.word_vectors, k=model.topic_words.shape[1])
+    doc_dist = np.empty(num_docs, dtype=np.float32)
+    for start in range(0, num_docs, batch_size):
+        batch = np.asarray(document_vectors[start:start + batch_size], dtype=np.float32)
+        doc_dist[start:start + batch_size] = np.einsum('ij,ij->i', batch, topic_vectors[doc_top[start:start + batch_size]])
+
+    sizes = np.bincount(doc_top, minlength=len(topic_vectors))
+    order = np.argsort(-sizes, kind='stable')
+    new_ids = np.empty_like(order)
+    new_ids[order] = np.arange(len(order))
+
+    model.document_vectors = document_vectors
+    model.documents = np.asarray(documents, dtype=object) if documents is not None else None
+    model.num_documents = num_docs
+    model.document_ids = np.array([str(i) for i in range(num_docs)])
+    model.doc_id2index = dict(zip(model.document_ids, range(num_docs)))
+    model.topic_vectors = topic_vectors[order]
+    model.topic_words = np.asarray(model.vocab, dtype=object)[word_ids[order]]
+    model.topic_word_scores = word_scores[order]
+    model.doc_top = new_ids[doc_top]
+    model.doc_dist = doc_dist
+    model.topic_sizes = pd.Series(sizes[order])
+    return model
+
+
+def dedup_report(dedup, clustering_seconds):
+    """
+    Resumen de la etapa para el log y la metadata.
+
+    El ahorro se estima escalando linealmente el tiempo de clustering de los
+    representantes al corpus completo (UMAP crece algo más que linealmente:
+    es una cota inferior), descontando el tiempo de la deduplicación.
+    """
+    scale = dedup['num_documentos'] / max(dedup['num_representantes'], 1)
+    saved = clustering_seconds * (scale - 1) - dedup['segundos']
+    return {
+        'num_documentos': dedup['num_documentos'],
+        'num_representantes': dedup['num_representantes'],
+        'ratio': round(dedup['ratio'], 4),
+        'max_copias': int(dedup['pesos'].max()) if len(dedup['pesos']) else 0,
+        'pares_candidatos': dedup['pares_candidatos'],
+        'pares_duplicados': dedup['pares_duplicados'],
+        'segundos_deduplicacion': dedup['segundos'],
+        'segundos_clustering': round(clustering_seconds, 2),
+        'ahorro_estimado_s': round(saved, 2)
+    }
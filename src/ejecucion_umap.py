@@ -0,0 +1,59 @@
+"""
+MODO DE EJECUCIÓN DE UMAP
+=========================
+
+Con `random_state` fijo, umap-learn optimiza el embedding en un solo hilo
+(es la única forma de que el resultado sea idéntico en cada ejecución): en un
+servidor de 8 núcleos la etapa más larga del entrenamiento deja 7 parados.
+
+Dos modos:
+
+- "reproducible": semilla fija (42) y un hilo. Mismos tópicos en cada
+  ejecución con los mismos datos y parámetros.
+- "rapido": sin semilla y en paralelo (todos los núcleos o `hilos`). Las
+  asignaciones cambian ligeramente entre ejecuciones. La aceleración y la
+  diferencia en las asignaciones (ARI) están pendientes de medir: se obtienen
+  con `python benchmarks.py modos_umap`, que requiere umap y hdbscan.
+
+El modo y los hilos se guardan en la configuración del modelo ('modo_umap',
+'hilos_umap'), de modo que quedan en metadata.json. Las configuraciones sin
+esas claves (modelos anteriores) se interpretan como "reproducible".
+"""
+
+import os
+
+MODOS_UMAP = ('reproducible', 'rapido')
+MODO_UMAP_POR_DEFECTO = 'reproducible'
+SEMILLA_UMAP = 42
+
+
+def umap_mode_args(mode=MODO_UMAP_POR_DEFECTO, n_threads=None):
+    """
+    Argumentos de umap.UMAP que dependen del modo.
+
+    Args:
+        mode: 'reproducible' o 'rapido'
+        n_threads: Hilos en modo rápido (None: todos los núcleos)
+
+    Returns:
+        dict con 'random_state' y 'n_jobs'
+    """
+    if mode not in MODOS_UMAP:
+        raise ValueError(f"❌ Modo de UMAP desconocido: {mode!r} (usa {' o '.join(MODOS_UMAP)})")
+    if mode == 'reproducible':
+        return {'random_state': SEMILLA_UMAP, 'n_jobs': 1}
+    return {'random_state': None, 'n_jobs': int(n_threads) if n_threads else -1}
+
+
+def config_mode_args(config):
+    """umap_mode_args a partir de una configuración guardada (sin las claves: reproducible)"""
+    return umap_mode_args(config.get('modo_umap', MODO_UMAP_POR_DEFECTO), config.get('hilos_umap'))
+
+
+def describe_mode(config):
+    """Texto corto del modo de una configuración, para el log y la UI"""
+    args = config_mode_args(config)
+    if args['random_state'] is not None:
+        return f"reproducible (semilla {args['random_state']}, 1 hilo)"
+    threads = args['n_jobs'] if args['n_jobs'] > 0 else os.cpu_count() or 1
+    return f"rápido (sin semilla, {threads} hilo{'s' if threads != 1 else ''})"
@@ -28,6 +28,12 @@ from gensim.parsing.preprocessing import strip_tags
 
 # Importar configuración
 from configuracion import *
+from huellas_datos import dataset_fingerprint
+from ejecucion_umap import describe_mode, umap_mode_args
+from artefactos_modelo import (
+    compute_representative_documents, compute_topic_top_words, model_fingerprint, save_representative_documents,
+    save_topic_top_words
+)
 
 # =============================================================================
 # FUNCIONES AUXILIARES
@@ -71,6 +77,10 @@ class PrecomputedEmbeddings:
             
             self.documents = df[COLUMNA_TEXTO].astype(str).tolist()
             print(f"   ✅ Textos cargados: {len(self.documents):,}")
+            
+            if len(self.documents) != len(self.embeddings):
+                raise ValueError(f"❌ {csv_file} tiene {len(self.documents):,} filas y "
+                               f"{embeddings_file} tiene {len(self.embeddings):,} embeddings")
         
         self.current_batch_start = 0
     
@@ -105,6 +115,7 @@ def imprimir_configuracion():
     print(f"\n  UMAP:")
     for key, value in UMAP_CONFIG.items():
         print(f"    • {key}: {value}")
+    print(f"    • modo: {describe_mode({'modo_umap': MODO_UMAP, 'hilos_umap': HILOS_UMAP})}")
     print(f"\n  Otros:")
     print(f"    • topic_merge_delta: {TOPIC_MERGE_DELTA}")
     print(f"    • min_count: {MIN_COUNT_PALABRAS}")
@@ -123,6 +134,10 @@ def crear_modelo_top2vec():
     if not os.path.exists(ARCHIVO_NOTICIAS):
         raise FileNotFoundError(f"❌ No se encuentra el archivo: {ARCHIVO_NOTICIAS}")
     
+    # Validar que noticias y embeddings están alineados (rápido: usa huellas cacheadas)
+    huella = dataset_fingerprint(ARCHIVO_NOTICIAS, ARCHIVO_EMBEDDINGS, id_column=COLUMNA_ID)
+    print(f"✅ Datos alineados: {huella['num_filas']:,} filas (huella {huella['huella'][:12]})")
+    
     # Cargar embeddings y textos
     print("\n🔄 PASO 1: Cargando datos...")
     print("-" * 50)
@@ -154,7 +169,7 @@ def crear_modelo_top2vec():
             document_ids=document_ids,
             tokenizer=spanish_friendly_tokenizer if USE_SPANISH_TOKENIZER else None,
             min_count=MIN_COUNT_PALABRAS,
-            umap_args=UMAP_CONFIG,
+            umap_args={**UMAP_CONFIG, **umap_mode_args(MODO_UMAP, HILOS_UMAP)},
             hdbscan_args=HDBSCAN_CONFIG,
             topic_merge_delta=TOPIC_MERGE_DELTA,
             use_embedding_model_tokenizer=USE_EMBEDDING_MODEL_TOKENIZER,
@@ -179,9 +194,12 @@ def crear_modelo_top2vec():
         raise
 
 
-def exportar_resultados(model):
+def exportar_resultados(model, top_palabras):
     """
     Exporta los resultados del modelo a archivos fáciles de leer
+    
+    top_palabras es la tupla (word_ids, scores) con el top-k de palabras
+    de cada tópico, calculada una sola vez con compute_topic_top_words.
     """
     print("\n💾 PASO 3: Exportando resultados...")
     print("-" * 50)
@@ -193,28 +211,29 @@ def exportar_resultados(model):
     num_topics = model.get_num_topics()
     topic_sizes, topic_nums = model.get_topic_sizes()
     
+    # Palabras de todos los tópicos por búsqueda directa en el vocabulario
+    word_ids, word_scores = top_palabras
+    vocab = np.asarray(model.vocab, dtype=object)
+    
     # Crear DataFrame con resumen de tópicos
     resultados = []
     
-    for topic_num in topic_nums:
-        # Obtener palabras y scores del tópico
-        words, word_scores, _ = model.get_topics(topic_nums=[topic_num])
-        
+    for pos, topic_num in enumerate(topic_nums):
         # Tomar solo las N palabras más relevantes
-        top_words = words[0][:NUM_PALABRAS_POR_TOPICO]
-        top_scores = word_scores[0][:NUM_PALABRAS_POR_TOPICO]
+        top_words = vocab[word_ids[topic_num, :NUM_PALABRAS_POR_TOPICO]]
+        top_scores = word_scores[topic_num, :NUM_PALABRAS_POR_TOPICO]
         
         # Crear fila para este tópico
         fila = {
             'topic_id': topic_num,
-            'num_documentos': topic_sizes[topic_nums.tolist().index(topic_num)],
+            'num_documentos': topic_sizes[pos],
             'palabras_clave': ', '.join(top_words),
         }
         
         # Agregar cada palabra y su score como columnas separadas
         for i, (word, score) in enumerate(zip(top_words, top_scores), 1):
             fila[f'palabra_{i}'] = word
-            fila[f'score_palabra_{i}'] = round(score, 4)
+            fila[f'score_palabra_{i}'] = round(float(score), 4)
         
         resultados.append(fila)
     
@@ -270,16 +289,20 @@ def exportar_resultados(model):
     return df_resultados
 
 
-def guardar_modelo(model):
-    """Guarda el modelo entrenado para uso futuro"""
+def guardar_modelo(model, top_palabras, representativos):
+    """Guarda el modelo entrenado (con su top-k de palabras y documentos representativos) para uso futuro"""
     if GUARDAR_MODELO:
         print(f"\n💾 PASO 4: Guardando modelo...")
         print("-" * 50)
         
         os.makedirs(CARPETA_MODELOS, exist_ok=True)
+        os.makedirs(CARPETA_ARTEFACTOS, exist_ok=True)
         ruta_modelo = os.path.join(CARPETA_MODELOS, NOMBRE_MODELO)
+        huella = model_fingerprint(model.topic_vectors, model.doc_top)
         
         model.save(ruta_modelo)
+        save_topic_top_words(CARPETA_ARTEFACTOS, *top_palabras, huella=huella)
+        save_representative_documents(CARPETA_ARTEFACTOS, representativos, huella=huella)
         print(f"✅ Modelo guardado en: {ruta_modelo}")
         print(f"   Podrás reutilizar este modelo sin re-entrenar")
 
@@ -324,11 +347,20 @@ def main():
         # Crear y entrenar modelo
         model, embedding_provider = crear_modelo_top2vec()
         
+        # Top-k de palabras de todos los tópicos (un solo producto matricial)
+        top_palabras = compute_topic_top_words(model.topic_vectors, model.word_vectors)
+        
+        # Documentos representativos de cada tópico (y los mejores de cada mes reciente)
+        representativos = compute_representative_documents(
+            model.doc_top, model.doc_dist, len(model.topic_vectors),
+            embedding_provider.pub_dates, model.documents
+        )
+        
         # Exportar resultados
-        df_resultados = exportar_resultados(model)
+        df_resultados = exportar_resultados(model, top_palabras)
         
         # Guardar modelo
-        guardar_modelo(model)
+        guardar_modelo(model, top_palabras, representativos)
         
         # Resumen final
         imprimir_resumen_final()
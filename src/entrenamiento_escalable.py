@@ -0,0 +1,467 @@
+"""
+ENTRENAMIENTO ESCALABLE (CORPUS MÁS GRANDE QUE LA RAM)
+======================================================
+
+Modo de entrenamiento para corpus de millones de documentos que no caben en
+memoria junto con el espacio de trabajo de UMAP:
+
+1. Los embeddings se extraen una vez del .npz a un .npy sin comprimir y se
+   leen desde disco con memory-mapping (nunca se cargan completos).
+2. UMAP y HDBSCAN se ajustan sobre una muestra estratificada por mes.
+3. El resto de documentos se transforma (UMAP) y se asigna a clusters
+   (HDBSCAN approximate_predict) en lotes de tamaño fijo, en procesos
+   paralelos, acumulando solo sumas por cluster para los vectores de tópicos.
+4. Cada documento se asigna a su tópico más cercano en lotes (igual que
+   Top2Vec), con memoria acotada por el tamaño de lote.
+
+Se informa el tamaño de la muestra, el rendimiento por lote y el pico de RSS.
+"""
+
+import os
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artefactos_modelo import compute_topic_top_words
+from huellas_datos import COLUMNAS_FECHA
+
+# Documentos usados para ajustar UMAP y HDBSCAN
+MUESTRA_AJUSTE = 200_000
+
+# Documentos por lote al transformar y asignar el resto del corpus
+TAMANO_LOTE = 50_000
+
+# Bytes leídos por bloque al cargar embeddings desde el .npz
+BLOQUE_LECTURA_BYTES = 16 * 1024 * 1024
+
+# Estado de cada proceso trabajador (se inicializa una vez por proceso)
+_WORKER = {}
+
+
+def peak_rss_bytes():
+    """Pico de memoria residente (RSS) del proceso actual, en bytes"""
+    if sys.platform == 'win32':
+        import psutil
+        return int(psutil.Process().memory_info().peak_wset)
+    if sys.platform.startswith('linux'):
+        # VmHWM es propio de la imagen del proceso (ru_maxrss hereda el pico del padre tras fork/exec)
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return int(maxrss if sys.platform == 'darwin' else maxrss * 1024)
+
+
+def reset_peak_rss():
+    """
+    Reinicia el pico de RSS del proceso, para medir solo lo que viene después.
+
+    En Linux escribe "5" en /proc/self/clear_refs (reinicia VmHWM al RSS
+    actual). En otros sistemas no es posible: devuelve False y el pico sigue
+    siendo el de toda la vida del proceso.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def as_embedding_buffer(vectors):
+    """
+    Buffer único de embeddings: float32, C-contiguo y de solo lectura.
+
+    No copia si `vectors` ya cumple las tres condiciones. Es el mismo buffer
+    que reciben el modelo, UMAP y el cálculo de tópicos (check_array de UMAP
+    no copia un array float32 contiguo).
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    vectors.setflags(write=False)
+    return vectors
+
+
+def load_embeddings_float32(npz_file, chunk_bytes=BLOQUE_LECTURA_BYTES):
+    """
+    Carga la matriz de embeddings de un .npz directamente como float32.
+
+    Se lee el miembro del zip en bloques de filas sobre un array float32
+    preasignado: un .npz en float64 nunca se materializa completo (pico de
+    1× la matriz float32 más un bloque, en vez de 3×).
+
+    Returns:
+        Buffer de solo lectura (ver as_embedding_buffer)
+    """
+    with zipfile.ZipFile(npz_file) as zf:
+        names = zf.namelist()
+        member = 'embeddings.npy' if 'embeddings.npy' in names else 'document_vectors.npy'
+        if member not in names:
+            raise ValueError(f"No se encontraron embeddings. Claves: {[n[:-4] for n in names]}")
+        with zf.open(member) as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if fortran_order or dtype.hasobject or len(shape) != 2:
+                # Formatos poco comunes: lectura completa y una conversión
+                return as_embedding_buffer(np.load(npz_file)[member[:-4]])
+
+            vectors = np.empty(shape, dtype=np.float32)
+            row_bytes = shape[1] * dtype.itemsize
+            chunk_rows = max(chunk_bytes // row_bytes, 1)
+            for start in range(0, shape[0], chunk_rows):
+                stop = min(start + chunk_rows, shape[0])
+                raw = f.read((stop - start) * row_bytes)
+                vectors[start:stop] = np.frombuffer(raw, dtype=dtype).reshape(stop - start, shape[1])
+    vectors.setflags(write=False)
+    return vectors
+
+
+def select_rows(vectors, indices):
+    """
+    Filas `indices` (ordenados) de un buffer de embeddings, sin copiar si son contiguas.
+
+    Con el CSV ordenado por fecha, un filtro de fechas es un rango de filas y
+    el resultado es una vista del buffer original; si no, se copia una vez.
+    """
+    indices = np.asarray(indices)
+    if len(indices) and indices[-1] - indices[0] + 1 == len(indices):
+        return as_embedding_buffer(vectors[indices[0]:indices[-1] + 1])
+    return as_embedding_buffer(vectors[indices])
+
+
+def extract_embeddings_npy(embeddings_file, huella):
+    """
+    Extrae la matriz de embeddings del .npz a un .npy sin comprimir (una vez por huella).
+
+    La copia se hace en streaming desde el zip, sin cargar la matriz en memoria.
+
+    Returns:
+        Ruta del .npy, listo para np.load(..., mmap_mode='r')
+    """
+    embeddings_file = Path(embeddings_file)
+    target = embeddings_file.with_name(f"{embeddings_file.stem}.{huella[:12]}.npy")
+    if target.exists():
+        return target
+
+    tmp = target.with_name(target.name + '.tmp')
+    with zipfile.ZipFile(embeddings_file) as zf:
+        names = zf.namelist()
+        member = 'embeddings.npy' if 'embeddings.npy' in names else 'document_vectors.npy'
+        with zf.open(member) as src, open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 16 * 1024 * 1024)
+    os.replace(tmp, target)
+    return target
+
+
+def load_doc_ids(csv_file, num_docs):
+    """doc_id de cada fila del CSV (solo se lee esa columna); la posición de la fila si no existe"""
+    if 'doc_id' not in pd.read_csv(csv_file, nrows=0).columns:
+        return np.arange(num_docs)
+    return pd.read_csv(csv_file, usecols=['doc_id'])['doc_id'].values
+
+
+def load_pub_dates(csv_file):
+    """
+    Fechas de publicación del CSV (solo se lee esa columna).
+
+    La columna se elige como en huellas_datos (la primera de COLUMNAS_FECHA que
+    exista); las fechas que no se pueden interpretar quedan como NaT.
+    """
+    columns = pd.read_csv(csv_file, nrows=0).columns
+    date_column = next((c for c in COLUMNAS_FECHA if c in columns), None)
+    if date_column is None:
+        raise ValueError(f"❌ {csv_file} no tiene columna de fecha ({' o '.join(COLUMNAS_FECHA)})")
+    return pd.to_datetime(pd.read_csv(csv_file, usecols=[date_column])[date_column], errors='coerce').values
+
+
+def stratified_sample(pub_dates, sample_size, seed=42):
+    """
+    Muestra estratificada por mes de publicación, con asignación proporcional.
+
+    Los documentos sin fecha (NaT) no entran en la muestra: no tienen mes y
+    formarían un estrato ficticio. Siguen en el corpus y se asignan a tópicos
+    con el resto.
+
+    Returns:
+        Índices ordenados de los documentos de la muestra
+    """
+    num_docs = len(pub_dates)
+    if sample_size >= num_docs:
+        return np.arange(num_docs)
+
+    dated = ~pd.isna(pub_dates)
+    if not dated.all():
+        dated_idx = np.flatnonzero(dated)
+        return dated_idx[stratified_sample(np.asarray(pub_dates)[dated_idx], sample_size, seed)]
+
+    months = pd.to_datetime(pub_dates).to_period('M').asi8
+    _, strata = np.unique(months, return_inverse=True)
+    strata_sizes = np.bincount(strata)
+    quotas = np.maximum(np.round(strata_sizes * sample_size / num_docs), 1).astype(np.int64)
+
+    # Rango aleatorio dentro de cada estrato: se toman los primeros `cuota` de cada uno
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(num_docs), strata))
+    starts = np.concatenate([[0], np.cumsum(strata_sizes)[:-1]])
+    rank = np.empty(num_docs, dtype=np.int64)
+    rank[order] = np.arange(num_docs) - np.repeat(starts, strata_sizes)
+
+    return np.flatnonzero(rank < quotas[strata])
+
+
+def cluster_sums(vectors, labels, num_labels):
+    """Suma de vectores y número de documentos por cluster (ignora el ruido -1)"""
+    from scipy import sparse
+    mask = labels >= 0
+    rows = np.flatnonzero(mask)
+    onehot = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (labels[mask], rows)),
+        shape=(num_labels, len(labels))
+    )
+    sums = np.asarray(onehot @ vectors, dtype=np.float64)
+    counts = np.bincount(labels[mask], minlength=num_labels)
+    return sums, counts
+
+
+def _init_worker(npy_path, umap_model, clusterer, in_sample, num_labels):
+    """Carga una vez por proceso el mmap de embeddings y los modelos ajustados"""
+    _WORKER['vectors'] = np.load(npy_path, mmap_mode='r')
+    _WORKER['umap'] = umap_model
+    _WORKER['clusterer'] = clusterer
+    _WORKER['in_sample'] = in_sample
+    _WORKER['num_labels'] = num_labels
+
+
+def _label_batch(start, end):
+    """Transforma y asigna a clusters un lote de documentos fuera de la muestra"""
+    import hdbscan
+    keep = ~_WORKER['in_sample'][start:end]
+    batch = np.asarray(_WORKER['vectors'][start:end][keep], dtype=np.float32)
+    num_labels = _WORKER['num_labels']
+
+    if len(batch) == 0:
+        sums, counts = np.zeros((num_labels, _WORKER['vectors'].shape[1])), np.zeros(num_labels, dtype=np.int64)
+    else:
+        reduced = _WORKER['umap'].transform(batch)
+        labels, _ = hdbscan.approximate_predict(_WORKER['clusterer'], reduced)
+        sums, counts = cluster_sums(batch, labels, num_labels)
+
+    return end - start, sums, counts, peak_rss_bytes()
+
+
+def deduplicate_topic_vectors(topic_vectors, topic_merge_delta):
+    """Fusiona vectores de tópicos casi idénticos (mismo criterio que Top2Vec)"""
+    from sklearn.cluster import dbscan
+    _, labels = dbscan(X=topic_vectors, eps=topic_merge_delta, min_samples=2, metric="cosine")
+    unique = [topic_vectors[labels == -1]]
+    for label in sorted(set(labels) - {-1}):
+        merged = topic_vectors[labels == label].mean(axis=0)
+        unique.append((merged / np.linalg.norm(merged))[None, :])
+    return np.vstack(unique)
+
+
+def assign_documents(vectors, topic_vectors, batch_size):
+    """Tópico más cercano y su score para cada documento, en lotes"""
+    num_docs = len(vectors)
+    doc_top = np.empty(num_docs, dtype=np.int64)
+    doc_dist = np.empty(num_docs, dtype=np.float32)
+    topic_vectors = topic_vectors.astype(np.float32)
+    for start in range(0, num_docs, batch_size):
+        res = np.asarray(vectors[start:start + batch_size], dtype=np.float32) @ topic_vectors.T
+        doc_top[start:start + batch_size] = np.argmax(res, axis=1)
+        doc_dist[start:start + batch_size] = np.max(res, axis=1)
+    return doc_top, doc_dist
+
+
+def new_precomputed_model(document_vectors, word_vectors, vocab, word_indexes, documents=None, model_class=None):
+    """
+    Modelo Top2Vec vacío con los embeddings precalculados asignados (sin tópicos).
+
+    Es el método del notebook: Top2Vec.__new__ y asignación de atributos.
+    `document_vectors` se asigna tal cual (el buffer float32 compartido, sin
+    copia). `model_class` permite sustituir Top2Vec (benchmarks.py).
+    """
+    if model_class is None:
+        from top2vec import Top2Vec as model_class
+    model = model_class.__new__(model_class)
+
+    num_docs = len(document_vectors)
+    model.documents = np.asarray(documents, dtype=object) if documents is not None else None
+    model.num_documents = num_docs
+    model.document_ids = np.array([str(i) for i in range(num_docs)])
+    model.doc_id2index = dict(zip(model.document_ids, range(num_docs)))
+    model.doc_id_type = np.str_
+    model.document_ids_provided = False
+
+    model.document_vectors = document_vectors
+    model.word_vectors = word_vectors
+    model.vocab = vocab
+    model.word_indexes = word_indexes
+    model.embedding_model = 'precomputed'
+
+    model.topic_index = None
+    model.serialized_topic_index = None
+    model.topics_indexed = False
+    model.document_index = None
+    model.serialized_document_index = None
+    model.documents_indexed = False
+    model.index_id2doc_id = None
+    model.doc_id2index_id = None
+    model.word_index = None
+    model.serialized_word_index = None
+    model.words_indexed = False
+    model.contextual_top2vec = False
+    model.verbose = False
+    return model
+
+
+def build_model(document_vectors, word_vectors, vocab, word_indexes, topic_vectors, doc_top, doc_dist):
+    """Crea el modelo Top2Vec a partir de los resultados (mismo método que app.train_model)"""
+    # Los textos no se cargan en este modo
+    model = new_precomputed_model(document_vectors, word_vectors, vocab, word_indexes)
+
+    # Tópicos ordenados por tamaño descendente (como Top2Vec._reorder_topics)
+    topic_sizes = pd.Series(doc_top).value_counts()
+    old2new = np.zeros(len(topic_vectors), dtype=np.int64)
+    old2new[topic_sizes.index.values] = np.arange(len(topic_sizes))
+    model.topic_vectors = topic_vectors[topic_sizes.index.values]
+    model.doc_top = old2new[doc_top]
+    model.doc_dist = doc_dist
+    model.topic_sizes = topic_sizes.reset_index(drop=True)
+
+    word_ids, scores = compute_topic_top_words(model.topic_vectors, word_vectors)
+    model.topic_words = np.asarray(vocab, dtype=object)[word_ids]
+    model.topic_word_scores = scores
+
+    model.topic_vectors_reduced = None
+    model.doc_top_reduced = None
+    model.doc_dist_reduced = None
+    model.topic_sizes_reduced = None
+    model.topic_words_reduced = None
+    model.topic_word_scores_reduced = None
+    model.hierarchy = None
+
+    return model
+
+
+def train_scalable(embeddings_file, csv_file, huella, umap_args, hdbscan_args, topic_merge_delta,
+                   sample_size=MUESTRA_AJUSTE, batch_size=TAMANO_LOTE, n_workers=None,
+                   progress_callback=None):
+    """
+    Entrena un modelo ajustando sobre una muestra y asignando el resto en lotes.
+
+    Args:
+        embeddings_file: Archivo .npz con embeddings (y word_vectors/vocab)
+        csv_file: CSV de noticias (solo se lee la columna de fechas)
+        huella: Huella de los datos (para cachear el .npy extraído)
+        umap_args, hdbscan_args, topic_merge_delta: Parámetros del modelo
+        sample_size: Documentos de la muestra de ajuste
+        batch_size: Documentos por lote
+        n_workers: Procesos paralelos (por defecto, núcleos - 1)
+        progress_callback: Función opcional (fracción 0-1, mensaje)
+
+    Returns:
+        Tupla (model, pub_dates, informe)
+    """
+    import hdbscan
+    import umap
+
+    def report_progress(fraction, message):
+        if progress_callback is not None:
+            progress_callback(fraction, message)
+
+    n_workers = n_workers or max((os.cpu_count() or 2) - 1, 1)
+
+    # 1. Embeddings desde disco (memory-mapped) y fechas
+    report_progress(0.0, "Preparando embeddings en disco...")
+    npy_path = extract_embeddings_npy(embeddings_file, huella)
+    vectors = np.load(npy_path, mmap_mode='r')
+    num_docs = len(vectors)
+
+    pub_dates = load_pub_dates(csv_file)
+    with np.load(embeddings_file, allow_pickle=True) as data:
+        word_vectors = data['word_vectors']
+        vocab = data['vocab'].tolist()
+        word_indexes = data['word_indexes'].item()
+
+    # 2. Ajuste de UMAP + HDBSCAN sobre la muestra estratificada
+    report_progress(0.1, "Ajustando UMAP y HDBSCAN sobre la muestra...")
+    fit_start = time.time()
+    sample_idx = stratified_sample(pub_dates, sample_size)
+    sample = np.asarray(vectors[sample_idx], dtype=np.float32)
+
+    umap_model = umap.UMAP(**umap_args).fit(sample)
+    clusterer = hdbscan.HDBSCAN(**hdbscan_args, prediction_data=True).fit(umap_model.embedding_)
+    num_labels = int(clusterer.labels_.max()) + 1
+    if num_labels == 0:
+        raise ValueError("❌ HDBSCAN no encontró clusters en la muestra. Prueba con un min_cluster_size menor.")
+
+    sums, counts = cluster_sums(sample, clusterer.labels_, num_labels)
+    del sample
+    fit_time = time.time() - fit_start
+
+    # 3. Transformar y asignar a clusters el resto, en lotes y en paralelo
+    in_sample = np.zeros(num_docs, dtype=bool)
+    in_sample[sample_idx] = True
+    batches = [(start, min(start + batch_size, num_docs)) for start in range(0, num_docs, batch_size)]
+
+    transform_start = time.time()
+    worker_peak = 0
+    done = 0
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(str(npy_path), umap_model, clusterer, in_sample, num_labels)) as pool:
+        futures = [pool.submit(_label_batch, start, end) for start, end in batches]
+        for future in as_completed(futures):
+            batch_docs, batch_sums, batch_counts, batch_peak = future.result()
+            sums += batch_sums
+            counts += batch_counts
+            worker_peak = max(worker_peak, batch_peak)
+            done += 1
+            report_progress(0.2 + 0.6 * done / len(batches), f"Lotes transformados: {done}/{len(batches)}")
+    transform_time = time.time() - transform_start
+
+    # Vectores de tópicos = media normalizada de los documentos de cada cluster
+    topic_vectors = sums[counts > 0] / counts[counts > 0, None]
+    topic_vectors /= np.linalg.norm(topic_vectors, axis=1, keepdims=True)
+    topic_vectors = deduplicate_topic_vectors(topic_vectors, topic_merge_delta)
+
+    # 4. Asignar cada documento a su tópico más cercano
+    report_progress(0.85, "Asignando documentos a tópicos...")
+    assign_start = time.time()
+    doc_top, doc_dist = assign_documents(vectors, topic_vectors, batch_size)
+    assign_time = time.time() - assign_start
+
+    model = build_model(vectors, word_vectors, vocab, word_indexes, topic_vectors, doc_top, doc_dist)
+    report_progress(1.0, "Entrenamiento escalable completado")
+
+    informe = {
+        'num_documentos': int(num_docs),
+        'documentos_sin_fecha': int(pd.isna(pub_dates).sum()),
+        'muestra_ajuste': int(len(sample_idx)),
+        'tamano_lote': int(batch_size),
+        'num_lotes': len(batches),
+        'procesos': int(n_workers),
+        'tiempo_ajuste_s': round(fit_time, 2),
+        'tiempo_transformacion_s': round(transform_time, 2),
+        'tiempo_asignacion_s': round(assign_time, 2),
+        'docs_por_segundo_transformacion': round((num_docs - len(sample_idx)) / max(transform_time, 1e-9), 1),
+        'pico_rss_mb': round(peak_rss_bytes() / 1024**2, 1),
+        'pico_rss_procesos_mb': round(worker_peak / 1024**2, 1)
+    }
+    return model, pub_dates, informe
@@ -0,0 +1,226 @@
+"""
+ESTABILIDAD DE TÓPICOS (REMUESTREO)
+===================================
+
+¿Un tópico es robusto o un artefacto de `random_state=42` y del preset?
+
+Se repite la reducción (UMAP) y el clustering (HDBSCAN) sobre K submuestras
+de documentos, cada una con otra semilla, en procesos paralelos que comparten
+la matriz de embeddings en modo solo lectura (memory-mapping). Cada ejecución
+se compara con el modelo original:
+
+- Estabilidad por tópico: similitud coseno media del tópico original con su
+  tópico más parecido en cada ejecución, y fracción de ejecuciones en que
+  esa similitud supera UMBRAL_ESTABILIDAD.
+- ARI global: adjusted Rand index entre las asignaciones del modelo y las de
+  cada ejecución, sobre los documentos de la submuestra.
+
+El resultado se guarda en `metadata.json` (clave 'estabilidad') y el
+explorador lo muestra como una insignia junto a cada tópico.
+
+Uso desde la línea de comandos:
+    python estabilidad_topicos.py modelos/<nombre> --ejecuciones 5
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from ejecucion_umap import config_mode_args
+
+NUM_EJECUCIONES = 5
+FRACCION_MUESTRA = 0.8
+# Tope de documentos por ejecución (UMAP escala mal con millones de documentos)
+MAX_DOCUMENTOS_ESTABILIDAD = 100_000
+# Similitud mínima para considerar que un tópico "reaparece" en una ejecución
+UMBRAL_ESTABILIDAD = 0.8
+
+# Estado de cada proceso trabajador
+_WORKER = {}
+
+
+def model_args(config):
+    """Argumentos de UMAP y HDBSCAN a partir de la configuración guardada (igual que app.train_model)"""
+    umap_args = {
+        'n_neighbors': config['n_neighbors'],
+        'n_components': config['n_components'],
+        'metric': 'cosine',
+        **config_mode_args(config)
+    }
+    hdbscan_args = {
+        'min_cluster_size': config['min_cluster_size'],
+        'min_samples': config['min_samples'],
+        'metric': 'euclidean',
+        'cluster_selection_method': 'eom'
+    }
+    return umap_args, hdbscan_args
+
+
+def _init_worker(npy_path, umap_args, hdbscan_args):
+    _WORKER['vectors'] = np.load(npy_path, mmap_mode='r')
+    _WORKER['umap_args'] = umap_args
+    _WORKER['hdbscan_args'] = hdbscan_args
+
+
+def _run_once(seed, sample_size):
+    """Una ejecución: submuestra + UMAP + HDBSCAN con otra semilla"""
+    import hdbscan
+    import umap
+
+    vectors = _WORKER['vectors']
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(vectors), size=sample_size, replace=False))
+    sample = np.asarray(vectors[idx], dtype=np.float32)
+
+    # Cada ejecución con su semilla (un hilo: el paralelismo está en los procesos)
+    reduced = umap.UMAP(**{**_WORKER['umap_args'], 'random_state': int(seed), 'n_jobs': 1}).fit_transform(sample)
+    labels = hdbscan.HDBSCAN(**_WORKER['hdbscan_args']).fit(reduced).labels_
+
+    # Vectores de tópicos en el espacio original (media normalizada de cada cluster)
+    num_labels = labels.max() + 1
+    topic_vectors = np.zeros((max(num_labels, 0), sample.shape[1]), dtype=np.float32)
+    np.add.at(topic_vectors, labels[labels >= 0], sample[labels >= 0])
+    topic_vectors /= np.maximum(np.linalg.norm(topic_vectors, axis=1, keepdims=True), 1e-12)
+    return idx, topic_vectors
+
+
+def evaluate_topic_stability(document_vectors, topic_vectors, doc_top, config, num_runs=NUM_EJECUCIONES,
+                             sample_fraction=FRACCION_MUESTRA, max_docs=MAX_DOCUMENTOS_ESTABILIDAD,
+                             n_workers=None, seed=0):
+    """
+    Evalúa la estabilidad de los tópicos de un modelo con K ejecuciones en paralelo.
+
+    Args:
+        document_vectors: Embeddings de los documentos (array o memmap)
+        topic_vectors: Vectores de tópicos del modelo
+        doc_top: Tópico asignado a cada documento por el modelo
+        config: Configuración del modelo (min_cluster_size, n_neighbors, ...)
+        num_runs: Número de ejecuciones (semillas)
+        sample_fraction: Fracción de documentos por ejecución
+        max_docs: Máximo de documentos por ejecución
+        n_workers: Procesos paralelos (por defecto, min(ejecuciones, núcleos - 1))
+        seed: Semilla base
+
+    Returns:
+        dict serializable a JSON con la estabilidad por tópico y el ARI
+    """
+    from sklearn.metrics import adjusted_rand_score
+
+    start = time.time()
+    num_docs = len(document_vectors)
+    sample_size = int(min(max(sample_fraction * num_docs, 1), max_docs, num_docs))
+    n_workers = n_workers or max(min(num_runs, (os.cpu_count() or 2) - 1), 1)
+    umap_args, hdbscan_args = model_args(config)
+
+    topics = np.asarray(topic_vectors, dtype=np.float32)
+    topics = topics / np.linalg.norm(topics, axis=1, keepdims=True)
+    doc_top = np.asarray(doc_top)
+
+    # Matriz de embeddings compartida por los procesos en modo solo lectura
+    tmp_dir = None
+    npy_path = getattr(document_vectors, 'filename', None)
+    if npy_path is None or not str(npy_path).endswith('.npy'):
+        tmp_dir = tempfile.TemporaryDirectory()
+        npy_path = os.path.join(tmp_dir.name, 'embeddings.npy')
+        np.save(npy_path, np.asarray(document_vectors))
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(str(npy_path), umap_args, hdbscan_args)) as pool:
+            seeds = [seed + 1000 * (i + 1) for i in range(num_runs)]
+            runs = list(pool.map(_run_once, seeds, [sample_size] * num_runs))
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    best_similarity = np.zeros((num_runs, len(topics)), dtype=np.float32)
+    ari = []
+    num_topics_runs = []
+    for r, (idx, run_topics) in enumerate(runs):
+        num_topics_runs.append(len(run_topics))
+        if len(run_topics) == 0:
+            ari.append(0.0)
+            continue
+        best_similarity[r] = (topics @ run_topics.T).max(axis=1)
+
+        # Cada documento de la submuestra a su tópico más cercano de la ejecución (como Top2Vec)
+        run_doc_top = np.empty(len(idx), dtype=np.int64)
+        for block in range(0, len(idx), 50_000):
+            chunk = np.asarray(document_vectors[idx[block:block + 50_000]], dtype=np.float32)
+            run_doc_top[block:block + 50_000] = np.argmax(chunk @ run_topics.T, axis=1)
+        ari.append(float(adjusted_rand_score(doc_top[idx], run_doc_top)))
+
+    return {
+        'num_ejecuciones': num_runs,
+        'documentos_por_ejecucion': sample_size,
+        'umbral': UMBRAL_ESTABILIDAD,
+        'ari_medio': round(float(np.mean(ari)), 4),
+        'ari_por_ejecucion': [round(a, 4) for a in ari],
+        'topicos_por_ejecucion': num_topics_runs,
+        'similitud_media': np.round(best_similarity.mean(axis=0).astype(float), 4).tolist(),
+        'fraccion_reaparece': np.round((best_similarity >= UMBRAL_ESTABILIDAD).mean(axis=0), 4).tolist(),
+        'tiempo_segundos': round(time.time() - start, 1)
+    }
+
+
+def save_stability(model_dir, stability):
+    """Guarda el resultado en metadata.json (clave 'estabilidad'), conservando el resto"""
+    metadata_path = Path(model_dir) / 'metadata.json'
+    metadata = {}
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    metadata['estabilidad'] = stability
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return metadata_path
+
+
+def stability_badge(stability, topic_num):
+    """Texto de la insignia de estabilidad de un tópico (None si no hay evaluación)"""
+    if not stability or topic_num >= len(stability['similitud_media']):
+        return None
+    similarity = stability['similitud_media'][topic_num]
+    share = stability['fraccion_reaparece'][topic_num]
+    if share >= 0.8:
+        label = "🟢 Estable"
+    elif share >= 0.5:
+        label = "🟡 Moderadamente estable"
+    else:
+        label = "🔴 Inestable"
+    return (f"{label} · reaparece en {share:.0%} de {stability['num_ejecuciones']} ejecuciones "
+            f"(similitud media {similarity:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evalúa la estabilidad de los tópicos de un modelo guardado")
+    parser.add_argument('modelo', help="Carpeta del modelo (modelos/<nombre>)")
+    parser.add_argument('--ejecuciones', type=int, default=NUM_EJECUCIONES)
+    parser.add_argument('--fraccion', type=float, default=FRACCION_MUESTRA)
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+
+    from top2vec import Top2Vec
+
+    model_dir = Path(args.modelo)
+    with open(model_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)['config']
+    model = Top2Vec.load(str(model_dir / 'modelo.model'))
+
+    stability = evaluate_topic_stability(
+        model.document_vectors, model.topic_vectors, model.doc_top, config,
+        num_runs=args.ejecuciones, sample_fraction=args.fraccion, n_workers=args.procesos
+    )
+    save_stability(model_dir, stability)
+    print(f"✅ ARI medio: {stability['ari_medio']:.3f} "
+          f"({stability['num_ejecuciones']} ejecuciones, {stability['tiempo_segundos']:.0f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+EXPORTACIÓN EN SEGUNDO PLANO
+============================
+
+Tras el clustering, el modelo ya está en memoria y el explorador puede usarlo.
+Guardar el modelo y exportar resultados (modelo.model, artefactos, Parquet,
+hojas del Excel) se hace en hilos de fondo, en paralelo entre sí:
+
+    job = start_export('mi_modelo')
+    job.submit('modelo', save_model, ...)
+    job.submit('parquet', export_assignments_parquet, ...)
+    job.submit('excel', write_excel, after=['hoja_resumen', 'hoja_temporal'])
+
+Cada tarea puede depender de otras (`after`): espera sus resultados y los
+recibe como argumentos con nombre. El estado de cada tarea se consulta con
+`job.status()`; los trabajos se guardan en EXPORT_JOBS por nombre de modelo,
+de modo que sobreviven a los reruns de Streamlit.
+
+Las tareas no deben llamar a funciones de Streamlit (no tienen contexto de
+ejecución del script): solo escriben archivos.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos por trabajo de exportación (las tareas de pyarrow y la E/S liberan el GIL)
+HILOS_EXPORTACION = 4
+
+
+class ExportJob:
+    """Conjunto de tareas de guardado/exportación de un modelo, ejecutadas en hilos de fondo"""
+
+    def __init__(self, name, max_workers=HILOS_EXPORTACION):
+        self.name = name
+        self.started = time.time()
+        self.executor = ThreadPoolExecutor(max_workers=max(max_workers, 2), thread_name_prefix='exportacion')
+        self.futures = {}
+        self.times = {}
+        self.lock = threading.Lock()
+
+    def submit(self, task, func, *args, after=(), **kwargs):
+        """
+        Lanza `func(*args, **kwargs)` como tarea `task`.
+
+        Las tareas de `after` deben haberse lanzado antes; su resultado se pasa
+        como argumento con nombre (`<tarea>=resultado`). Si alguna falla, esta
+        tarea falla con el mismo error.
+        """
+        dependencies = {name: self.futures[name] for name in after}
+
+        def run():
+            results = {name: future.result() for name, future in dependencies.items()}
+            with self.lock:
+                self.times[task] = [time.time(), None]
+            try:
+                return func(*args, **kwargs, **results)
+            finally:
+                with self.lock:
+                    self.times[task][1] = time.time()
+
+        self.futures[task] = self.executor.submit(run)
+        return self.futures[task]
+
+    def finish(self):
+        """No se lanzarán más tareas: los hilos terminan al completar las pendientes"""
+        self.executor.shutdown(wait=False)
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def running(self, task):
+        """True si la tarea existe y aún no terminó (pendiente o en curso)"""
+        future = self.futures.get(task)
+        return future is not None and not future.done()
+
+    def result(self, task):
+        """Resultado de una tarea completada (None si no terminó o falló)"""
+        future = self.futures.get(task)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def status(self):
+        """Estado de cada tarea: pendiente, en curso, completada o error (con su duración)"""
+        rows = []
+        now = time.time()
+        with self.lock:
+            times = {task: list(value) for task, value in self.times.items()}
+        for task, future in self.futures.items():
+            start, end = times.get(task, (None, None))
+            if future.done():
+                error = future.exception()
+                state = 'error' if error is not None else 'completada'
+            else:
+                error = None
+                state = 'en curso' if start is not None else 'pendiente'
+            rows.append({
+                'tarea': task,
+                'estado': state,
+                'segundos': round((end or now) - start, 1) if start is not None else None,
+                'error': str(error) if error is not None else None
+            })
+        return rows
+
+
+# Trabajos por nombre de modelo (a nivel de módulo: persisten entre reruns)
+EXPORT_JOBS = {}
+
+
+def start_export(name, max_workers=HILOS_EXPORTACION):
+    """Crea el trabajo de exportación de un modelo (reemplaza al anterior con el mismo nombre)"""
+    job = ExportJob(name, max_workers=max_workers)
+    EXPORT_JOBS[name] = job
+    return job
+
+
+def get_export(name):
+    """Trabajo de exportación de un modelo (None si no hubo ninguno en esta sesión del servidor)"""
+    return EXPORT_JOBS.get(name)
@@ -0,0 +1,164 @@
+"""
+EXPORTACIÓN A PARQUET PARTICIONADA POR AÑO
+==========================================
+
+Escribe la asignación documento → tópico de un modelo como un dataset Parquet
+particionado por año (estilo Hive), listo para pipelines econométricos:
+
+    modelos/<nombre>/asignaciones/
+        _topicos.parquet              # tópico → palabra clave principal y palabras clave
+        _sin_fecha.parquet            # documentos sin fecha (NaT), si los hay
+        anio=2019/parte-0.parquet
+        anio=2020/parte-0.parquet
+        ...
+
+Columnas por documento: doc_id (el del CSV de noticias, para unir con
+noticias.csv), topico, score_topico, fecha, palabra_clave_id (id en el
+vocabulario de la palabra clave principal del tópico).
+
+Los documentos sin fecha no tienen año: van a `_sin_fecha.parquet`, con las
+mismas columnas, fuera de las particiones (los archivos con "_" inicial se
+ignoran al leer el dataset, y `anio` sigue siendo entero).
+
+Cada año se escribe en paralelo y comprimido (zstd). Para leer un solo año:
+
+    pd.read_parquet('modelos/<nombre>/asignaciones', filters=[('anio', '=', 2020)])
+
+Uso desde la línea de comandos (modelos ya entrenados):
+
+    python exportar_parquet.py modelos/<nombre>
+"""
+
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CARPETA_PARQUET = 'asignaciones'
+COMPRESION_PARQUET = 'zstd'
+
+
+def topic_keyword_ids(word_ids, vocab_map):
+    """
+    Id en el vocabulario de la palabra clave principal de cada tópico.
+
+    Es la primera palabra del top-k que la limpieza no descarta (-1 si no hay).
+    """
+    keep = ~vocab_map['drop'][word_ids]
+    first = np.argmax(keep, axis=1)
+    ids = word_ids[np.arange(len(word_ids)), first].astype(np.int32)
+    ids[~keep.any(axis=1)] = -1
+    return ids
+
+
+def _write_partition(output_dir, year, table, compression):
+    import pyarrow.parquet as pq
+
+    partition_dir = output_dir / f'anio={year}'
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    path = partition_dir / 'parte-0.parquet'
+    pq.write_table(table, path, compression=compression)
+    return path
+
+
+def export_assignments_parquet(model_dir, doc_top, doc_dist, pub_dates, keyword_ids, topic_keywords=None,
+                               doc_ids=None, compression=COMPRESION_PARQUET, max_workers=None):
+    """
+    Exporta las asignaciones documento → tópico a Parquet, una partición por año.
+
+    Args:
+        model_dir: Carpeta del modelo (el dataset se escribe en su subcarpeta 'asignaciones')
+        doc_top, doc_dist: Tópico asignado y score de cada documento (model.doc_top / doc_dist)
+        pub_dates: Fechas de publicación (pub_dates.npy)
+        keyword_ids: Id de la palabra clave principal de cada tópico (ver topic_keyword_ids)
+        topic_keywords: Palabras clave de cada tópico como texto (opcional, para _topicos.parquet)
+        doc_ids: doc_id del CSV de cada documento (doc_ids.npy; sin ellos, la posición de la fila)
+        compression: Códec de compresión Parquet
+        max_workers: Hilos de escritura (pyarrow libera el GIL al comprimir)
+
+    Returns:
+        Ruta de la carpeta del dataset
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output_dir = Path(model_dir) / CARPETA_PARQUET
+    # Reescritura completa: evita particiones obsoletas de una exportación anterior
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True)
+
+    doc_top = np.asarray(doc_top)
+    fechas = pd.to_datetime(pub_dates).values.astype('datetime64[ms]')
+    years = fechas.astype('datetime64[Y]').astype(np.int64) + 1970
+    # NaT no tiene año (astype daría int64 mínimo + 1970): esas filas se escriben aparte
+    dated = ~np.isnat(fechas)
+
+    # Agrupar documentos por año con un solo ordenamiento estable
+    order = np.flatnonzero(dated)[np.argsort(years[dated], kind='stable')]
+    unique_years, starts = np.unique(years[order], return_index=True)
+    bounds = np.append(starts, len(order))
+
+    doc_ids = np.arange(len(doc_top), dtype=np.int64) if doc_ids is None else np.asarray(doc_ids)
+    if doc_ids.dtype == object:
+        doc_ids = doc_ids.astype(str)
+
+    columns = {
+        'doc_id': doc_ids,
+        'topico': doc_top.astype(np.int32),
+        'score_topico': np.asarray(doc_dist, dtype=np.float32),
+        'fecha': fechas,
+        'palabra_clave_id': np.asarray(keyword_ids, dtype=np.int32)[doc_top]
+    }
+
+    def write_year(i):
+        rows = order[bounds[i]:bounds[i + 1]]
+        table = pa.table({name: values[rows] for name, values in columns.items()})
+        return _write_partition(output_dir, int(unique_years[i]), table, compression)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(write_year, range(len(unique_years))))
+
+    undated = np.flatnonzero(~dated)
+    if len(undated):
+        pq.write_table(pa.table({name: values[undated] for name, values in columns.items()}),
+                       output_dir / '_sin_fecha.parquet', compression=compression)
+
+    # Tabla de tópicos (los archivos con "_" inicial se ignoran al leer el dataset)
+    topics = {'topico': np.arange(len(keyword_ids), dtype=np.int32),
+              'palabra_clave_id': np.asarray(keyword_ids, dtype=np.int32)}
+    if topic_keywords is not None:
+        topics['palabras_clave'] = list(topic_keywords)
+    pq.write_table(pa.table(topics), output_dir / '_topicos.parquet', compression=compression)
+
+    return output_dir
+
+
+def export_model_dir(model_dir):
+    """Exporta a Parquet un modelo ya guardado en disco"""
+    from top2vec import Top2Vec
+    from artefactos_modelo import get_topic_top_words, get_vocab_map, topic_keywords_table
+
+    model_dir = Path(model_dir)
+    model = Top2Vec.load(str(model_dir / 'modelo.model'))
+    pub_dates = np.load(model_dir / 'pub_dates.npy', allow_pickle=True)
+    # Modelos antiguos sin doc_ids.npy: se exporta la posición de la fila
+    doc_ids_path = model_dir / 'doc_ids.npy'
+    doc_ids = np.load(doc_ids_path, allow_pickle=True) if doc_ids_path.exists() else None
+
+    word_ids, scores = get_topic_top_words(model, model_dir)
+    vocab_map = get_vocab_map(model, model_dir)
+    keywords = [', '.join(words) for words, _ in topic_keywords_table(word_ids, scores, vocab_map)]
+
+    return export_assignments_parquet(
+        model_dir, model.doc_top, model.doc_dist, pub_dates,
+        topic_keyword_ids(word_ids, vocab_map), keywords, doc_ids
+    )
+
+
+if __name__ == "__main__":
+    for model_dir in sys.argv[1:]:
+        print(f"✅ Exportado: {export_model_dir(model_dir)}")
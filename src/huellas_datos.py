@@ -0,0 +1,282 @@
+"""
+HUELLAS DE LOS ARCHIVOS DE DATOS
+================================
+
+Calcula una "huella" (fingerprint) barata de cada archivo de entrada a partir
+de su tamaño, su fecha de modificación y un hash de bloques muestreados, junto
+con el número de filas y un checksum de los `doc_id`.
+
+Los valores caros (número de filas, checksum) se calculan una sola vez y se
+guardan en un archivo `<archivo>.huella.json` al lado del original. Mientras
+la huella barata no cambie, se reutilizan sin volver a leer los datos.
+
+Con esto se valida en milisegundos que `noticias.csv` y
+`embeddings_precalculados.npz` están alineados fila a fila, antes de gastar
+media hora entrenando sobre datos desalineados.
+
+La misma información (más rango de fechas, columnas, shape, dtype y bytes de
+los embeddings) forma el manifiesto del dataset que muestra la página de
+ayuda sin leer ni descomprimir los datos (ver dataset_manifest).
+"""
+
+import hashlib
+import json
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Versión del formato de los archivos .huella.json (subir si cambia el cálculo)
+VERSION_HUELLA = 1
+
+# Bloques muestreados para el hash barato (16 bloques de 64 KB)
+NUM_BLOQUES_MUESTRA = 16
+TAMANO_BLOQUE_MUESTRA = 64 * 1024
+
+# Columnas de fecha reconocidas en el CSV (la primera que exista)
+COLUMNAS_FECHA = ('pub_date', 'date')
+
+
+def _hash_hex(*partes):
+    """Hash corto y estable de una secuencia de valores"""
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        h.update(str(parte).encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    """
+    Huella barata de un archivo: tamaño, mtime y hash de bloques muestreados.
+
+    Lee como máximo NUM_BLOQUES_MUESTRA * TAMANO_BLOQUE_MUESTRA bytes, por lo
+    que tarda milisegundos incluso con archivos de varios GB.
+
+    Args:
+        path: Ruta del archivo
+
+    Returns:
+        dict con 'size', 'mtime_ns', 'sample_hash' y 'huella' (combinación)
+    """
+    path = Path(path)
+    stat = path.stat()
+    size = stat.st_size
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= NUM_BLOQUES_MUESTRA * TAMANO_BLOQUE_MUESTRA:
+            h.update(f.read())
+        else:
+            # Bloques equiespaciados, incluyendo siempre el inicio y el final
+            offsets = np.linspace(0, size - TAMANO_BLOQUE_MUESTRA, NUM_BLOQUES_MUESTRA).astype(np.int64)
+            for offset in offsets:
+                f.seek(int(offset))
+                h.update(f.read(TAMANO_BLOQUE_MUESTRA))
+    sample_hash = h.hexdigest()
+
+    return {
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sample_hash': sample_hash,
+        'huella': _hash_hex(VERSION_HUELLA, size, stat.st_mtime_ns, sample_hash)
+    }
+
+
+def doc_ids_checksum(doc_ids):
+    """Checksum de la secuencia de doc_id (sensible al orden de las filas)"""
+    doc_ids = np.asarray(doc_ids).astype(str)
+    h = hashlib.blake2b(digest_size=16)
+    h.update('\n'.join(doc_ids.tolist()).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _sidecar_path(path):
+    return Path(str(path) + '.huella.json')
+
+
+def _load_cached(path, huella, required=()):
+    """
+    Devuelve la info cacheada si el archivo no cambió desde el último cálculo.
+
+    Si a la info le falta alguna clave de `required` (archivo .huella.json de
+    una versión anterior) se considera obsoleta y se recalcula.
+    """
+    sidecar = _sidecar_path(path)
+    if not sidecar.exists():
+        return None
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('huella') != huella or any(key not in cached for key in required):
+        return None
+    return cached
+
+
+def _store_cached(path, info):
+    """Guarda la info al lado del archivo (si la carpeta no es escribible, se omite)"""
+    try:
+        with open(_sidecar_path(path), 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2, ensure_ascii=False)
+    except OSError:
+        pass
+
+
+def npz_array_header(npz_file, key):
+    """
+    Lee shape y dtype de un array dentro de un .npz sin descomprimir los datos.
+
+    Solo se leen los primeros bytes del miembro `<key>.npy` del zip.
+
+    Returns:
+        Tupla (shape, dtype) o None si la clave no existe
+    """
+    with zipfile.ZipFile(npz_file) as zf:
+        member = f'{key}.npy'
+        if member not in zf.namelist():
+            return None
+        with zf.open(member) as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    return shape, dtype
+
+
+def csv_fingerprint(csv_file, id_column='doc_id'):
+    """
+    Huella de un CSV de noticias: huella barata + número de filas + checksum de IDs
+    + rango de fechas.
+
+    El número de filas, el checksum y el rango de fechas requieren leer las
+    columnas de IDs y de fecha una vez; después se reutilizan desde el archivo
+    .huella.json.
+    """
+    base = file_fingerprint(csv_file)
+    cached = _load_cached(csv_file, base['huella'], required=('fecha_min', 'fecha_max'))
+    if cached is not None:
+        return cached
+
+    columns = pd.read_csv(csv_file, nrows=0).columns.tolist()
+    date_column = next((c for c in COLUMNAS_FECHA if c in columns), None)
+    usecols = [c for c in (id_column, date_column) if c in columns] or [columns[0]]
+    df = pd.read_csv(csv_file, usecols=usecols)
+    num_rows = len(df)
+    # Sin columna de IDs: solo se cuentan las filas
+    checksum = doc_ids_checksum(df[id_column].values) if id_column in columns else None
+
+    fecha_min = fecha_max = None
+    if date_column is not None:
+        fechas = pd.to_datetime(df[date_column], errors='coerce')
+        if fechas.notna().any():
+            fecha_min = str(fechas.min().date())
+            fecha_max = str(fechas.max().date())
+
+    info = {
+        **base,
+        'archivo': str(csv_file),
+        'num_filas': int(num_rows),
+        'doc_id_checksum': checksum,
+        'columnas': columns,
+        'columna_fecha': date_column,
+        'fecha_min': fecha_min,
+        'fecha_max': fecha_max
+    }
+    _store_cached(csv_file, info)
+    return info
+
+
+def npz_fingerprint(npz_file, id_key='doc_id'):
+    """
+    Huella de un .npz de embeddings: huella barata + número de filas + checksum de IDs.
+
+    El número de filas se obtiene de la cabecera del array de embeddings, sin
+    descomprimirlo. Solo se lee el array de IDs (pequeño) si existe.
+    """
+    base = file_fingerprint(npz_file)
+    cached = _load_cached(npz_file, base['huella'], required=('bytes',))
+    if cached is not None:
+        return cached
+
+    header = npz_array_header(npz_file, 'embeddings') or npz_array_header(npz_file, 'document_vectors')
+    if header is None:
+        raise ValueError(f"❌ No se encontraron embeddings en {npz_file}")
+    shape, dtype = header
+
+    checksum = None
+    if npz_array_header(npz_file, id_key) is not None:
+        with np.load(npz_file, allow_pickle=True) as data:
+            checksum = doc_ids_checksum(data[id_key])
+
+    info = {
+        **base,
+        'archivo': str(npz_file),
+        'num_filas': int(shape[0]),
+        'shape': list(shape),
+        'dtype': str(dtype),
+        # Tamaño del array descomprimido en memoria
+        'bytes': int(np.prod(shape, dtype=np.int64)) * dtype.itemsize,
+        'doc_id_checksum': checksum
+    }
+    _store_cached(npz_file, info)
+    return info
+
+
+def validate_alignment(csv_info, npz_info):
+    """
+    Verifica que el CSV y los embeddings describen las mismas filas en el mismo orden.
+
+    Raises:
+        ValueError: si el número de filas o el checksum de doc_id no coinciden
+    """
+    if csv_info['num_filas'] != npz_info['num_filas']:
+        raise ValueError(
+            f"❌ Los datos no están alineados: {csv_info['archivo']} tiene "
+            f"{csv_info['num_filas']:,} filas y {npz_info['archivo']} tiene "
+            f"{npz_info['num_filas']:,} embeddings"
+        )
+    if (csv_info['doc_id_checksum'] is not None and npz_info['doc_id_checksum'] is not None
+            and csv_info['doc_id_checksum'] != npz_info['doc_id_checksum']):
+        raise ValueError(
+            f"❌ Los datos no están alineados: los doc_id de {csv_info['archivo']} y "
+            f"{npz_info['archivo']} no coinciden (distinto contenido u orden)"
+        )
+
+
+def dataset_fingerprint(csv_file, embeddings_file, id_column='doc_id'):
+    """
+    Huella conjunta de noticias + embeddings, validando que estén alineados.
+
+    Returns:
+        dict con la huella de cada archivo y una 'huella' combinada que sirve
+        como clave de caché para cualquier dato derivado de este par
+    """
+    csv_info = csv_fingerprint(csv_file, id_column=id_column)
+    npz_info = npz_fingerprint(embeddings_file)
+    validate_alignment(csv_info, npz_info)
+
+    return {
+        'huella': _hash_hex(csv_info['huella'], npz_info['huella']),
+        'num_filas': csv_info['num_filas'],
+        'noticias': csv_info,
+        'embeddings': npz_info
+    }
+
+
+def dataset_manifest(csv_file, embeddings_file, id_column='doc_id'):
+    """
+    Manifiesto del dataset para mostrar (filas, fechas, columnas, shape, dtype, bytes).
+
+    A diferencia de dataset_fingerprint no valida la alineación: describe cada
+    archivo por separado y deja en None el que no exista. Tras la primera
+    lectura (normalmente al entrenar) sale de los archivos .huella.json.
+    """
+    csv_file, embeddings_file = Path(csv_file), Path(embeddings_file)
+    return {
+        'noticias': csv_fingerprint(csv_file, id_column=id_column) if csv_file.exists() else None,
+        'embeddings': npz_fingerprint(embeddings_file) if embeddings_file.exists() else None
+    }
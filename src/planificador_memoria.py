@@ -0,0 +1,192 @@
+"""
+PLANIFICADOR DE MEMORIA (PRE-VUELO)
+===================================
+
+Antes de cargar nada, estima el pico de memoria del entrenamiento a partir de
+los metadatos del dataset (documentos, dimensiones, dtype, tamaño de los
+textos) y de la configuración (n_neighbors, n_components, exportación), y lo
+compara con la RAM disponible.
+
+Los embeddings se cargan siempre como un único buffer float32 (ver
+entrenamiento_escalable.load_embeddings_float32); si el archivo está en
+float64, el plan lo registra como estrategia 'float32'.
+
+Si no cabe, elige automáticamente estrategias en orden de menor a mayor
+impacto en el resultado:
+
+1. Sin texto: el Excel de resultados se escribe sin la columna `texto`.
+2. Exportación en streaming: los documentos solo van al dataset Parquet
+   (escrito año a año); el Excel conserva el resumen y la evolución temporal.
+   Se activa siempre si hay más documentos que filas admite una hoja Excel.
+3. Ajuste sobre una submuestra: modo escalable (ver entrenamiento_escalable)
+   con la mayor muestra que cabe en memoria.
+
+Las estimaciones son deliberadamente conservadoras (órdenes de magnitud, no
+bytes exactos). El plan y el pico real medido se guardan en `metadata.json`
+(clave 'plan_memoria') para poder calibrar las constantes.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Fracción de la RAM disponible que puede usar el entrenamiento
+FRACCION_RAM_SEGURA = 0.8
+# Grafo kNN de UMAP por documento y vecino: índices y distancias del NN-descent
+# más el grafo difuso simetrizado (fila, columna, peso)
+BYTES_VECINO_UMAP = 48
+# HDBSCAN por documento: árbol de expansión mínima, distancias core, árbol condensado
+BYTES_DOCUMENTO_HDBSCAN = 256
+# Sobrecarga de cada str de Python además de sus caracteres
+BYTES_OBJETO_TEXTO = 60
+# openpyxl mantiene en memoria un objeto por celda hasta guardar el libro
+BYTES_CELDA_EXCEL = 600
+# Columnas de la hoja de documentos sin contar `texto`
+COLUMNAS_EXCEL = 5
+# Límite de filas de una hoja Excel (sin la cabecera)
+FILAS_MAX_EXCEL = 1_048_575
+# Muestra mínima razonable para el ajuste escalable
+MUESTRA_MINIMA = 20_000
+
+
+def available_memory_bytes():
+    """RAM disponible ahora mismo (sin contar swap)"""
+    import psutil
+    return int(psutil.virtual_memory().available)
+
+
+def estimate_peak_memory(num_docs, dims, itemsize, n_neighbors, n_components, text_bytes=0,
+                         float32=False, excel_texts=True, excel_documents=True, sample_size=None):
+    """
+    Estima el pico de memoria (bytes) de cada fase del entrenamiento.
+
+    Args:
+        num_docs, dims, itemsize: Forma y tamaño de elemento de los embeddings
+        n_neighbors, n_components: Parámetros de UMAP
+        text_bytes: Tamaño de los textos (aprox. el del CSV)
+        float32: Si los embeddings se convierten a float32 al cargar
+        excel_texts: Si el Excel incluye la columna `texto`
+        excel_documents: Si el Excel incluye la hoja de documentos
+        sample_size: Muestra de ajuste (modo escalable; embeddings en disco y sin textos)
+
+    Returns:
+        dict con el pico de cada fase y 'pico' (el máximo)
+    """
+    fit_docs = num_docs if sample_size is None else min(sample_size, num_docs)
+    if sample_size is None:
+        embeddings = num_docs * dims * (4 if float32 else itemsize)
+        texts = text_bytes + num_docs * BYTES_OBJETO_TEXTO
+        # UMAP convierte la entrada a float32: copia extra si no lo es ya
+        umap_input = 0 if float32 or itemsize == 4 else num_docs * dims * 4
+    else:
+        # Modo escalable: embeddings memory-mapped, solo la muestra en memoria, sin textos
+        embeddings = fit_docs * dims * 4
+        texts = 0
+        umap_input = 0
+        excel_texts = False
+
+    reduced = num_docs * n_components * 4
+    phases = {
+        'umap': embeddings + texts + umap_input + fit_docs * n_neighbors * BYTES_VECINO_UMAP + reduced,
+        'hdbscan': embeddings + texts + reduced + fit_docs * BYTES_DOCUMENTO_HDBSCAN,
+        'exportacion': embeddings + texts
+    }
+    if excel_documents:
+        phases['exportacion'] += num_docs * COLUMNAS_EXCEL * BYTES_CELDA_EXCEL
+        if excel_texts:
+            phases['exportacion'] += num_docs * BYTES_CELDA_EXCEL + 2 * text_bytes
+    phases = {name: int(value) for name, value in phases.items()}
+    phases['pico'] = max(phases.values())
+    return phases
+
+
+def plan_training(num_docs, dims, dtype, config, text_bytes=0, scalable=None, available_bytes=None):
+    """
+    Elige la estrategia de entrenamiento que cabe en la memoria disponible.
+
+    Args:
+        num_docs, dims, dtype: Forma y dtype de los embeddings (de la huella del .npz)
+        config: Configuración del modelo (n_neighbors, n_components, ...)
+        text_bytes: Tamaño de los textos (aprox. el del CSV)
+        scalable: Modo escalable pedido por el usuario ({'sample_size', 'n_workers'} o None)
+        available_bytes: RAM disponible (por defecto, la del sistema ahora)
+
+    Returns:
+        dict serializable a JSON: estrategias elegidas, estimación y presupuesto
+    """
+    if available_bytes is None:
+        available_bytes = available_memory_bytes()
+    budget = int(available_bytes * FRACCION_RAM_SEGURA)
+    itemsize = np.dtype(dtype).itemsize
+
+    plan = {
+        'float32': itemsize > 4,
+        'excluir_texto': False,
+        'exportacion_streaming': num_docs > FILAS_MAX_EXCEL,
+        'muestra_ajuste': scalable['sample_size'] if scalable else None,
+        'estrategias': []
+    }
+    if plan['float32']:
+        plan['estrategias'].append('float32')
+    if plan['exportacion_streaming']:
+        plan['estrategias'].append('exportacion_streaming')
+
+    def estimate():
+        return estimate_peak_memory(
+            num_docs, dims, itemsize, config['n_neighbors'], config['n_components'], text_bytes,
+            float32=True, excel_texts=not plan['excluir_texto'],
+            excel_documents=not plan['exportacion_streaming'], sample_size=plan['muestra_ajuste']
+        )
+
+    phases = estimate()
+    for strategy in ('excluir_texto', 'exportacion_streaming'):
+        if phases['pico'] <= budget or plan['exportacion_streaming']:
+            # Sin hoja de documentos en el Excel, quitar el texto ya no ahorra nada
+            break
+        if not plan[strategy]:
+            plan[strategy] = True
+            plan['estrategias'].append(strategy)
+            phases = estimate()
+
+    if phases['pico'] > budget and plan['muestra_ajuste'] is None:
+        # Mayor muestra que cabe (el coste de UMAP y HDBSCAN crece linealmente con ella)
+        per_doc = config['n_neighbors'] * BYTES_VECINO_UMAP + BYTES_DOCUMENTO_HDBSCAN + dims * 4
+        fixed = estimate_peak_memory(num_docs, dims, itemsize, config['n_neighbors'], config['n_components'],
+                                     excel_documents=False, sample_size=0)['pico']
+        plan['muestra_ajuste'] = int(min(max((budget - fixed) // per_doc, MUESTRA_MINIMA), num_docs))
+        plan['estrategias'].append('muestra_ajuste')
+        phases = estimate()
+
+    plan.update({
+        'estimacion_bytes': phases,
+        'disponible_bytes': int(available_bytes),
+        'presupuesto_bytes': budget,
+        'cabe': phases['pico'] <= budget
+    })
+    return plan
+
+
+def describe_plan(plan):
+    """Resumen de una línea del plan para el log"""
+    gb = 1024 ** 3
+    strategies = ', '.join(plan['estrategias']) or 'ninguna'
+    return (f"Pico estimado {plan['estimacion_bytes']['pico'] / gb:.1f} GB de "
+            f"{plan['disponible_bytes'] / gb:.1f} GB disponibles · estrategias: {strategies}")
+
+
+def record_plan(model_dir, plan, peak_bytes):
+    """Guarda el plan y el pico real en metadata.json (clave 'plan_memoria'), conservando el resto"""
+    metadata_path = Path(model_dir) / 'metadata.json'
+    metadata = {}
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    metadata['plan_memoria'] = {
+        **plan,
+        'pico_real_bytes': int(peak_bytes),
+        'error_relativo': round((plan['estimacion_bytes']['pico'] - peak_bytes) / max(peak_bytes, 1), 3)
+    }
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return metadata_path
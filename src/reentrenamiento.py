@@ -0,0 +1,463 @@
+"""
+REENTRENAMIENTO PROGRAMADO CON ARRANQUE EN CALIENTE
+===================================================
+
+Cada mes llegan noticias nuevas. En lugar de re-entrenar a mano y desde cero
+sobre toda la historia, este script (pensado para cron) hace:
+
+1. Detección de cambios: compara la huella de `noticias.csv` +
+   `embeddings_precalculados.npz` con la del último modelo publicado. Si no
+   cambió, termina sin hacer nada. Si solo se añadieron filas al final (las
+   fechas de las filas antiguas coinciden y el checksum de sus doc_id es el
+   guardado con el modelo, clave 'filas_modelo' de metadata.json), las filas
+   nuevas son las que siguen a las del modelo anterior.
+2. Reducción en caliente: reutiliza el reductor UMAP ajustado del modelo
+   anterior (`reductor_umap.pkl`) y sus coordenadas reducidas
+   (`coordenadas_umap.npy`); solo se transforman los documentos nuevos.
+   Sin modelo anterior compatible, arranque en frío: UMAP se ajusta sobre una
+   muestra estratificada (como entrenamiento_escalable) y se transforma el resto.
+3. Re-clustering: HDBSCAN sobre una muestra estratificada de las coordenadas
+   de todos los documentos (antiguos y nuevos) y approximate_predict para el
+   resto; vectores de tópicos = media normalizada de cada cluster.
+4. Continuidad de ids: los tópicos nuevos se emparejan con los del modelo
+   anterior (algoritmo húngaro sobre la similitud de sus vectores) y cada
+   tópico emparejado conserva su id siempre que sea posible.
+5. Publicación atómica: el modelo se escribe en una carpeta temporal oculta
+   de `modelos/` y se renombra al final (`<prefijo>_<fecha>`); el puntero
+   `modelos/<prefijo>.ultimo.json` se reemplaza también de forma atómica.
+
+El informe (también en `metadata.json`, clave 'reentrenamiento') incluye los
+tiempos por fase y el ahorro del arranque en caliente frente a un arranque en
+frío: estimado a partir del último arranque en frío registrado (escalado por
+número de documentos) o medido con --comparar-frio.
+
+Los modelos publicados no incluyen los textos (como el modo escalable).
+
+Uso (por ejemplo, en cron el día 1 de cada mes):
+    python reentrenamiento.py --prefijo noticias
+    python reentrenamiento.py --prefijo noticias --anterior modelos/mi_modelo   # primer arranque desde un modelo de la app
+    python reentrenamiento.py --prefijo noticias --frio                         # forzar arranque en frío
+
+    0 3 1 * *  cd /ruta/src && python reentrenamiento.py --prefijo noticias >> reentrenamiento.log 2>&1
+
+Códigos de salida: 0 publicado o sin cambios, 1 error.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artefactos_modelo import (
+    build_vocab_map, compute_daily_topic_counts, compute_representative_documents, compute_topic_hierarchy,
+    compute_topic_top_words, load_topic_assignments, model_fingerprint, save_daily_topic_counts,
+    save_representative_documents, save_topic_assignments, save_topic_hierarchy, save_topic_top_words, save_vocab_map
+)
+from comparacion_modelos import align_topics, topic_similarity_matrix
+from entrenamiento_escalable import (
+    MUESTRA_AJUSTE, TAMANO_LOTE, assign_documents, build_model, cluster_sums, deduplicate_topic_vectors,
+    extract_embeddings_npy, load_doc_ids, load_pub_dates, stratified_sample
+)
+from estabilidad_topicos import model_args
+from huellas_datos import dataset_fingerprint, doc_ids_checksum
+
+ARCHIVO_REDUCTOR = 'reductor_umap.pkl'
+ARCHIVO_COORDENADAS = 'coordenadas_umap.npy'
+CARPETA_MODELOS = Path('modelos')
+# Similitud mínima para que un tópico nuevo herede el id de uno anterior
+UMBRAL_CONTINUIDAD = 0.5
+
+
+def latest_model(prefix, models_dir=CARPETA_MODELOS):
+    """Último modelo publicado con un prefijo (según el puntero <prefijo>.ultimo.json), o None"""
+    pointer = Path(models_dir) / f'{prefix}.ultimo.json'
+    if not pointer.exists():
+        return None
+    with open(pointer, 'r', encoding='utf-8') as f:
+        model_dir = Path(models_dir) / json.load(f)['modelo']
+    return model_dir if model_dir.exists() else None
+
+
+def detect_changes(previous_dir, huella_datos, pub_dates, doc_ids):
+    """
+    Compara los datos actuales con los del modelo anterior.
+
+    Las fechas solas no bastan para 'nuevas_filas' (reordenar o sustituir
+    filas con la misma fecha no las cambia): los doc_id de las primeras filas
+    deben tener el checksum guardado con el modelo anterior.
+
+    Returns:
+        Tupla (estado, num_anteriores): estado es 'sin_cambios', 'nuevas_filas'
+        (solo se añadieron filas al final) o 'distintos' (hay que empezar en frío)
+    """
+    if previous_dir is None:
+        return 'distintos', 0
+    with open(previous_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    previous = metadata.get('huella_datos') or {}
+    if previous.get('huella') == huella_datos['huella']:
+        return 'sin_cambios', previous.get('num_filas', 0)
+
+    previous_dates_path = previous_dir / 'pub_dates.npy'
+    if not previous_dates_path.exists():
+        return 'distintos', 0
+    previous_dates = pd.to_datetime(np.load(previous_dates_path, allow_pickle=True)).values
+    num_previous = len(previous_dates)
+    # Solo se añadieron filas si las fechas de las filas antiguas no cambiaron
+    if num_previous >= len(pub_dates) or not np.array_equal(previous_dates, pub_dates[:num_previous], equal_nan=True):
+        return 'distintos', 0
+    rows = metadata.get('filas_modelo') or {}
+    if rows.get('num_filas') != num_previous or rows.get('doc_id_checksum') != doc_ids_checksum(doc_ids[:num_previous]):
+        return 'distintos', 0
+    return 'nuevas_filas', num_previous
+
+
+def _transform_in_batches(reducer, vectors, rows, batch_size=TAMANO_LOTE):
+    """Coordenadas UMAP de las filas pedidas, transformadas por lotes"""
+    coords = np.empty((len(rows), reducer.n_components), dtype=np.float32)
+    for start in range(0, len(rows), batch_size):
+        batch = np.asarray(vectors[rows[start:start + batch_size]], dtype=np.float32)
+        coords[start:start + batch_size] = reducer.transform(batch)
+    return coords
+
+
+def reduce_cold(vectors, pub_dates, umap_args, sample_size=MUESTRA_AJUSTE):
+    """Arranque en frío: UMAP ajustado sobre una muestra estratificada y transformación del resto"""
+    import umap
+
+    sample_idx = stratified_sample(pub_dates, sample_size)
+    reducer = umap.UMAP(**umap_args).fit(np.asarray(vectors[sample_idx], dtype=np.float32))
+    coords = np.empty((len(vectors), reducer.n_components), dtype=np.float32)
+    coords[sample_idx] = reducer.embedding_
+    rest = np.setdiff1d(np.arange(len(vectors)), sample_idx, assume_unique=True)
+    coords[rest] = _transform_in_batches(reducer, vectors, rest)
+    return reducer, coords
+
+
+def reduce_warm(previous_dir, vectors, num_previous):
+    """Arranque en caliente: reductor y coordenadas del modelo anterior; solo se transforman las filas nuevas"""
+    with open(previous_dir / ARCHIVO_REDUCTOR, 'rb') as f:
+        reducer = pickle.load(f)
+    previous_coords = np.load(previous_dir / ARCHIVO_COORDENADAS)
+    new_coords = _transform_in_batches(reducer, vectors, np.arange(num_previous, len(vectors)))
+    return reducer, np.concatenate([previous_coords, new_coords])
+
+
+def recluster(vectors, coords, pub_dates, hdbscan_args, topic_merge_delta, sample_size=MUESTRA_AJUSTE,
+              batch_size=TAMANO_LOTE):
+    """
+    HDBSCAN sobre una muestra estratificada de las coordenadas y approximate_predict para el resto.
+
+    Returns:
+        Tupla (topic_vectors, doc_top, doc_dist)
+    """
+    import hdbscan
+
+    sample_idx = stratified_sample(pub_dates, sample_size)
+    clusterer = hdbscan.HDBSCAN(**hdbscan_args, prediction_data=True).fit(coords[sample_idx])
+    num_labels = int(clusterer.labels_.max()) + 1
+    if num_labels == 0:
+        raise ValueError("❌ HDBSCAN no encontró clusters. Prueba con un min_cluster_size menor.")
+
+    labels = np.full(len(vectors), -1, dtype=np.int64)
+    labels[sample_idx] = clusterer.labels_
+    rest = np.setdiff1d(np.arange(len(vectors)), sample_idx, assume_unique=True)
+    for start in range(0, len(rest), batch_size):
+        rows = rest[start:start + batch_size]
+        labels[rows], _ = hdbscan.approximate_predict(clusterer, coords[rows])
+
+    # Sumas por cluster en lotes (memoria acotada con embeddings memory-mapped)
+    sums = np.zeros((num_labels, vectors.shape[1]))
+    counts = np.zeros(num_labels, dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        batch_sums, batch_counts = cluster_sums(
+            np.asarray(vectors[start:start + batch_size], dtype=np.float32),
+            labels[start:start + batch_size], num_labels
+        )
+        sums += batch_sums
+        counts += batch_counts
+
+    topic_vectors = sums[counts > 0] / counts[counts > 0, None]
+    topic_vectors /= np.linalg.norm(topic_vectors, axis=1, keepdims=True)
+    topic_vectors = deduplicate_topic_vectors(topic_vectors, topic_merge_delta)
+    doc_top, doc_dist = assign_documents(vectors, topic_vectors, batch_size)
+    return topic_vectors, doc_top, doc_dist
+
+
+def match_topic_ids(previous_vectors, new_vectors, threshold=UMBRAL_CONTINUIDAD):
+    """
+    Ids de los tópicos nuevos que mantienen los del modelo anterior.
+
+    Cada tópico nuevo emparejado (húngaro, similitud >= umbral) con el tópico
+    anterior k recibe el id k si existe (k < número de tópicos nuevos); el
+    resto ocupa los ids libres en orden de tamaño.
+
+    Returns:
+        Tupla (order, previous_ids): order[id] es el índice del tópico nuevo
+        con ese id y previous_ids[id] el id anterior emparejado (-1 si es nuevo)
+    """
+    num_new = len(new_vectors)
+    similarity = topic_similarity_matrix(new_vectors, previous_vectors)
+    rows, cols = align_topics(similarity)
+    matched = similarity[rows, cols] >= threshold
+    rows, cols = rows[matched], cols[matched]
+
+    order = np.full(num_new, -1, dtype=np.int64)
+    previous_ids = np.full(num_new, -1, dtype=np.int64)
+    keeps_id = cols < num_new
+    order[cols[keeps_id]] = rows[keeps_id]
+    previous_ids[cols[keeps_id]] = cols[keeps_id]
+
+    placed = np.zeros(num_new, dtype=bool)
+    placed[rows[keeps_id]] = True
+    free = np.flatnonzero(order < 0)
+    order[free] = np.flatnonzero(~placed)
+    previous_of = dict(zip(rows.tolist(), cols.tolist()))
+    previous_ids[free] = [previous_of.get(int(topic), -1) for topic in order[free]]
+    return order, previous_ids
+
+
+def reorder_topics(model, order, word_vectors, vocab):
+    """Aplica a un modelo el orden de ids de match_topic_ids (vectores, asignaciones, tamaños y palabras)"""
+    new_ids = np.empty(len(order), dtype=np.int64)
+    new_ids[order] = np.arange(len(order))
+    model.topic_vectors = model.topic_vectors[order]
+    model.doc_top = new_ids[model.doc_top]
+    model.topic_sizes = pd.Series(np.bincount(model.doc_top, minlength=len(order))).sort_values(
+        ascending=False, kind='stable')
+    word_ids, scores = compute_topic_top_words(model.topic_vectors, word_vectors)
+    model.topic_words = np.asarray(vocab, dtype=object)[word_ids]
+    model.topic_word_scores = scores
+    return model
+
+
+def save_model_artifacts(model, model_dir, pub_dates, doc_ids, reducer, coords):
+    """Guarda el modelo, sus artefactos precalculados y el estado para el siguiente arranque en caliente"""
+    model.save(str(model_dir / 'modelo.model'))
+    np.save(model_dir / 'pub_dates.npy', pub_dates)
+    np.save(model_dir / 'doc_ids.npy', doc_ids)
+
+    num_topics = len(model.topic_vectors)
+    top_words = compute_topic_top_words(model.topic_vectors, model.word_vectors)
+    hierarchy = compute_topic_hierarchy(model.topic_vectors, np.bincount(model.doc_top, minlength=num_topics),
+                                        model.word_vectors)
+    huella = model_fingerprint(model.topic_vectors, model.doc_top)
+    save_topic_top_words(model_dir, *top_words, huella=huella)
+    save_vocab_map(model_dir, build_vocab_map(model.vocab))
+    save_topic_hierarchy(model_dir, hierarchy)
+    save_daily_topic_counts(model_dir, *compute_daily_topic_counts(pub_dates, model.doc_top, num_topics, hierarchy))
+    save_topic_assignments(model_dir, model.topic_vectors, model.doc_top)
+    save_representative_documents(model_dir, compute_representative_documents(
+        model.doc_top, model.doc_dist, num_topics, pub_dates, None, hierarchy, model.document_vectors
+    ), huella=huella)
+
+    with open(model_dir / ARCHIVO_REDUCTOR, 'wb') as f:
+        pickle.dump(reducer, f, protocol=pickle.HIGHEST_PROTOCOL)
+    np.save(model_dir / ARCHIVO_COORDENADAS, coords)
+
+
+def publish_model(tmp_dir, prefix, models_dir=CARPETA_MODELOS):
+    """Renombra la carpeta temporal a modelos/<prefijo>_<fecha> y actualiza el puntero (ambos atómicos)"""
+    name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    final_dir = Path(models_dir) / name
+    os.rename(tmp_dir, final_dir)
+
+    pointer = Path(models_dir) / f'{prefix}.ultimo.json'
+    tmp_pointer = pointer.with_name(f'.{pointer.name}.tmp')
+    with open(tmp_pointer, 'w', encoding='utf-8') as f:
+        json.dump({'modelo': name, 'publicado': datetime.now().isoformat()}, f, ensure_ascii=False)
+    os.replace(tmp_pointer, pointer)
+    return final_dir
+
+
+def _last_cold_run(model_dir):
+    """Tiempos del último arranque en frío en la cadena de modelos anteriores (None si no hay)"""
+    while model_dir is not None and (model_dir / 'metadata.json').exists():
+        with open(model_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+            report = json.load(f).get('reentrenamiento')
+        if not report:
+            return None
+        if report['modo'] == 'frio':
+            return report
+        model_dir = Path(report['modelo_anterior']) if report.get('modelo_anterior') else None
+    return None
+
+
+def retrain(csv_file, embeddings_file, prefix, previous_dir=None, config=None, cold=False, compare_cold=False,
+            sample_size=MUESTRA_AJUSTE, models_dir=CARPETA_MODELOS):
+    """
+    Reentrena y publica un modelo nuevo si los datos cambiaron.
+
+    Args:
+        csv_file, embeddings_file: Datos actuales
+        prefix: Prefijo de los modelos publicados (y de su puntero)
+        previous_dir: Modelo anterior (por defecto, el último publicado con el prefijo)
+        config: Configuración (por defecto, la del modelo anterior)
+        cold: Forzar arranque en frío
+        compare_cold: Medir también la reducción en frío para calcular el ahorro real
+
+    Returns:
+        dict con el informe (estado, modo, tiempos, ahorro y carpeta publicada)
+    """
+    start = time.time()
+    previous_dir = Path(previous_dir) if previous_dir else latest_model(prefix, models_dir)
+    if config is None:
+        if previous_dir is None:
+            raise ValueError("❌ Sin modelo anterior hay que indicar la configuración (--config)")
+        with open(previous_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)['config']
+
+    huella_datos = dataset_fingerprint(csv_file, embeddings_file)
+    pub_dates = load_pub_dates(csv_file)
+    doc_ids = load_doc_ids(csv_file, len(pub_dates))
+    state, num_previous = detect_changes(previous_dir, huella_datos, pub_dates, doc_ids)
+    if state == 'sin_cambios':
+        return {'estado': state, 'modelo_anterior': str(previous_dir)}
+
+    warm = (not cold and state == 'nuevas_filas' and (previous_dir / ARCHIVO_REDUCTOR).exists()
+            and (previous_dir / ARCHIVO_COORDENADAS).exists())
+    umap_args, hdbscan_args = model_args(config)
+
+    vectors = np.load(extract_embeddings_npy(embeddings_file, huella_datos['huella']), mmap_mode='r')
+    with np.load(embeddings_file, allow_pickle=True) as data:
+        word_vectors = data['word_vectors']
+        vocab = data['vocab'].tolist()
+        word_indexes = data['word_indexes'].item()
+
+    times = {}
+    phase = time.time()
+    if warm:
+        reducer, coords = reduce_warm(previous_dir, vectors, num_previous)
+    else:
+        reducer, coords = reduce_cold(vectors, pub_dates, umap_args, sample_size)
+    times['reduccion_s'] = round(time.time() - phase, 2)
+
+    cold_reduction = None
+    if compare_cold and warm:
+        phase = time.time()
+        reduce_cold(vectors, pub_dates, umap_args, sample_size)
+        cold_reduction = time.time() - phase
+
+    phase = time.time()
+    topic_vectors, doc_top, doc_dist = recluster(vectors, coords, pub_dates, hdbscan_args,
+                                                 config['topic_merge_delta'], sample_size)
+    model = build_model(vectors, word_vectors, vocab, word_indexes, topic_vectors, doc_top, doc_dist)
+    times['clustering_s'] = round(time.time() - phase, 2)
+
+    # Continuidad de ids con el modelo anterior
+    previous_ids = np.full(len(model.topic_vectors), -1)
+    previous_topics = load_topic_assignments(previous_dir) if previous_dir is not None else None
+    if previous_topics is not None:
+        order, previous_ids = match_topic_ids(previous_topics[0], model.topic_vectors)
+        reorder_topics(model, order, word_vectors, vocab)
+
+    # Escritura en una carpeta oculta de modelos/ (mismo sistema de archivos: el rename es atómico)
+    phase = time.time()
+    tmp_dir = Path(models_dir) / f'.{prefix}.tmp-{os.getpid()}'
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    try:
+        save_model_artifacts(model, tmp_dir, pub_dates, doc_ids, reducer, coords)
+        times['guardado_s'] = round(time.time() - phase, 2)
+        times['total_s'] = round(time.time() - start, 2)
+
+        # Ahorro frente a un arranque en frío (medido o estimado)
+        saved = None
+        if warm:
+            if cold_reduction is not None:
+                saved = {'metodo': 'medido', 'reduccion_frio_s': round(cold_reduction, 2)}
+            else:
+                last_cold = _last_cold_run(previous_dir)
+                if last_cold is not None:
+                    scale = len(vectors) / last_cold['num_documentos']
+                    saved = {'metodo': 'estimado', 'reduccion_frio_s': round(last_cold['tiempos']['reduccion_s'] * scale, 2)}
+            if saved is not None:
+                saved['ahorro_s'] = round(saved['reduccion_frio_s'] - times['reduccion_s'], 2)
+
+        report = {
+            'estado': state,
+            'modo': 'caliente' if warm else 'frio',
+            'modelo_anterior': str(previous_dir) if previous_dir is not None else None,
+            'num_documentos': int(len(vectors)),
+            'documentos_sin_fecha': int(pd.isna(pub_dates).sum()),
+            'documentos_nuevos': int(len(vectors) - num_previous) if warm else int(len(vectors)),
+            'num_topicos': int(len(model.topic_vectors)),
+            'topicos_continuados': int((previous_ids >= 0).sum()),
+            'id_anterior': previous_ids.tolist(),
+            'tiempos': times,
+            'ahorro_frente_a_frio': saved
+        }
+        metadata = {
+            'timestamp': datetime.now().isoformat(),
+            'model_path': 'modelo.model',
+            'num_topics': int(len(model.topic_vectors)),
+            'execution_time_seconds': times['total_s'],
+            'config': config,
+            'huella_datos': huella_datos,
+            # Filas del modelo: el siguiente reentrenamiento comprueba que siguen al principio del CSV
+            'filas_modelo': {'num_filas': int(len(doc_ids)), 'doc_id_checksum': doc_ids_checksum(doc_ids)},
+            'reentrenamiento': report
+        }
+        with open(tmp_dir / 'metadata.json', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+        final_dir = publish_model(tmp_dir, prefix, models_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    report['modelo'] = str(final_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reentrena y publica un modelo nuevo si llegaron datos nuevos")
+    parser.add_argument('--prefijo', required=True, help="Prefijo de los modelos publicados (modelos/<prefijo>_<fecha>)")
+    parser.add_argument('--datos', default='data/noticias.csv')
+    parser.add_argument('--embeddings', default='data/embeddings_precalculados.npz')
+    parser.add_argument('--anterior', default=None, help="Modelo anterior (por defecto, el último publicado)")
+    parser.add_argument('--config', default=None, help="JSON con la configuración (por defecto, la del modelo anterior)")
+    parser.add_argument('--frio', action='store_true', help="Forzar arranque en frío")
+    parser.add_argument('--comparar-frio', action='store_true',
+                        help="Medir también la reducción en frío (más lento) para informar el ahorro real")
+    parser.add_argument('--muestra', type=int, default=MUESTRA_AJUSTE)
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    try:
+        report = retrain(args.datos, args.embeddings, args.prefijo, args.anterior, config,
+                         cold=args.frio, compare_cold=args.comparar_frio, sample_size=args.muestra)
+    except Exception as e:
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] ❌ Error en el reentrenamiento: {e}", file=sys.stderr)
+        return 1
+
+    stamp = f"[{datetime.now():%Y-%m-%d %H:%M:%S}]"
+    if report['estado'] == 'sin_cambios':
+        print(f"{stamp} ℹ️ Sin datos nuevos desde {report['modelo_anterior']}: nada que hacer")
+        return 0
+    print(f"{stamp} ✅ Publicado {report['modelo']} (arranque en {report['modo']}, "
+          f"{report['documentos_nuevos']:,} documentos nuevos de {report['num_documentos']:,})")
+    print(f"   Tópicos: {report['num_topicos']} ({report['topicos_continuados']} con el id del modelo anterior)")
+    print("   Tiempos: " + ', '.join(f"{k} {v:.1f}" for k, v in report['tiempos'].items()))
+    saved = report['ahorro_frente_a_frio']
+    if saved:
+        print(f"   Ahorro frente a frío ({saved['metodo']}): {saved['ahorro_s']:.1f} s "
+              f"(reducción en frío {saved['reduccion_frio_s']:.1f} s vs {report['tiempos']['reduccion_s']:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+REGISTRO ESTRUCTURADO DEL ENTRENAMIENTO
+=======================================
+
+Cada evento del entrenamiento es un dict con ejecución, instante, etapa,
+nivel, mensaje y métricas:
+
+    {"ejecucion": "20240115_103000", "ts": "2024-01-15T10:30:05",
+     "etapa": "datos", "nivel": "INFO", "mensaje": "✅ Embeddings cargados",
+     "metricas": {"num_documentos": 1500000}}
+
+- En memoria se guarda solo un buffer circular acotado (lo que muestra la UI).
+- En disco los eventos se añaden por lotes a `modelos/<nombre>/train_log.jsonl`
+  (un JSON por línea). Cada entrenamiento añade una ejecución nueva, de modo
+  que el explorador puede reproducir el log de cualquier ejecución pasada.
+- Es seguro entre hilos: las tareas de exportación en segundo plano siguen
+  registrando eventos cuando la UI ya terminó.
+"""
+
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+ARCHIVO_LOG = 'train_log.jsonl'
+# Eventos que conserva el buffer en memoria
+MAX_EVENTOS_MEMORIA = 200
+# Eventos acumulados antes de escribir un lote en disco
+EVENTOS_POR_LOTE = 20
+# Orden de los niveles (los inferiores al nivel de la UI solo van al archivo)
+NIVELES = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+
+def _json_default(value):
+    """Escalares y arrays de NumPy como tipos nativos; el resto como texto"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def format_event(event):
+    """Línea de texto de un evento, con el formato del log de la UI"""
+    prefix = '🔍 DEBUG: ' if event['nivel'] == 'DEBUG' else ''
+    return f"[{event['ts'][11:19]}] {prefix}{event['mensaje']}"
+
+
+class TrainingLog:
+    """Log de una ejecución de entrenamiento: buffer circular + archivo JSONL por lotes"""
+
+    def __init__(self, model_dir=None, on_update=None, ui_level='INFO',
+                 max_events=MAX_EVENTOS_MEMORIA, batch_size=EVENTOS_POR_LOTE):
+        """
+        Args:
+            model_dir: Carpeta del modelo (None: solo en memoria)
+            on_update: Función llamada con las últimas líneas visibles tras cada evento
+            ui_level: Nivel mínimo de los eventos que se muestran en la UI
+            max_events: Tamaño del buffer circular
+            batch_size: Eventos por escritura en disco
+        """
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = Path(model_dir) / ARCHIVO_LOG if model_dir is not None else None
+        self.on_update = on_update
+        self.ui_level = NIVELES[ui_level]
+        self.events = deque(maxlen=max_events)
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def event(self, stage, message, level='INFO', **metrics):
+        """Registra un evento; las métricas deben ser serializables a JSON"""
+        event = {
+            'ejecucion': self.run_id,
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'etapa': stage,
+            'nivel': level,
+            'mensaje': message,
+            'metricas': metrics
+        }
+        with self.lock:
+            self.events.append(event)
+            self.pending.append(event)
+            flush = len(self.pending) >= self.batch_size or level == 'ERROR'
+        if flush:
+            self.flush()
+        if self.on_update is not None and NIVELES[level] >= self.ui_level:
+            self.on_update(self.lines())
+        return event
+
+    def lines(self, n=20):
+        """Últimas `n` líneas visibles en la UI"""
+        with self.lock:
+            events = list(self.events)
+        visible = [e for e in events if NIVELES[e['nivel']] >= self.ui_level]
+        return [format_event(e) for e in visible[-n:]]
+
+    def flush(self):
+        """Añade al archivo los eventos pendientes (si no se puede escribir, se omite)"""
+        with self.lock:
+            if self.path is None or not self.pending:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(e, ensure_ascii=False, default=_json_default) + '\n'
+                                    for e in self.pending))
+                self.pending = []
+            except OSError:
+                pass
+
+
+def load_training_log(model_dir):
+    """
+    Eventos guardados de un modelo, agrupados por ejecución.
+
+    Returns:
+        dict {ejecucion: [eventos]} en orden cronológico (vacío si no hay log)
+    """
+    path = Path(model_dir) / ARCHIVO_LOG
+    runs = {}
+    if not path.exists():
+        return runs
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Última línea incompleta (proceso interrumpido a mitad de escritura)
+                continue
+            runs.setdefault(event['ejecucion'], []).append(event)
+    return runs
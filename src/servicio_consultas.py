@@ -0,0 +1,229 @@
+"""
+SERVICIO LOCAL DE CONSULTAS (HTTP)
+==================================
+
+Carga uno o varios modelos de `modelos/` una sola vez y los mantiene en
+memoria para responder consultas por HTTP en milisegundos desde notebooks o
+dashboards (sin pagar `Top2Vec.load` en cada ejecución).
+
+Uso:
+    python servicio_consultas.py                     # todos los modelos de modelos/ (también <nombre>.model)
+    python servicio_consultas.py modelo_A modelo_B   # solo esos modelos
+    python servicio_consultas.py --puerto 8765
+
+Endpoints (JSON; todos los POST aceptan lotes):
+
+    GET  /modelos                 Modelos cargados
+    GET  /metricas                Latencia por endpoint (n, media, p50, p95, máx. en ms) y caché
+    POST /topicos                 {"modelo", "topicos": [..]}                        (opcional)
+    POST /documentos/topico       {"modelo", "topicos": [..], "num_docs": 10}
+    POST /documentos/palabras     {"modelo", "consultas": [{"palabras": [..], "negativas": [..]}], "num_docs": 10}
+    POST /busqueda_lote           {"modelo", "consultas": ["tipo de cambio", ["desempleo"], ..], "num_docs": 10}
+    POST /palabras_similares      {"modelo", "palabras": [..], "num_palabras": 10}
+    POST /serie_temporal          {"modelo", "topicos": [..], "frecuencia": "M"}
+    POST /asignar                 {"modelo", "vectores": [[..], ..]}
+
+Ejemplo desde Python:
+    requests.post("http://127.0.0.1:8765/documentos/palabras",
+                  json={"modelo": "modelo_A", "consultas": [{"palabras": ["inflación"]}]}).json()
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from cache_consultas import QUERY_CACHE
+from consultas_modelo import ModelQueries
+
+PUERTO_SERVICIO = 8765
+
+# Últimas latencias guardadas por endpoint para las métricas
+VENTANA_METRICAS = 1000
+
+
+class LatencyMetrics:
+    """Latencias recientes por endpoint (ventana acotada, segura entre hilos)"""
+
+    def __init__(self, window=VENTANA_METRICAS):
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds * 1000)
+            self.totals[endpoint] = self.totals.get(endpoint, 0) + 1
+
+    def summary(self):
+        with self.lock:
+            snapshot = {endpoint: np.array(values) for endpoint, values in self.samples.items()}
+            totals = dict(self.totals)
+        return {
+            endpoint: {
+                'peticiones': totals[endpoint],
+                'media_ms': round(float(values.mean()), 2),
+                'p50_ms': round(float(np.percentile(values, 50)), 2),
+                'p95_ms': round(float(np.percentile(values, 95)), 2),
+                'max_ms': round(float(values.max()), 2)
+            }
+            for endpoint, values in snapshot.items()
+        }
+
+
+def load_models(models_dir='modelos', names=None):
+    """
+    Carga los modelos indicados (o todos los de la carpeta) como ModelQueries.
+
+    Un modelo es una carpeta con `modelo.model` (app y reentrenamiento) o un
+    archivo `<nombre>.model` suelto (ejecutar_modelo.py), cuyos artefactos van
+    en la carpeta `<nombre>/`.
+    """
+    models_dir = Path(models_dir)
+    names = names or sorted({p.name for p in models_dir.iterdir() if (p / 'modelo.model').exists()} |
+                            {p.stem for p in models_dir.glob('*.model') if p.is_file()})
+    models = {}
+    for name in names:
+        start = time.time()
+        models[name] = ModelQueries.from_dir(models_dir / name)
+        print(f"✅ {name}: {models[name].num_topics} tópicos ({time.time() - start:.1f}s)")
+    return models
+
+
+def _topics_endpoint(queries, body):
+    return {'topicos': queries.topic_info(body.get('topicos'))}
+
+
+def _documents_by_topic_endpoint(queries, body):
+    num_docs = int(body.get('num_docs', 10))
+    return {'resultados': {str(t): queries.documents_by_topic(t, num_docs) for t in body['topicos']}}
+
+
+def _documents_by_keywords_endpoint(queries, body):
+    num_docs = int(body.get('num_docs', 10))
+    return {'resultados': [
+        queries.documents_by_keywords(q['palabras'], q.get('negativas'), num_docs) for q in body['consultas']
+    ]}
+
+
+def _batch_search_endpoint(queries, body):
+    results, informe = queries.search_keyword_sets(body['consultas'], int(body.get('num_docs', 10)))
+    if 'fecha' in results:
+        results['fecha'] = results['fecha'].dt.strftime('%Y-%m-%d')
+    results['score'] = results['score'].astype(float).round(4)
+    return {'resultados': results.to_dict(orient='records'), 'informe': informe}
+
+
+def _similar_words_endpoint(queries, body):
+    return {'resultados': queries.similar_words(body['palabras'], int(body.get('num_palabras', 10)))}
+
+
+def _topic_series_endpoint(queries, body):
+    series = queries.topic_series(body['topicos'], body.get('frecuencia', 'M'))
+    return {
+        'fechas': [str(d.date()) for d in series.index],
+        'series': {str(t): series[t].astype(int).tolist() for t in series.columns}
+    }
+
+
+def _assign_endpoint(queries, body):
+    topics, scores = queries.assign_vectors(body['vectores'])
+    return {'topicos': topics.tolist(), 'scores': [round(float(s), 4) for s in scores]}
+
+
+ENDPOINTS = {
+    '/topicos': _topics_endpoint,
+    '/documentos/topico': _documents_by_topic_endpoint,
+    '/documentos/palabras': _documents_by_keywords_endpoint,
+    '/busqueda_lote': _batch_search_endpoint,
+    '/palabras_similares': _similar_words_endpoint,
+    '/serie_temporal': _topic_series_endpoint,
+    '/asignar': _assign_endpoint,
+}
+
+
+def make_handler(models, metrics):
+    """Crea la clase de handler HTTP con acceso a los modelos cargados"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/modelos':
+                self._send_json(200, {'modelos': {
+                    name: {'topicos': q.num_topics, 'documentos': int(len(q.model.doc_top))}
+                    for name, q in models.items()
+                }})
+            elif self.path == '/metricas':
+                self._send_json(200, {**metrics.summary(), 'cache': QUERY_CACHE.stats()})
+            else:
+                self._send_json(404, {'error': f'Ruta desconocida: {self.path}'})
+
+        def do_POST(self):
+            endpoint = ENDPOINTS.get(self.path)
+            if endpoint is None:
+                self._send_json(404, {'error': f'Ruta desconocida: {self.path}'})
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                name = body.get('modelo') or (next(iter(models)) if len(models) == 1 else None)
+                if name not in models:
+                    raise ValueError(f"Modelo no cargado: {name}. Disponibles: {list(models)}")
+                payload = endpoint(models[name], body)
+                status = 200
+            except (KeyError, ValueError, TypeError) as e:
+                payload, status = {'error': str(e)}, 400
+            except Exception as e:
+                # Cualquier otro fallo (p. ej. IndexError) también recibe respuesta
+                payload, status = {'error': f'{type(e).__name__}: {e}'}, 500
+
+            elapsed = time.perf_counter() - start
+            metrics.record(self.path, elapsed)
+            payload['latencia_ms'] = round(elapsed * 1000, 2)
+            self._send_json(status, payload)
+
+        def log_message(self, format, *args):
+            pass  # Sin log por petición (las latencias están en /metricas)
+
+    return QueryHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de consultas sobre modelos Top2Vec")
+    parser.add_argument('modelos', nargs='*', help="Nombres de carpetas en modelos/ (por defecto, todas)")
+    parser.add_argument('--carpeta', default='modelos', help="Carpeta de modelos")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_SERVICIO)
+    args = parser.parse_args()
+
+    models = load_models(args.carpeta, args.modelos)
+    if not models:
+        print(f"❌ No hay modelos en {args.carpeta}/")
+        return
+
+    server = ThreadingHTTPServer((args.host, args.puerto), make_handler(models, LatencyMetrics()))
+    print(f"🚀 Servicio escuchando en http://{args.host}:{args.puerto}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+TENDENCIAS DE TÓPICOS
+=====================
+
+Los conteos brutos engañan: el volumen total de noticias cambia mucho entre
+2008 y 2024. Este módulo calcula, para todos los tópicos a la vez y a
+cualquier frecuencia, métricas normalizadas por el volumen de cada periodo:
+
+- `participacion`: documentos del tópico / documentos del periodo
+- `media_movil`: media de la participación en los últimos `ventana` periodos
+- `zscore`: desviación de la participación frente a los `ventana` periodos
+  anteriores (media y desviación típica de esa base, sin el periodo actual)
+- `crecimiento`: variación relativa de la participación frente al periodo anterior
+
+y una lista ordenada de tópicos emergentes (participación reciente muy por
+encima de su base histórica).
+
+Parte de los conteos diarios precalculados (días × tópicos, ver
+artefactos_modelo.compute_daily_topic_counts): agregarlos por periodo y todas
+las métricas son operaciones sobre matrices periodos × tópicos, con sumas
+acumuladas para las ventanas móviles. Las ventanas son de periodos de
+calendario, pero los periodos sin documentos (huecos en los datos) tienen
+participación NaN y no cuentan en medias ni desviaciones.
+
+Los resultados se cachean por modelo, nivel, frecuencia y ventana en la
+caché compartida (cache_consultas.QUERY_CACHE).
+"""
+
+import numpy as np
+import pandas as pd
+
+from cache_consultas import QUERY_CACHE, query_key
+
+# Periodos de la ventana móvil y de la base del z-score, por frecuencia
+VENTANAS_TENDENCIA = {'D': 28, 'W': 12, 'M': 12, 'Q': 8, 'Y': 5}
+# Periodos recientes que se comparan con la base para detectar tópicos emergentes
+PERIODOS_RECIENTES = 3
+# Participación reciente mínima de un tópico emergente (descarta tópicos residuales)
+PARTICIPACION_MINIMA = 0.002
+
+
+def _window_sums(cumulative, ends, window):
+    """Suma de las filas [fin - ventana, fin) de una matriz a partir de su suma acumulada (con fila 0 inicial)"""
+    starts = np.maximum(ends - window, 0)
+    return cumulative[ends] - cumulative[starts]
+
+
+def _nanmean(values):
+    """Media por columnas ignorando NaN (NaN si la columna no tiene valores), sin avisos"""
+    valid = ~np.isnan(values)
+    return np.where(valid, values, 0).sum(axis=0) / valid.sum(axis=0)
+
+
+def aggregate_counts(fechas, counts, freq='M'):
+    """
+    Agrega conteos diarios por periodo, incluyendo los periodos sin documentos.
+
+    Args:
+        fechas: Días (datetime64[D]) de las filas de `counts`, ordenados
+        counts: Matriz (días × tópicos)
+        freq: Frecuencia de los periodos ('D', 'W', 'M', 'Q', 'Y')
+
+    Returns:
+        Tupla (periodos, conteos): PeriodIndex completo y matriz (periodos × tópicos)
+    """
+    periods = pd.DatetimeIndex(fechas).to_period(freq)
+    if len(periods) == 0:
+        return pd.PeriodIndex([], freq=freq), np.zeros((0, counts.shape[1]), dtype=np.int64)
+    full = pd.period_range(periods[0], periods[-1], freq=freq)
+    # Los ordinales de los periodos son enteros consecutivos: la fila es una resta
+    rows = periods.asi8 - full.asi8[0]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    aggregated = np.zeros((len(full), counts.shape[1]), dtype=np.int64)
+    aggregated[rows[starts]] = np.add.reduceat(np.asarray(counts, dtype=np.int64), starts, axis=0)
+    return full, aggregated
+
+
+def compute_topic_trends(fechas, counts, freq='M', window=None):
+    """
+    Métricas de tendencia de todos los tópicos a la frecuencia pedida.
+
+    Args:
+        fechas, counts: Conteos diarios (días × tópicos) de un nivel
+        freq: Frecuencia de los periodos ('D', 'W', 'M', 'Q', 'Y')
+        window: Periodos de la ventana móvil (por defecto, VENTANAS_TENDENCIA[freq])
+
+    Returns:
+        dict con 'periodos' (PeriodIndex), 'frecuencia', 'ventana', 'totales'
+        (periodos,) y matrices (periodos × tópicos) 'conteos', 'participacion',
+        'media_movil', 'zscore' y 'crecimiento' (NaN donde no hay base suficiente)
+    """
+    window = window or VENTANAS_TENDENCIA.get(freq, 12)
+    periods, period_counts = aggregate_counts(fechas, counts, freq)
+    totals = period_counts.sum(axis=1)
+
+    # Periodos sin documentos: participación indefinida (NaN), no cero, para que
+    # los huecos de datos no rebajen la media móvil ni la base del z-score
+    observed = totals > 0
+    shares = np.divide(period_counts, totals[:, None], out=np.full(period_counts.shape, np.nan),
+                       where=observed[:, None])
+    filled = np.where(observed[:, None], shares, 0.0)
+
+    # Sumas acumuladas (con una fila de ceros inicial) para todas las ventanas a la vez;
+    # el tamaño de cada ventana cuenta solo los periodos con documentos
+    cumulative = np.zeros((len(shares) + 1, shares.shape[1]))
+    np.cumsum(filled, axis=0, out=cumulative[1:])
+    cumulative_sq = np.zeros_like(cumulative)
+    np.cumsum(filled ** 2, axis=0, out=cumulative_sq[1:])
+    cumulative_obs = np.zeros(len(shares) + 1)
+    np.cumsum(observed, out=cumulative_obs[1:])
+    rows = np.arange(len(shares))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Media móvil con el periodo actual (ventana incompleta al principio)
+        sizes = _window_sums(cumulative_obs, rows + 1, window)[:, None]
+        rolling_mean = _window_sums(cumulative, rows + 1, window) / sizes
+        rolling_mean[~observed] = np.nan
+
+        # Base sin el periodo actual: media y desviación típica de los `window` anteriores
+        sizes = _window_sums(cumulative_obs, rows, window)[:, None]
+        sums = _window_sums(cumulative, rows, window)
+        sums_sq = _window_sums(cumulative_sq, rows, window)
+        base_mean = sums / sizes
+        base_std = np.sqrt(np.maximum(sums_sq / sizes - base_mean ** 2, 0))
+        zscore = (shares - base_mean) / base_std
+        zscore[(sizes < 2) | ~np.isfinite(zscore)] = np.nan
+
+        growth = np.full(shares.shape, np.nan)
+        growth[1:] = shares[1:] / shares[:-1] - 1
+        growth[~np.isfinite(growth)] = np.nan
+
+    return {
+        'periodos': periods,
+        'frecuencia': freq,
+        'ventana': window,
+        'totales': totals,
+        'conteos': period_counts,
+        'participacion': shares,
+        'media_movil': rolling_mean,
+        'zscore': zscore,
+        'crecimiento': growth
+    }
+
+
+def emerging_topics(trends, recent=PERIODOS_RECIENTES, min_share=PARTICIPACION_MINIMA):
+    """
+    Tópicos emergentes: participación media de los últimos `recent` periodos
+    frente a su base (los `ventana` periodos anteriores).
+
+    La puntuación es la diferencia estandarizada con la base; los tópicos se
+    ordenan de mayor a menor puntuación.
+
+    Returns:
+        DataFrame con topico, participacion_reciente, participacion_base,
+        crecimiento (relativo a la base) y puntuacion
+    """
+    shares = trends['participacion']
+    window = trends['ventana']
+    # Los periodos sin documentos (NaN) no cuentan en la media reciente ni en la base
+    with np.errstate(invalid='ignore', divide='ignore'):
+        recent_shares = _nanmean(shares[-recent:])
+        base = shares[max(len(shares) - recent - window, 0):max(len(shares) - recent, 0)]
+        base_mean = _nanmean(base)
+        base_std = np.sqrt(_nanmean((base - base_mean) ** 2))
+
+        # Desviación mínima: un tópico antes casi constante no obtiene una puntuación infinita
+        score = (recent_shares - base_mean) / np.maximum(base_std, 0.1 * np.maximum(base_mean, min_share))
+        growth = recent_shares / base_mean - 1
+
+    table = pd.DataFrame({
+        'topico': np.arange(shares.shape[1]),
+        'participacion_reciente': recent_shares,
+        'participacion_base': base_mean,
+        'crecimiento': np.where(np.isfinite(growth), growth, np.nan),
+        'puntuacion': score
+    })
+    table = table[(table['participacion_reciente'] >= min_share) & table['puntuacion'].notna()]
+    return table.sort_values('puntuacion', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def trends_table(trends):
+    """Tabla larga (periodo, tópico) con todas las métricas, para exportar"""
+    num_periods, num_topics = trends['conteos'].shape
+    return pd.DataFrame({
+        'periodo': np.repeat(trends['periodos'].to_timestamp(), num_topics),
+        'topico': np.tile(np.arange(num_topics), num_periods),
+        'documentos': trends['conteos'].ravel(),
+        'participacion': trends['participacion'].ravel(),
+        'media_movil': trends['media_movil'].ravel(),
+        'zscore': trends['zscore'].ravel(),
+        'crecimiento': trends['crecimiento'].ravel()
+    })
+
+
+def cached_topic_trends(model_id, level, fechas, counts, freq='M', window=None):
+    """compute_topic_trends a través de la caché compartida (por modelo, nivel, frecuencia y ventana)"""
+    key = query_key(model_id, 'tendencias', nivel=int(level), freq=freq, ventana=window)
+    return QUERY_CACHE.get_or_compute(key, lambda: compute_topic_trends(fechas, counts, freq, window))
@@ -0,0 +1,381 @@
+"""
+TÓPICOS DINÁMICOS POR VENTANAS DE TIEMPO
+========================================
+
+Los tópicos económicos cambian: el vocabulario de la crisis de 2008 no es el
+de la pandemia de 2020, y un único modelo global los mezcla. El modo dinámico:
+
+1. Divide el corpus en ventanas por fecha: anuales (un año natural cada una)
+   o móviles (`meses` de ancho, avanzando `paso` meses).
+2. Entrena un modelo por ventana (UMAP + HDBSCAN, con los parámetros del
+   modelo global) en procesos paralelos que leen la matriz de embeddings
+   compartida en modo solo lectura (memory-mapping), como estabilidad_topicos.
+   Cada ventana asigna sus documentos al vector de tópico más cercano.
+3. Enlaza los tópicos de ventanas consecutivas por similitud coseno de sus
+   vectores: cada tópico se enlaza con su más parecido de la ventana
+   siguiente (y viceversa) si la similitud supera UMBRAL_ENLACE.
+
+Con los enlaces se clasifican los eventos de cada transición:
+
+- Nacimiento: tópico sin enlace con la ventana anterior
+- Muerte: tópico sin enlace con la ventana siguiente
+- Fusión: tópico al que llegan dos o más tópicos de la ventana anterior
+- División: tópico que se enlaza con dos o más de la ventana siguiente
+
+y las cadenas de evolución (componentes conexas del grafo de enlaces).
+
+El resultado se guarda en `modelos/<nombre>/topicos_dinamicos.npz` y el
+explorador lo muestra como un diagrama de flujo entre ventanas.
+
+Uso desde la línea de comandos:
+    python topicos_dinamicos.py modelos/<nombre> --ventanas anual
+    python topicos_dinamicos.py modelos/<nombre> --ventanas movil --meses 24 --paso 12
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from estabilidad_topicos import model_args
+
+ARCHIVO_DINAMICO = 'topicos_dinamicos.npz'
+# Similitud mínima entre tópicos de ventanas consecutivas para enlazarlos
+UMBRAL_ENLACE = 0.7
+# Tope de documentos por ventana para el ajuste (el resto solo se asigna)
+MAX_DOCUMENTOS_VENTANA = 100_000
+# Ventanas con menos documentos se omiten (HDBSCAN no encontraría tópicos útiles)
+MIN_DOCUMENTOS_VENTANA = 1_000
+# Ventanas móviles por defecto: ancho y paso en meses
+MESES_VENTANA = 24
+PASO_VENTANA = 12
+# Documentos por bloque al asignar los documentos de una ventana
+TAMANO_BLOQUE = 50_000
+
+# Estado de cada proceso trabajador
+_WORKER = {}
+
+
+def time_windows(pub_dates, mode='anual', months=MESES_VENTANA, step=PASO_VENTANA):
+    """
+    Ventanas de tiempo sobre el rango de fechas del corpus.
+
+    Args:
+        pub_dates: Fecha de cada documento
+        mode: 'anual' (años naturales) o 'movil' (ventanas de `months` meses cada `step` meses)
+
+    Returns:
+        Lista de (etiqueta, inicio, fin) con fin exclusivo (datetime64[D])
+    """
+    dates = pd.to_datetime(np.asarray(pub_dates)).values
+    dates = dates[~np.isnat(dates)]
+    if len(dates) == 0:
+        return []
+    first, last = dates.min().astype('datetime64[M]'), dates.max().astype('datetime64[M]')
+
+    if mode == 'anual':
+        years = np.arange(first.astype('datetime64[Y]'), last.astype('datetime64[Y]') + 1)
+        return [(str(year), year.astype('datetime64[D]'), (year + 1).astype('datetime64[D]')) for year in years]
+
+    windows = []
+    start = first
+    while True:
+        end = start + months
+        windows.append((f"{start}–{end - 1}", start.astype('datetime64[D]'), end.astype('datetime64[D]')))
+        if end > last:
+            break
+        start = start + step
+    return windows
+
+
+def _init_worker(npy_path, umap_args, hdbscan_args):
+    _WORKER['vectors'] = np.load(npy_path, mmap_mode='r')
+    _WORKER['umap_args'] = umap_args
+    _WORKER['hdbscan_args'] = hdbscan_args
+
+
+def _train_window(indices, max_docs, seed):
+    """Una ventana: UMAP + HDBSCAN sobre sus documentos y asignación al tópico más cercano"""
+    import hdbscan
+    import umap
+
+    vectors = _WORKER['vectors']
+    fit_idx = indices
+    if len(indices) > max_docs:
+        fit_idx = np.sort(np.random.default_rng(seed).choice(indices, size=max_docs, replace=False))
+    sample = np.asarray(vectors[fit_idx], dtype=np.float32)
+
+    # Un hilo por ventana: las ventanas ya se entrenan en procesos paralelos
+    reduced = umap.UMAP(**{**_WORKER['umap_args'], 'n_jobs': 1}).fit_transform(sample)
+    labels = hdbscan.HDBSCAN(**_WORKER['hdbscan_args']).fit(reduced).labels_
+
+    # Vectores de tópicos: media normalizada de cada cluster (como Top2Vec)
+    num_labels = max(int(labels.max()) + 1, 0)
+    topic_vectors = np.zeros((num_labels, sample.shape[1]), dtype=np.float32)
+    np.add.at(topic_vectors, labels[labels >= 0], sample[labels >= 0])
+    topic_vectors /= np.maximum(np.linalg.norm(topic_vectors, axis=1, keepdims=True), 1e-12)
+
+    # Documentos de la ventana por tópico (cada documento a su tópico más cercano)
+    sizes = np.zeros(num_labels, dtype=np.int64)
+    if num_labels:
+        for start in range(0, len(indices), TAMANO_BLOQUE):
+            chunk = np.asarray(vectors[indices[start:start + TAMANO_BLOQUE]], dtype=np.float32)
+            sizes += np.bincount(np.argmax(chunk @ topic_vectors.T, axis=1), minlength=num_labels)
+    return topic_vectors, sizes
+
+
+def link_topics(vectors_a, vectors_b, threshold=UMBRAL_ENLACE):
+    """
+    Enlaces entre los tópicos de dos ventanas consecutivas.
+
+    Cada tópico se enlaza con su más parecido de la otra ventana (en ambos
+    sentidos) si la similitud coseno supera el umbral.
+
+    Returns:
+        Tupla (origen, destino, similitud) de los enlaces únicos
+    """
+    if len(vectors_a) == 0 or len(vectors_b) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    similarity = vectors_a @ vectors_b.T
+    forward = np.argmax(similarity, axis=1)
+    backward = np.argmax(similarity, axis=0)
+    sources = np.concatenate([np.arange(len(vectors_a)), backward])
+    targets = np.concatenate([forward, np.arange(len(vectors_b))])
+    pairs = np.unique(np.stack([sources, targets], axis=1), axis=0)
+    scores = similarity[pairs[:, 0], pairs[:, 1]]
+    keep = scores >= threshold
+    return pairs[keep, 0], pairs[keep, 1], scores[keep].astype(np.float32)
+
+
+def topic_events(num_topics, sources, targets):
+    """
+    Eventos de una transición entre ventanas a partir de sus enlaces.
+
+    Returns:
+        dict con 'nacimientos', 'muertes', 'fusiones' y 'divisiones'
+    """
+    num_a, num_b = num_topics
+    incoming = np.bincount(targets, minlength=num_b)
+    outgoing = np.bincount(sources, minlength=num_a)
+    return {
+        'nacimientos': np.flatnonzero(incoming == 0),
+        'muertes': np.flatnonzero(outgoing == 0),
+        'fusiones': np.flatnonzero(incoming >= 2),
+        'divisiones': np.flatnonzero(outgoing >= 2)
+    }
+
+
+def train_dynamic_topics(document_vectors, pub_dates, config, mode='anual', months=MESES_VENTANA,
+                         step=PASO_VENTANA, threshold=UMBRAL_ENLACE, max_docs=MAX_DOCUMENTOS_VENTANA,
+                         min_docs=MIN_DOCUMENTOS_VENTANA, word_vectors=None, vocab_map=None,
+                         n_workers=None, seed=0):
+    """
+    Entrena un modelo por ventana de tiempo en paralelo y enlaza sus tópicos.
+
+    Args:
+        document_vectors: Embeddings de los documentos (array o memmap)
+        pub_dates: Fecha de cada documento
+        config: Configuración del modelo (n_neighbors, min_cluster_size, ...)
+        mode, months, step: Ventanas (ver time_windows)
+        threshold: Similitud mínima de un enlace
+        max_docs: Máximo de documentos de ajuste por ventana
+        min_docs: Mínimo de documentos para entrenar una ventana
+        word_vectors, vocab_map: Si se pasan, se calculan las palabras clave de cada tópico
+        n_workers: Procesos paralelos (por defecto, min(ventanas, núcleos - 1))
+        seed: Semilla de las submuestras
+
+    Returns:
+        dict con las ventanas, los tópicos de cada una (vectores, tamaños y
+        palabras clave, concatenados con offsets), los enlaces y las cadenas
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    start_time = time.time()
+    dates = pd.to_datetime(np.asarray(pub_dates)).values.astype('datetime64[D]')
+    windows = []
+    for label, start, end in time_windows(dates, mode, months, step):
+        indices = np.flatnonzero((dates >= start) & (dates < end))
+        if len(indices) >= min_docs:
+            windows.append((label, start, end, indices))
+    if not windows:
+        raise ValueError(f"❌ Ninguna ventana tiene al menos {min_docs:,} documentos")
+
+    n_workers = n_workers or max(min(len(windows), (os.cpu_count() or 2) - 1), 1)
+    umap_args, hdbscan_args = model_args(config)
+
+    # Matriz de embeddings compartida por los procesos en modo solo lectura
+    tmp_dir = None
+    npy_path = getattr(document_vectors, 'filename', None)
+    if npy_path is None or not str(npy_path).endswith('.npy'):
+        tmp_dir = tempfile.TemporaryDirectory()
+        npy_path = os.path.join(tmp_dir.name, 'embeddings.npy')
+        np.save(npy_path, np.asarray(document_vectors))
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(str(npy_path), umap_args, hdbscan_args)) as pool:
+            results = list(pool.map(_train_window, [w[3] for w in windows], [max_docs] * len(windows),
+                                    [seed + i for i in range(len(windows))]))
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    # Tópicos de todas las ventanas concatenados: el tópico t de la ventana w es la fila offsets[w] + t
+    offsets = np.zeros(len(windows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(vectors) for vectors, _ in results])
+    vectors_all = np.concatenate([vectors for vectors, _ in results]).astype(np.float32)
+    sizes_all = np.concatenate([sizes for _, sizes in results])
+
+    links = {'ventana': [], 'origen': [], 'destino': [], 'similitud': []}
+    for w in range(len(windows) - 1):
+        sources, targets, scores = link_topics(results[w][0], results[w + 1][0], threshold)
+        links['ventana'].append(np.full(len(sources), w, dtype=np.int32))
+        links['origen'].append(sources)
+        links['destino'].append(targets)
+        links['similitud'].append(scores)
+    links = {key: np.concatenate(values) if values else np.empty(0) for key, values in links.items()}
+
+    # Cadenas de evolución: componentes conexas del grafo de enlaces
+    rows = offsets[links['ventana'].astype(np.int64)] + links['origen'].astype(np.int64)
+    cols = offsets[links['ventana'].astype(np.int64) + 1] + links['destino'].astype(np.int64)
+    graph = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(offsets[-1], offsets[-1]))
+    _, chains = connected_components(graph, directed=False)
+
+    dynamic = {
+        'modo': mode,
+        'umbral': threshold,
+        'etiquetas': np.array([w[0] for w in windows]),
+        'inicios': np.array([w[1] for w in windows]),
+        'fines': np.array([w[2] for w in windows]),
+        'documentos': np.array([len(w[3]) for w in windows], dtype=np.int64),
+        'offsets': offsets,
+        'vectores': vectors_all,
+        'tamanos': sizes_all,
+        'cadenas': chains.astype(np.int32),
+        'enlace_ventana': links['ventana'].astype(np.int32),
+        'enlace_origen': links['origen'].astype(np.int32),
+        'enlace_destino': links['destino'].astype(np.int32),
+        'enlace_similitud': links['similitud'].astype(np.float32),
+        'tiempo_segundos': round(time.time() - start_time, 1)
+    }
+    if word_vectors is not None and vocab_map is not None:
+        from artefactos_modelo import compute_topic_top_words, topic_keywords_table
+        word_ids, scores = compute_topic_top_words(vectors_all, word_vectors)
+        dynamic['palabras_clave'] = np.array(
+            [', '.join(words) for words, _ in topic_keywords_table(word_ids, scores, vocab_map, target_count=5)]
+        )
+    return dynamic
+
+
+def window_events(dynamic):
+    """
+    Eventos de cada transición entre ventanas consecutivas.
+
+    Returns:
+        DataFrame con una fila por transición (ventana destino) y el número de
+        nacimientos, muertes, fusiones y divisiones
+    """
+    offsets = dynamic['offsets']
+    rows = []
+    for w in range(len(dynamic['etiquetas']) - 1):
+        mask = dynamic['enlace_ventana'] == w
+        events = topic_events(
+            (offsets[w + 1] - offsets[w], offsets[w + 2] - offsets[w + 1]),
+            dynamic['enlace_origen'][mask], dynamic['enlace_destino'][mask]
+        )
+        rows.append({'ventana': dynamic['etiquetas'][w + 1],
+                     **{name: len(topics) for name, topics in events.items()}})
+    return pd.DataFrame(rows)
+
+
+def chain_table(dynamic, min_windows=2):
+    """
+    Cadenas de evolución que abarcan al menos `min_windows` ventanas.
+
+    Returns:
+        DataFrame con cadena, ventanas, primera y última ventana, documentos
+        y palabras clave del tópico más grande de la cadena en cada extremo
+    """
+    window_of = np.repeat(np.arange(len(dynamic['etiquetas'])), np.diff(dynamic['offsets']))
+    keywords = dynamic.get('palabras_clave')
+    rows = []
+    for chain in np.unique(dynamic['cadenas']):
+        members = np.flatnonzero(dynamic['cadenas'] == chain)
+        windows = np.unique(window_of[members])
+        if len(windows) < min_windows:
+            continue
+        first = members[window_of[members] == windows[0]]
+        last = members[window_of[members] == windows[-1]]
+        row = {
+            'cadena': int(chain),
+            'ventanas': len(windows),
+            'desde': dynamic['etiquetas'][windows[0]],
+            'hasta': dynamic['etiquetas'][windows[-1]],
+            'documentos': int(dynamic['tamanos'][members].sum())
+        }
+        if keywords is not None:
+            row['palabras_inicio'] = keywords[first[np.argmax(dynamic['tamanos'][first])]]
+            row['palabras_fin'] = keywords[last[np.argmax(dynamic['tamanos'][last])]]
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    return table.sort_values(['ventanas', 'documentos'], ascending=False).reset_index(drop=True) if rows else table
+
+
+def save_dynamic_topics(model_dir, dynamic):
+    """Guarda el resultado del modo dinámico en la carpeta del modelo"""
+    path = Path(model_dir) / ARCHIVO_DINAMICO
+    np.savez(path, **{key: np.asarray(value) for key, value in dynamic.items()})
+    return path
+
+
+def load_dynamic_topics(model_dir):
+    """Carga el resultado del modo dinámico (None si no se calculó)"""
+    path = Path(model_dir) / ARCHIVO_DINAMICO
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        dynamic = {key: data[key] for key in data.files}
+    for key in ('modo', 'umbral', 'tiempo_segundos'):
+        dynamic[key] = dynamic[key].item()
+    return dynamic
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena tópicos dinámicos por ventanas de tiempo de un modelo guardado")
+    parser.add_argument('modelo', help="Carpeta del modelo (modelos/<nombre>)")
+    parser.add_argument('--ventanas', choices=['anual', 'movil'], default='anual')
+    parser.add_argument('--meses', type=int, default=MESES_VENTANA)
+    parser.add_argument('--paso', type=int, default=PASO_VENTANA)
+    parser.add_argument('--umbral', type=float, default=UMBRAL_ENLACE)
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+
+    from top2vec import Top2Vec
+    from artefactos_modelo import get_vocab_map
+
+    model_dir = Path(args.modelo)
+    with open(model_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)['config']
+    model = Top2Vec.load(str(model_dir / 'modelo.model'))
+    pub_dates = np.load(model_dir / 'pub_dates.npy', allow_pickle=True)
+
+    dynamic = train_dynamic_topics(
+        model.document_vectors, pub_dates, config, mode=args.ventanas, months=args.meses, step=args.paso,
+        threshold=args.umbral, word_vectors=model.word_vectors, vocab_map=get_vocab_map(model, model_dir),
+        n_workers=args.procesos
+    )
+    save_dynamic_topics(model_dir, dynamic)
+    print(f"✅ {len(dynamic['etiquetas'])} ventanas, {len(dynamic['vectores'])} tópicos, "
+          f"{len(dynamic['enlace_origen'])} enlaces ({dynamic['tiempo_segundos']:.0f}s)")
+    print(window_events(dynamic).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()